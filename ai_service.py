@@ -1,20 +1,186 @@
 # ai_service.py
+import asyncio
 import os
+import random
+import time
 import aiohttp
 import json
+from collections import OrderedDict
+from typing import Dict, Optional
+from persistence import atomic_write_text, executor
 
 # Pega a chave de API das suas variáveis de ambiente
 API_KEY = os.getenv('GEMINI_API_KEY')
-API_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent"
+# A URL pode ser trocada (ex: um servidor HTTP local de teste)
+API_URL = os.getenv('GEMINI_API_URL', "https://generativelanguage.googleapis.com/v1beta/models/gemini-1.5-flash:generateContent")
+
+# Limites da sessão compartilhada
+MAX_CONCURRENT_REQUESTS = 4
+MAX_RETRIES = 3
+REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=30, connect=5, sock_read=25)
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+_session: Optional[aiohttp.ClientSession] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+async def start_session() -> aiohttp.ClientSession:
+    """Cria a sessão HTTP compartilhada (reaproveita DNS, TCP e TLS entre os cliques)."""
+    global _session
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(limit=MAX_CONCURRENT_REQUESTS * 2, limit_per_host=MAX_CONCURRENT_REQUESTS, ttl_dns_cache=300, keepalive_timeout=60)
+        _session = aiohttp.ClientSession(connector=connector, timeout=REQUEST_TIMEOUT)
+    return _session
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    return _semaphore
+
+async def close_session():
+    """Fecha a sessão compartilhada (chamado no desligamento do bot)."""
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+def _retry_delay(attempt: int, retry_after: Optional[str]) -> float:
+    """Backoff exponencial com jitter, respeitando o Retry-After quando vier."""
+    if retry_after:
+        try:
+            return min(float(retry_after), 30.0)
+        except ValueError:
+            pass
+    return random.uniform(0, min(8.0, 0.5 * (2 ** attempt)))
+
+async def _post_json(url: str, headers: dict, payload: dict, session: Optional[aiohttp.ClientSession] = None):
+    """POST com concorrência limitada e novas tentativas em 429/5xx. Retorna (status, corpo).
+
+    Cada tentativa ocupa uma vaga do semáforo só enquanto a requisição está em
+    andamento; a espera do backoff acontece fora dele, para um pedido limitado
+    pela API não segurar a vez dos outros. `session` permite usar outra sessão
+    (ex: nos testes, contra um servidor HTTP local).
+    """
+    session = session or await start_session()
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            async with _get_semaphore():
+                async with session.post(url, headers=headers, json=payload) as response:
+                    if response.status in RETRY_STATUSES and attempt < MAX_RETRIES:
+                        delay = _retry_delay(attempt, response.headers.get("Retry-After"))
+                        print(f"API do Gemini respondeu {response.status}; nova tentativa em {delay:.1f}s.")
+                    elif response.status == 200:
+                        return response.status, await response.json()
+                    else:
+                        return response.status, await response.text()
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            if attempt >= MAX_RETRIES:
+                raise
+            delay = _retry_delay(attempt, None)
+            print(f"Falha de conexão com a API do Gemini ({e!r}); nova tentativa em {delay:.1f}s.")
+        await asyncio.sleep(delay)
+
+class ResponseCache:
+    """Cache LRU com TTL das respostas da IA, indexado pelo prompt normalizado.
+
+    Se `filename` for informado, o conteúdo sobrevive a reinícios (a gravação
+    passa pela thread de persistência, fora do event loop).
+    """
+    def __init__(self, max_entries: int = 256, ttl: float = 6 * 3600, filename: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.filename = filename
+        self.entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    @staticmethod
+    def normalize(prompt: str) -> str:
+        """Ignora maiúsculas e espaços extras, para prompts equivalentes caírem na mesma chave."""
+        return " ".join(prompt.lower().split())
+
+    def get(self, key: str) -> Optional[dict]:
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.time():
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: str, value: dict):
+        self.entries[key] = (time.time() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self._save()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses, "hit_rate": round(self.hits / total, 3) if total else 0.0}
+
+    def _load(self):
+        if not self.filename or not os.path.exists(self.filename):
+            return
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return
+        now = time.time()
+        for key, (expires_at, value) in saved.items():
+            if expires_at > now:
+                self.entries[key] = (expires_at, value)
+
+    def _save(self):
+        if not self.filename:
+            return
+        text = json.dumps({key: list(entry) for key, entry in self.entries.items()}, ensure_ascii=False)
+        executor.submit(self.filename, atomic_write_text, self.filename, text)
+
+# AI_CACHE_FILE opcional: sem ele o cache fica só em memória
+response_cache = ResponseCache(filename=os.getenv('AI_CACHE_FILE'))
+# Prompts que já estão sendo gerados: pedidos iguais e simultâneos esperam a mesma chamada
+_inflight: Dict[str, asyncio.Task] = {}
 
 async def generate_embed_content(user_prompt: str) -> dict or None:
     """
-    Envia um prompt para a API do Gemini e formata a resposta para um embed.
+    Gera o conteúdo do embed, usando o cache e juntando pedidos idênticos simultâneos.
     Retorna um dicionário {'title': ..., 'description': ...} ou None em caso de erro.
     """
+    key = ResponseCache.normalize(user_prompt)
+    cached = response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # A chamada roda numa tarefa própria: se quem a iniciou for cancelado (ex: a
+    # interação expirou), os outros que esperam o mesmo prompt ainda recebem o resultado
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_fetch_and_cache(key, user_prompt))
+        _inflight[key] = task
+    return await asyncio.shield(task)
+
+async def _fetch_and_cache(key: str, user_prompt: str):
+    try:
+        result, cacheable = await _request_embed_content(user_prompt)
+        if cacheable:
+            response_cache.set(key, result)
+        return result
+    finally:
+        _inflight.pop(key, None)
+
+async def _request_embed_content(user_prompt: str):
+    """
+    Envia um prompt para a API do Gemini e formata a resposta para um embed.
+    Retorna (resultado, pode_ir_para_o_cache).
+    """
     if not API_KEY:
         print("ERRO: A chave de API do Gemini (GEMINI_API_KEY) não foi encontrada nas variáveis de ambiente.")
-        return None
+        return None, False
 
     headers = {
         'Content-Type': 'application/json',
@@ -37,33 +203,31 @@ async def generate_embed_content(user_prompt: str) -> dict or None:
     }
 
     try:
-        async with aiohttp.ClientSession() as session:
-            async with session.post(API_URL, headers=headers, json=data) as response:
-                if response.status == 200:
-                    response_json = await response.json()
-                    
-                    if not response_json.get('candidates'):
-                        print(f"Erro na API do Gemini: Resposta sem 'candidates'. Provavelmente bloqueado por segurança. Resposta: {response_json}")
-                        return {"title": "Erro de Conteúdo", "description": "A IA não pôde gerar o conteúdo, possivelmente por restrições de segurança do modelo."}
+        status, body = await _post_json(API_URL, headers, data)
+        if status == 200:
+            response_json = body
+            
+            if not response_json.get('candidates'):
+                print(f"Erro na API do Gemini: Resposta sem 'candidates'. Provavelmente bloqueado por segurança. Resposta: {response_json}")
+                return {"title": "Erro de Conteúdo", "description": "A IA não pôde gerar o conteúdo, possivelmente por restrições de segurança do modelo."}, False
 
-                    text_content = response_json['candidates'][0]['content']['parts'][0]['text']
-                    
-                    title = "Título Gerado pela IA"
-                    description = text_content
+            text_content = response_json['candidates'][0]['content']['parts'][0]['text']
+            
+            title = "Título Gerado pela IA"
+            description = text_content
+            
+            lines = text_content.strip().split('\n')
+            for line in lines:
+                if line.upper().startswith("TÍTULO:"):
+                    title = line[len("TÍTULO:"):].strip()
+                elif line.upper().startswith("DESCRIÇÃO:"):
+                    description = text_content[text_content.upper().find("DESCRIÇÃO:") + len("DESCRIÇÃO:"):].strip()
+                    break
                     
-                    lines = text_content.strip().split('\n')
-                    for line in lines:
-                        if line.upper().startswith("TÍTULO:"):
-                            title = line[len("TÍTULO:"):].strip()
-                        elif line.upper().startswith("DESCRIÇÃO:"):
-                            description = text_content[text_content.upper().find("DESCRIÇÃO:") + len("DESCRIÇÃO:"):].strip()
-                            break
-                            
-                    return {"title": title, "description": description}
-                else:
-                    error_text = await response.text()
-                    print(f"Erro na API do Gemini: {response.status} - {error_text}")
-                    return {"title": "Erro de API", "description": f"A API retornou um erro {response.status}. Verifique o console para mais detalhes."}
+            return {"title": title, "description": description}, True
+        else:
+            print(f"Erro na API do Gemini: {status} - {body}")
+            return {"title": "Erro de API", "description": f"A API retornou um erro {status}. Verifique o console para mais detalhes."}, False
     except Exception as e:
         print(f"Ocorreu um erro na requisição para a IA: {e}")
-        return None
\ No newline at end of file
+        return None, False
\ No newline at end of file
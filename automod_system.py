@@ -3,8 +3,147 @@ import discord
 import json
 import os
 import re
+import time
+from collections import OrderedDict, deque
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Tuple
+from config_system import config_system
+from persistence import atomic_write_text, executor
+try:
+    from re import _parser as sre_parse  # Python 3.11+
+except ImportError:
+    import sre_parse
+
+# Limites padrão de spam (podem ser trocados por servidor com /automod spam)
+DEFAULT_SPAM_MAX_MESSAGES = 5
+DEFAULT_SPAM_WINDOW_SECONDS = 10
+
+# Só mensagens com algo parecido com link ou domínio passam pelos padrões de phishing que exigem um
+LINK_HINT = re.compile(r"://|\w\.\w")
+WORD_CHAR = re.compile(r"\w")
+
+def trie_pattern(words) -> str:
+    """Monta uma regex em forma de árvore de prefixos para uma lista de palavras literais.
+
+    O `re` do Python testa uma alternância `a|b|c` ramo a ramo em cada posição;
+    com os prefixos em comum fatorados, cada posição só desce pelos ramos cujo
+    primeiro caractere bate, e o custo quase não cresce com o tamanho da lista.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        ends_here = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # Termina aqui ou continua: o `?` guloso prefere a palavra mais longa, como antes
+        return f"(?:{body})?" if ends_here else body
+
+    return build(trie)
+
+def _is_word_item(op, av) -> bool:
+    """O item da regex casa exatamente um caractere, e sempre um caractere de palavra (\\w)."""
+    name = str(op)
+    if name == "LITERAL":
+        return bool(WORD_CHAR.match(chr(av)))
+    if name == "IN":
+        for item_op, item_av in av:
+            item = str(item_op)
+            if item == "LITERAL" and WORD_CHAR.match(chr(item_av)):
+                continue
+            if item == "RANGE" and all(WORD_CHAR.match(chr(c)) for c in range(item_av[0], item_av[1] + 1)):
+                continue
+            if item == "CATEGORY" and str(item_av) in ("CATEGORY_WORD", "CATEGORY_DIGIT"):
+                continue
+            return False
+        return bool(av)
+    return False
+
+def _edge_is_word(items, last: bool) -> bool:
+    """A primeira (ou última) letra de qualquer texto que a sequência case é um \\w."""
+    if not items:
+        return False
+    op, av = items[-1] if last else items[0]
+    name = str(op)
+    if name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT"):
+        low, _, body = av
+        return low >= 1 and _edge_is_word(list(body), last)
+    if name == "SUBPATTERN":
+        return _edge_is_word(list(av[-1]), last)
+    if name == "ATOMIC_GROUP":
+        return _edge_is_word(list(av), last)
+    if name == "BRANCH":
+        return all(_edge_is_word(list(branch), last) for branch in av[1])
+    return _is_word_item(op, av)
+
+def needs_link(pattern: str) -> bool:
+    """True se todo texto que o padrão casa tem `://` ou um ponto entre letras (o que o `LINK_HINT` procura).
+
+    Só olha a sequência de nível mais alto do padrão: um `\\.` obrigatório entre itens
+    que sempre casam letras, ou `://` literal. Na dúvida (ponto opcional, `.` sem escape,
+    que casa qualquer caractere, etc.) retorna False e o padrão roda em toda mensagem.
+    """
+    try:
+        items = list(sre_parse.parse(pattern))
+    except Exception:
+        return False
+    literals = [chr(av) if str(op) == "LITERAL" else None for op, av in items]
+    if "://" in "".join(char or "\0" for char in literals):
+        return True
+    for i in range(1, len(items) - 1):
+        op, av = items[i]
+        is_dot = (str(op) == "LITERAL" and av == ord(".")) or (str(op) == "IN" and [(str(o), a) for o, a in av] == [("LITERAL", ord("."))])
+        if is_dot and _edge_is_word(items[:i], last=True) and _edge_is_word(items[i + 1:], last=False):
+            return True
+    return False
+
+class SpamLimiter:
+    """Janela deslizante por (servidor, usuário) com custo O(1) e memória limitada.
+
+    Cada autor guarda só um ring buffer com os últimos `max_messages + 1` horários.
+    As entradas ficam em ordem de uso (LRU): autores ociosos são descartados
+    pela frente, e nunca passamos de `max_tracked` autores ao mesmo tempo.
+    """
+    # 10.000 autores x ~0,7 KB (deque + chave) ≈ 7 MB no pior caso, folgado para os 100 MB da Discloud
+    def __init__(self, max_tracked: int = 10000, idle_seconds: float = 300):
+        self.max_tracked = max_tracked
+        self.idle_seconds = idle_seconds
+        self.buckets: "OrderedDict[Tuple[int, int], deque]" = OrderedDict()
+
+    def hit(self, guild_id: int, user_id: int, max_messages: int, window: float) -> bool:
+        """Registra uma mensagem e retorna True se o autor passou do limite."""
+        now = time.monotonic()
+        key = (guild_id, user_id)
+        bucket = self.buckets.get(key)
+        if bucket is None or bucket.maxlen != max_messages + 1:
+            bucket = deque(maxlen=max_messages + 1)
+            self.buckets[key] = bucket
+        else:
+            self.buckets.move_to_end(key)
+        bucket.append(now)
+        self._evict(now)
+
+        if len(bucket) == bucket.maxlen and now - bucket[0] <= window:
+            bucket.clear()
+            return True
+        return False
+
+    def _evict(self, now: float):
+        # Remove no máximo algumas entradas por chamada para manter o custo O(1) amortizado
+        for _ in range(2):
+            if not self.buckets:
+                return
+            key, oldest = next(iter(self.buckets.items()))
+            if len(self.buckets) > self.max_tracked or not oldest or now - oldest[-1] > self.idle_seconds:
+                self.buckets.popitem(last=False)
+            else:
+                return
 
 class AutoModSystem:
     # O __init__ agora aceita o client como opcional para ser definido depois
@@ -12,10 +151,10 @@ class AutoModSystem:
         self.client = client
         self.settings_file = "settings.json"
         self.settings = self.load_settings()
+        self.compile_filters()
         
-        # Variáveis para controle de spam
-        self.spam_threshold = 5
-        self.user_messages = {}
+        # Controle de spam (limites por servidor ficam no config_system)
+        self.spam_limiter = SpamLimiter()
 
     def load_settings(self):
         """Carrega as configurações do automod a partir de um arquivo JSON."""
@@ -35,13 +174,83 @@ class AutoModSystem:
             return default_settings
 
     def save_settings(self):
-        """Salva as configurações atuais no arquivo JSON."""
-        with open(self.settings_file, "w", encoding='utf-8') as f:
-            json.dump(self.settings, f, indent=4)
+        """Salva as configurações atuais no arquivo JSON (a escrita sai do event loop)."""
+        text = json.dumps(self.settings, indent=4)
+        executor.submit(self.settings_file, atomic_write_text, self.settings_file, text)
+        self.compile_filters()
 
     def reload_settings(self):
         """Recarrega as configurações do arquivo."""
         self.settings = self.load_settings()
+        self.compile_filters()
+
+    def compile_filters(self):
+        """Compila palavras-chave e padrões de phishing em uma única regex cada.
+
+        Assim cada mensagem é varrida uma vez só, não importa quantas regras existam.
+        As palavras-chave viram uma árvore de prefixos (ver `trie_pattern`), e os
+        padrões de phishing que só casam links (`needs_link`) rodam apenas em mensagens
+        com cara de link (`LINK_HINT`); os demais rodam em toda mensagem.
+        Tudo o que pode ser comparado em minúsculas roda sem IGNORECASE sobre o
+        texto já em minúsculas: assim o `re` descarta cada ramo da alternância
+        pelo primeiro caractere, em vez de testar ramo a ramo.
+        Só é refeito quando as configurações mudam (add/remove-keyword e reload).
+        """
+        keywords = {k.lower() for k in self.settings.get("nsfw_keywords", []) if k}
+        self.keyword_regex = re.compile(trie_pattern(keywords)) if keywords else None
+
+        self.phishing_regexes = []
+        for pattern in self.settings.get("phishing_patterns", []):
+            try:
+                self.phishing_regexes.append((pattern, re.compile(pattern, re.IGNORECASE)))
+            except re.error as e:
+                print(f"Padrão de phishing inválido ignorado ({pattern}): {e}")
+        # Padrões com grupos (retrorreferências, nomes) mudam de sentido ao serem unidos,
+        # então ficam de fora da regex combinada e são testados um a um
+        link_only = {pattern for pattern, _ in self.phishing_regexes if needs_link(pattern)}
+        combinable = [pattern for pattern, regex in self.phishing_regexes if regex.groups == 0]
+        # (padrão, regex, só roda com LINK_HINT)
+        self.phishing_separate = [(p, regex, p in link_only) for p, regex in self.phishing_regexes if regex.groups > 0]
+        # (regex, roda sobre o texto em minúsculas, só roda com LINK_HINT)
+        self.phishing_combined = []
+        for needs_hint in (False, True):
+            # Padrões sem nenhuma maiúscula (nem \S, \W...) valem igual sobre o texto em minúsculas
+            for on_lowered in (True, False):
+                group = [p for p in combinable if (p in link_only) == needs_hint and (p == p.lower()) == on_lowered]
+                if not group:
+                    continue
+                try:
+                    combined = re.compile("|".join(f"(?:{p})" for p in group), 0 if on_lowered else re.IGNORECASE)
+                except re.error as e:
+                    # Ex: flags globais como (?i) no meio da união; esse grupo é testado um a um
+                    print(f"Não foi possível unir os padrões de phishing, usando um a um: {e}")
+                    self.phishing_separate.extend((p, regex, needs_hint) for p, regex in self.phishing_regexes if p in group)
+                    continue
+                self.phishing_combined.append((combined, on_lowered, needs_hint))
+
+    def match_phishing(self, content: str, lowered: Optional[str] = None) -> Optional[str]:
+        """Retorna o padrão de phishing que bate com o conteúdo, ou None."""
+        has_link = None
+        if lowered is None:
+            lowered = content.lower()
+        for combined, on_lowered, needs_hint in self.phishing_combined:
+            if needs_hint:
+                if has_link is None:
+                    has_link = LINK_HINT.search(content) is not None
+                if not has_link:
+                    continue
+            if combined.search(lowered if on_lowered else content):
+                # Só no caso raro de acerto descobrimos qual padrão individual bateu
+                return next((p for p, regex in self.phishing_regexes if regex.search(content)), "desconhecido")
+        for pattern, regex, needs_hint in self.phishing_separate:
+            if needs_hint:
+                if has_link is None:
+                    has_link = LINK_HINT.search(content) is not None
+                if not has_link:
+                    continue
+            if regex.search(content):
+                return pattern
+        return None
 
     async def check_message(self, message: discord.Message):
         """Função principal que verifica cada mensagem."""
@@ -51,36 +260,27 @@ class AutoModSystem:
         if message.author.guild_permissions.administrator:
             return
 
-        for keyword in self.settings.get("nsfw_keywords", []):
-            if keyword.lower() in message.content.lower():
-                await self.punish_and_log(
-                    message, 
-                    "Conteúdo Inapropriado Detectado", 
-                    f"A mensagem continha a palavra-chave proibida: `{keyword}`."
-                )
-                return
-
-        for pattern in self.settings.get("phishing_patterns", []):
-            if re.search(pattern, message.content, re.IGNORECASE):
-                await self.punish_and_log(
-                    message, 
-                    "Link Malicioso Detectado",
-                    f"A mensagem continha um link suspeito que corresponde ao padrão: `{pattern}`."
-                )
-                return
-
-        user_id = str(message.author.id)
-        current_time = datetime.now().timestamp()
-        
-        if user_id not in self.user_messages:
-            self.user_messages[user_id] = []
+        content = message.content
+        lowered = content.lower()
+        if self.keyword_regex and (match := self.keyword_regex.search(lowered)):
+            await self.punish_and_log(
+                message, 
+                "Conteúdo Inapropriado Detectado", 
+                f"A mensagem continha a palavra-chave proibida: `{match.group(0).lower()}`."
+            )
+            return
 
-        self.user_messages[user_id].append(current_time)
-        self.user_messages[user_id] = [t for t in self.user_messages[user_id] if (current_time - t) <= 10]
+        if (pattern := self.match_phishing(content, lowered)) is not None:
+            await self.punish_and_log(
+                message, 
+                "Link Malicioso Detectado",
+                f"A mensagem continha um link suspeito que corresponde ao padrão: `{pattern}`."
+            )
+            return
 
-        if len(self.user_messages[user_id]) > self.spam_threshold:
+        max_messages, window = config_system.get_spam_limits(str(message.guild.id))
+        if self.spam_limiter.hit(message.guild.id, message.author.id, max_messages or DEFAULT_SPAM_MAX_MESSAGES, window or DEFAULT_SPAM_WINDOW_SECONDS):
             await message.channel.send(f"{message.author.mention}, por favor, evite enviar mensagens em excesso!", delete_after=10)
-            self.user_messages[user_id] = []
             return
 
     async def punish_and_log(self, message: discord.Message, reason_title: str, reason_desc: str):
@@ -89,7 +289,6 @@ class AutoModSystem:
         except (discord.NotFound, discord.Forbidden):
             pass
             
-        from config_system import config_system
         log_channel_id = config_system.get_log_channel(str(message.guild.id))
         if log_channel_id and self.client:
             log_channel = self.client.get_channel(log_channel_id)
@@ -0,0 +1,268 @@
+# benchmark_automod.py
+"""Benchmark offline do AutoModSystem.check_message.
+
+Gera mensagens sintéticas (sempre as mesmas para a mesma semente) e mede o filtro
+com listas de palavras-chave e de padrões de phishing de vários tamanhos. Não
+conecta ao Discord: autores e mensagens são substitutos leves, e os arquivos de
+dados são criados numa pasta temporária, sem tocar nos do bot.
+
+Uso:
+    python benchmark_automod.py                       # 1.000.000 de mensagens por cenário
+    python benchmark_automod.py --messages 200000 --save baseline.json
+    python benchmark_automod.py --baseline baseline.json --max-regression 0.15
+
+Cada cenário para ao atingir --max-seconds (30 s por padrão), mesmo antes de
+--messages; a vazão e os percentis são sobre o que foi medido.
+
+Com --baseline, sai com código 1 se algum cenário ficar mais lento que o limite
+(vazão menor ou p99 maior). Compare só resultados da mesma máquina.
+"""
+import argparse
+import json
+import os
+import random
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+ORIGINAL_CWD = os.getcwd()
+KEYWORD_SIZES = (10, 100, 1000)
+PATTERN_SIZES = (5, 50, 500)
+ALLOCATION_SAMPLE = 2000
+
+VOCABULARY = (
+    "bom dia pessoal alguém quer jogar hoje mais tarde vou entrar na call agora "
+    "que horas começa o evento obrigado valeu kkkk isso mesmo não sei ainda acho "
+    "que sim olha esse vídeo muito bom demais partida ranking orbs casamento perfil"
+).split()
+PHISHING_DOMAINS = ("discorcl.gift", "dlscord.gift", "discord-app.com", "discord-gifts.com", "steamcommunily.com")
+SAFE_LINKS = ("https://youtube.com/watch?v=abc", "https://github.com/LyrioOficial", "https://discord.com/channels/1/2")
+
+def load_automod():
+    """Importa o automod com o diretório de trabalho numa pasta temporária (settings e configs vazios)."""
+    sys.path.insert(0, REPO_DIR)
+    os.chdir(tempfile.mkdtemp(prefix="lyrio-bench-"))
+    import discord
+    from automod_system import AutoModSystem, SpamLimiter
+    return discord, AutoModSystem, SpamLimiter
+
+discord, AutoModSystem, SpamLimiter = load_automod()
+
+class BenchGuild:
+    __slots__ = ("id", "name")
+
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.name = f"Servidor {guild_id}"
+
+class BenchChannel:
+    __slots__ = ("id", "mention", "sent")
+
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.mention = f"<#{channel_id}>"
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+
+class BenchMember(discord.Member):
+    """Substituto de discord.Member: passa no isinstance do automod sem estado de gateway."""
+    def __init__(self, user_id: int, administrator: bool = False):
+        self._bench_id = user_id
+        self._bench_permissions = discord.Permissions(administrator=administrator)
+        self.dms = 0
+
+    @property
+    def id(self) -> int:
+        return self._bench_id
+
+    @property
+    def bot(self) -> bool:
+        return False
+
+    @property
+    def mention(self) -> str:
+        return f"<@{self._bench_id}>"
+
+    @property
+    def guild_permissions(self) -> discord.Permissions:
+        return self._bench_permissions
+
+    async def send(self, *args, **kwargs):
+        self.dms += 1
+
+class BenchMessage:
+    __slots__ = ("author", "content", "guild", "channel", "deleted")
+
+    def __init__(self, author: BenchMember, content: str, guild: BenchGuild, channel: BenchChannel):
+        self.author = author
+        self.content = content
+        self.guild = guild
+        self.channel = channel
+        self.deleted = False
+
+    async def delete(self):
+        self.deleted = True
+
+def random_word(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 10)))
+
+def make_settings(keyword_count: int, pattern_count: int, rng: random.Random) -> dict:
+    keywords = ["porn", "xxx", "hentai", "nsfw", "lewd", "gore"]
+    while len(keywords) < keyword_count:
+        keywords.append(random_word(rng))
+    patterns = list(PHISHING_DOMAINS)
+    while len(patterns) < pattern_count:
+        patterns.append(rf"{random_word(rng)}-(?:nitro|gift)\.(?:com|ru|xyz)")
+    return {"nsfw_keywords": keywords[:keyword_count], "phishing_patterns": patterns[:pattern_count]}
+
+def make_messages(count: int, settings: dict, rng: random.Random) -> List[BenchMessage]:
+    """~1% com palavra-chave, ~1% com link de phishing, ~5% com link comum, o resto texto limpo."""
+    guilds = [BenchGuild(guild_id) for guild_id in range(1, 5)]
+    channels = [BenchChannel(channel_id) for channel_id in range(100, 120)]
+    authors = [BenchMember(user_id, administrator=user_id % 200 == 0) for user_id in range(1000, 6000)]
+    keywords = settings["nsfw_keywords"]
+    messages = []
+    for _ in range(count):
+        words = rng.choices(VOCABULARY, k=rng.randint(3, 25))
+        roll = rng.random()
+        if roll < 0.01:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(keywords))
+        elif roll < 0.02:
+            words.append(f"https://{rng.choice(PHISHING_DOMAINS)}/claim")
+        elif roll < 0.07:
+            words.append(rng.choice(SAFE_LINKS))
+        messages.append(BenchMessage(rng.choice(authors), " ".join(words), rng.choice(guilds), rng.choice(channels)))
+    return messages
+
+def run_sync(coro):
+    """Executa uma corrotina que não suspende (os substitutos não fazem I/O), sem event loop."""
+    try:
+        coro.send(None)
+    except StopIteration as done:
+        return done.value
+    coro.close()
+    raise RuntimeError("check_message suspendeu; algum substituto está fazendo I/O de verdade")
+
+def percentile(sorted_ns: array, q: float) -> float:
+    return sorted_ns[min(len(sorted_ns) - 1, int(q * len(sorted_ns)))] / 1000
+
+def measure_allocations(automod, messages: List[BenchMessage]) -> Tuple[float, float]:
+    """(KB alocados no pico por mensagem, bytes retidos por mensagem) numa amostra, via tracemalloc."""
+    tracemalloc.start()
+    transient = 0
+    start_retained = tracemalloc.get_traced_memory()[0]
+    for message in messages:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        run_sync(automod.check_message(message))
+        transient += tracemalloc.get_traced_memory()[1] - before
+    retained = tracemalloc.get_traced_memory()[0] - start_retained
+    tracemalloc.stop()
+    return transient / len(messages) / 1024, retained / len(messages)
+
+def run_scenario(keyword_count: int, pattern_count: int, message_count: int, seed: int,
+                 max_seconds: float) -> Dict[str, float]:
+    rng = random.Random(seed)
+    settings = make_settings(keyword_count, pattern_count, rng)
+    messages = make_messages(min(message_count, 200000), settings, rng)
+    automod = AutoModSystem()
+    automod.settings = settings
+    automod.compile_filters()
+    automod.spam_limiter = SpamLimiter()
+
+    # Aquecimento, para não medir a primeira passada das regex e a criação dos buckets de spam
+    for message in messages[:5000]:
+        run_sync(automod.check_message(message))
+
+    latencies = array("q", bytes(8 * message_count))
+    check = automod.check_message
+    clock = time.perf_counter_ns
+    pool = len(messages)
+    deadline = clock() + int(max_seconds * 1e9)
+    started = clock()
+    measured = message_count
+    for i in range(message_count):
+        message = messages[i % pool]
+        t0 = clock()
+        run_sync(check(message))
+        t1 = clock()
+        latencies[i] = t1 - t0
+        # Listas grandes podem levar ms por mensagem; o orçamento mantém o cenário em tempo útil
+        if t1 > deadline and i % 1024 == 1023:
+            measured = i + 1
+            break
+    elapsed = (clock() - started) / 1e9
+    del latencies[measured:]
+
+    kb_per_message, retained_per_message = measure_allocations(automod, messages[:ALLOCATION_SAMPLE])
+    ordered = array("q", sorted(latencies))
+    return {
+        "keywords": keyword_count,
+        "patterns": pattern_count,
+        "messages": measured,
+        "msgs_per_sec": measured / elapsed,
+        "p50_us": percentile(ordered, 0.50),
+        "p99_us": percentile(ordered, 0.99),
+        "alloc_kb_per_msg": kb_per_message,
+        "retained_bytes_per_msg": retained_per_message,
+    }
+
+def compare(results: List[dict], baseline: List[dict], max_regression: float) -> List[str]:
+    """Cenários que pioraram além do limite em relação à linha de base."""
+    previous = {(row["keywords"], row["patterns"]): row for row in baseline}
+    failures = []
+    for row in results:
+        old = previous.get((row["keywords"], row["patterns"]))
+        if old is None:
+            continue
+        name = f"{row['keywords']} palavras / {row['patterns']} padrões"
+        if row["msgs_per_sec"] < old["msgs_per_sec"] * (1 - max_regression):
+            failures.append(f"{name}: vazão {old['msgs_per_sec']:,.0f} -> {row['msgs_per_sec']:,.0f} msg/s")
+        if row["p99_us"] > old["p99_us"] * (1 + max_regression):
+            failures.append(f"{name}: p99 {old['p99_us']:.1f} -> {row['p99_us']:.1f} µs")
+    return failures
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark offline do AutoModSystem.check_message")
+    parser.add_argument("--messages", type=int, default=1_000_000, help="mensagens por cenário")
+    parser.add_argument("--keywords", type=int, nargs="+", default=list(KEYWORD_SIZES), help="tamanhos da lista de palavras-chave")
+    parser.add_argument("--patterns", type=int, nargs="+", default=list(PATTERN_SIZES), help="tamanhos da lista de padrões de phishing")
+    parser.add_argument("--max-seconds", type=float, default=30, help="tempo máximo medido por cenário")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--save", help="grava os resultados em JSON (para usar como linha de base)")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--max-regression", type=float, default=0.15, help="piora tolerada (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    print(f"{'palavras':>8} {'padrões':>8} {'mensagens':>10} {'msg/s':>12} {'p50 µs':>8} {'p99 µs':>8} {'KB/msg':>8} {'retido B/msg':>13}")
+    results = []
+    for keyword_count in args.keywords:
+        for pattern_count in args.patterns:
+            row = run_scenario(keyword_count, pattern_count, args.messages, args.seed, args.max_seconds)
+            results.append(row)
+            print(f"{row['keywords']:>8} {row['patterns']:>8} {row['messages']:>10,} {row['msgs_per_sec']:>12,.0f} {row['p50_us']:>8.1f} "
+                  f"{row['p99_us']:>8.1f} {row['alloc_kb_per_msg']:>8.2f} {row['retained_bytes_per_msg']:>13.1f}", flush=True)
+
+    if args.save:
+        with open(os.path.join(ORIGINAL_CWD, args.save), "w", encoding="utf-8") as f:
+            json.dump({"python": sys.version.split()[0], "seed": args.seed, "results": results}, f, indent=4)
+    if args.baseline:
+        with open(os.path.join(ORIGINAL_CWD, args.baseline), encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        failures = compare(results, baseline, args.max_regression)
+        for failure in failures:
+            print(f"REGRESSÃO {failure}")
+        if failures:
+            return 1
+        print("Sem regressões em relação à linha de base.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,20 +4,34 @@ from discord import app_commands
 from typing import Optional
 from bot_config import bot_config
 from staff_commands import staff_system
+from command_sync import sync_if_changed
+from metrics import metrics
+from member_cache import member_cache
+from persistence import executor
+from loop_watchdog import loop_watchdog
 
 def setup_bot_commands(tree: app_commands.CommandTree, client: discord.Client):
     
     # --- NOVO COMANDO DE SINCRONIZAÇÃO ---
     @tree.command(name="sync", description="👑 [Dono] Sincroniza os comandos com o Discord.")
-    async def sync(interaction: discord.Interaction):
+    @app_commands.describe(
+        servidor="[Opcional] Envia só os comandos exclusivos deste servidor (apaga cópias antigas dos globais).",
+        forcar="[Opcional] Envia mesmo que nada tenha mudado desde a última sincronização."
+    )
+    async def sync(interaction: discord.Interaction, servidor: bool = False, forcar: bool = False):
         if not staff_system.is_staff(interaction.user):
             await interaction.response.send_message("❌ Apenas membros da Staff podem usar este comando.", ephemeral=True)
             return
         
         await interaction.response.defer(ephemeral=True, thinking=True)
         try:
-            synced = await tree.sync()
-            await interaction.followup.send(f"✅ Sincronizados {len(synced)} comandos com sucesso.")
+            # Só os comandos registrados para o servidor: copiar os globais para cá duplicaria tudo no cliente
+            guild = interaction.guild if servidor else None
+            changed, count = await sync_if_changed(tree, guild=guild, force=forcar)
+            if changed:
+                await interaction.followup.send(f"✅ Sincronizados {count} comandos com sucesso.")
+            else:
+                await interaction.followup.send(f"ℹ️ Nada mudou desde a última sincronização ({count} comandos). Use `forcar` para enviar mesmo assim.")
         except Exception as e:
             await interaction.followup.send(f"❌ Falha ao sincronizar comandos: {e}")
 
@@ -104,4 +118,44 @@ def setup_bot_commands(tree: app_commands.CommandTree, client: discord.Client):
             await interaction.response.send_message(embed=embed, ephemeral=True)
         except Exception as e:
             embed = discord.Embed(title="❌ Erro", description=f"Ocorreu um erro ao limpar a atividade: {e}", color=0xFF0000)
-            await interaction.response.send_message(embed=embed, ephemeral=True)
\ No newline at end of file
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @tree.command(name="stats", description="📈 [STAFF] Latência dos comandos, automod, gravações e memória do bot.")
+    async def stats(interaction: discord.Interaction):
+        if not staff_system.is_staff(interaction.user):
+            return await interaction.response.send_message("❌ Apenas membros da Staff podem usar este comando.", ephemeral=True)
+
+        def ms(seconds: Optional[float]) -> str:
+            return f"≤{seconds * 1000:g} ms" if seconds is not None else "> 10 s"
+
+        embed = discord.Embed(title="📈 Estatísticas do Bot", description=f"Coletando desde <t:{int(metrics.started_at)}:R>.", color=0x5865F2)
+        rows = metrics.command_summary()
+        if rows:
+            embed.add_field(name="Comandos (execuções · p50 · p95 · erros)", value="\n".join(
+                f"`/{name}` {count} · {ms(p50)} · {ms(p95)} · {errors}" for name, count, p50, p95, errors in rows
+            ), inline=False)
+        automod = metrics.merged("automod_check_seconds")
+        if automod.count:
+            embed.add_field(name="AutoMod", value=f"{automod.count:,} mensagens\np50 {ms(automod.quantile(0.5))} · p99 {ms(automod.quantile(0.99))}")
+        writes = executor.stats()
+        embed.add_field(name="Gravações", value=(
+            f"{writes['completed']:,} concluídas · {writes['failed']} falhas\n"
+            f"média {writes['avg_write_ms']} ms · fila {writes['depth']} (máx. {writes['max_depth']})"
+        ))
+        report = member_cache.memory_report(client)
+        rss = f"{report['rss_mb']:.1f} MB" if report["rss_mb"] is not None else "?"
+        embed.add_field(name="Memória", value=(
+            f"RSS {rss} · cache {report['mode']}\n"
+            f"{report['cached_members']:,}/{report['total_members']:,} membros em cache"
+        ))
+        embed.add_field(name="Gateway", value=f"{client.latency * 1000:.0f} ms · {len(client.guilds)} servidores")
+        lag = metrics.merged("loop_lag_seconds")
+        if lag.count:
+            last_stall = ""
+            if loop_watchdog.recent:
+                when, seconds, location = loop_watchdog.recent[-1]
+                last_stall = f"\núltimo: {seconds * 1000:.0f} ms em `{location}` <t:{int(when)}:R>"
+            embed.add_field(name="Event loop", value=(
+                f"atraso p99 {ms(lag.quantile(0.99))} · {loop_watchdog.stalls} travamentos{last_stall}"
+            ), inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
\ No newline at end of file
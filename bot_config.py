@@ -1,27 +1,37 @@
 # bot_config.py
-import json
-import os
 from typing import Optional
+from storage import get_repository
+
+PRESENCE_KEYS = ('status', 'activity_type', 'name', 'url', 'emoji')
 
 class BotConfig:
-    def __init__(self, filename="bot_config.json"):
+    def __init__(self, filename="bot_config.json", hashes_filename="command_hashes.json"):
         self.filename = filename
+        self.repo = get_repository("bot_config", filename)
+        # Hashes da árvore de comandos ficam numa coleção própria, fora do que o /status lê e grava
+        self.hashes_repo = get_repository("command_hashes", hashes_filename)
         self.data = self.load_data()
+        self.command_hashes = self.hashes_repo.load_all()
+        self.migrate_command_hashes()
 
     def load_data(self):
-        """Carrega a configuração do bot do arquivo JSON."""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return {}
-        return {}
-
-    def save_data(self):
-        """Salva a configuração atual no arquivo JSON."""
-        with open(self.filename, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+        """Carrega a configuração do bot do backend de armazenamento."""
+        return self.repo.load_all()
+
+    def migrate_command_hashes(self):
+        """Move os hashes antigos de `data['command_hashes']` para a coleção própria (na carga, de forma síncrona)."""
+        legacy = self.data.pop('command_hashes', None)
+        if legacy is None:
+            return
+        for scope, digest in legacy.items():
+            self.command_hashes.setdefault(scope, digest)
+        for future in (self.hashes_repo.save_keys(self.command_hashes, list(legacy)), self.repo.save_keys(self.data, ['command_hashes'])):
+            if future is not None:
+                future.result()
+
+    def save_data(self, *keys: str):
+        """Salva as chaves informadas (ou todas); chaves que saíram de `data` são apagadas do backend."""
+        self.repo.save_keys(self.data, keys or list(self.data))
 
     def set_presence(self, status: str, activity_type: Optional[str], name: Optional[str], url: Optional[str] = None, emoji: Optional[str] = None):
         """Salva as informações de presença, incluindo o novo campo emoji."""
@@ -30,11 +40,19 @@ class BotConfig:
         self.data['name'] = name
         self.data['url'] = url
         self.data['emoji'] = emoji  # Novo campo
-        self.save_data()
+        self.save_data(*PRESENCE_KEYS)
 
     def get_presence(self):
-        """Retorna as informações de presença salvas."""
-        return self.data
+        """Retorna as informações de presença salvas (só as chaves de presença)."""
+        return {key: self.data[key] for key in PRESENCE_KEYS if key in self.data}
+
+    def get_command_hash(self, scope: str) -> Optional[str]:
+        """Hash da árvore de comandos sincronizada por último no escopo ("global" ou ID do servidor)."""
+        return self.command_hashes.get(scope)
+
+    def set_command_hash(self, scope: str, digest: str):
+        self.command_hashes[scope] = digest
+        self.hashes_repo.save_keys(self.command_hashes, [scope])
 
 # Instância global
 bot_config = BotConfig()
\ No newline at end of file
@@ -0,0 +1,32 @@
+# command_sync.py
+import hashlib
+import json
+from typing import List, Optional, Tuple
+import discord
+from discord import app_commands
+from bot_config import bot_config
+
+GLOBAL_SCOPE = "global"
+
+def tree_payload(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> List[dict]:
+    """Comandos do escopo serializados como o Discord os recebe, em ordem estável."""
+    commands = tree.get_commands(guild=guild)
+    return sorted((command.to_dict(tree) for command in commands), key=lambda c: (c.get("type", 1), c["name"]))
+
+def tree_hash(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    payload = json.dumps(tree_payload(tree, guild), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+async def sync_if_changed(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None, force: bool = False) -> Tuple[bool, int]:
+    """Sincroniza o escopo só se a árvore mudou desde a última sincronização salva.
+
+    Retorna (sincronizou, quantidade de comandos no escopo). O hash só é salvo depois
+    que o Discord aceita a sincronização, então uma falha é repetida na próxima vez.
+    """
+    scope = str(guild.id) if guild else GLOBAL_SCOPE
+    digest = tree_hash(tree, guild)
+    if not force and bot_config.get_command_hash(scope) == digest:
+        return False, len(tree.get_commands(guild=guild))
+    synced = await tree.sync(guild=guild)
+    bot_config.set_command_hash(scope, digest)
+    return True, len(synced)
@@ -1,27 +1,20 @@
 # config_system.py
-import json
-import os
+from storage import get_repository
 
 class ConfigSystem:
     def __init__(self, filename="server_configs.json"):
         """Inicializa o sistema de configuração."""
         self.filename = filename
+        self.repo = get_repository("server_configs", filename)
         self.data = self.load_data()
 
     def load_data(self):
-        """Carrega os dados de configuração do arquivo JSON."""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return {}
-        return {}
-
-    def save_data(self):
-        """Salva os dados de configuração no arquivo JSON."""
-        with open(self.filename, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+        """Carrega os dados de configuração do backend de armazenamento."""
+        return self.repo.load_all()
+
+    def save_data(self, guild_id: str):
+        """Salva a configuração de um servidor."""
+        self.repo.save_keys(self.data, [guild_id])
 
     def get_guild_config(self, guild_id: str):
         """Obtém a configuração para um servidor específico."""
@@ -32,7 +25,7 @@ class ConfigSystem:
         if guild_id not in self.data:
             self.data[guild_id] = {}
         self.data[guild_id]["log_channel"] = channel_id
-        self.save_data()
+        self.save_data(guild_id)
 
     def get_log_channel(self, guild_id: str):
         """Obtém o ID do canal de log para um servidor."""
@@ -42,9 +35,22 @@ class ConfigSystem:
         """Remove a configuração do canal de log para um servidor."""
         if guild_id in self.data and "log_channel" in self.data[guild_id]:
             del self.data[guild_id]["log_channel"]
-            self.save_data()
+            self.save_data(guild_id)
             return True
         return False
 
+    def set_spam_limits(self, guild_id: str, max_messages: int, window_seconds: int):
+        """Define o limite de mensagens por janela de tempo do anti-spam."""
+        if guild_id not in self.data:
+            self.data[guild_id] = {}
+        self.data[guild_id]["spam_max_messages"] = max_messages
+        self.data[guild_id]["spam_window_seconds"] = window_seconds
+        self.save_data(guild_id)
+
+    def get_spam_limits(self, guild_id: str):
+        """Retorna (max_mensagens, janela_em_segundos); None usa o padrão do AutoMod."""
+        config = self.get_guild_config(guild_id)
+        return config.get("spam_max_messages"), config.get("spam_window_seconds")
+
 # Instância global do sistema de configuração
 config_system = ConfigSystem()
\ No newline at end of file
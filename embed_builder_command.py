@@ -5,71 +5,130 @@ import json
 from io import BytesIO
 from typing import List, Optional
 from staff_commands import staff_system
-from ai_service import generate_embed_content
-
-# --- Classes Base ---
-class BaseManagerView(ui.View):
-    def __init__(self, original_interaction: discord.Interaction, timeout: float = 900):
-        super().__init__(timeout=timeout)
-        self.original_interaction = original_interaction
-        self.message: Optional[discord.Message] = None
-
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.original_interaction.user.id:
-            await interaction.response.send_message("Você não pode controlar este painel.", ephemeral=True, delete_after=5)
-            return False
-        return True
-
-    async def on_timeout(self):
-        if self.message:
-            for item in self.children:
-                item.disabled = True
-            try:
-                await self.message.edit(content="*Este painel de criação expirou.*", view=self)
-            except discord.NotFound:
-                pass
+from view_state import view_states
+
+# Sessões do construtor ficam no armazenamento; 15 minutos sem uso e o painel expira
+SESSION_TTL = 900
+EXPIRED_TEXT = "*Este painel de criação expirou.*"
+
+class EmbedBuilderSession:
+    """Painel de criação reconstruído a partir do estado salvo a cada clique.
+
+    O estado é só o dono, o canal de destino, os embeds (como dicionários) e o índice
+    do embed em edição; os componentes usam custom_ids estáveis com o ID da sessão.
+    """
+    def __init__(self, session_id: str, state: dict):
+        self.session_id = session_id
+        self.state = state
+
+    @classmethod
+    def create(cls, session_id: str, owner_id: int, channel_id: int) -> 'EmbedBuilderSession':
+        state = view_states.put("embed", session_id, {
+            "owner_id": owner_id, "channel_id": channel_id, "index": 0,
+            "embeds": [discord.Embed(title="Novo Embed", description="Comece a editar!").to_dict()]
+        }, ttl=SESSION_TTL)
+        return cls(session_id, state)
+
+    @classmethod
+    def load(cls, session_id: str) -> Optional['EmbedBuilderSession']:
+        state = view_states.get("embed", session_id)
+        return cls(session_id, state) if state else None
+
+    def save(self):
+        """Grava as alterações e renova o prazo de expiração."""
+        view_states.put("embed", self.session_id, self.state, ttl=SESSION_TTL)
+
+    def close(self):
+        view_states.pop("embed", self.session_id)
+
+    @property
+    def embed_count(self) -> int:
+        return len(self.state["embeds"])
+
+    @property
+    def current_embed_index(self) -> int:
+        return self.state["index"]
+
+    def get_embeds(self) -> List[discord.Embed]:
+        return [discord.Embed.from_dict(data) for data in self.state["embeds"]]
+
+    def get_current_embed(self) -> discord.Embed:
+        return discord.Embed.from_dict(self.state["embeds"][self.current_embed_index])
+
+    def set_current_embed(self, embed: discord.Embed):
+        self.state["embeds"][self.current_embed_index] = embed.to_dict()
+
+    def create_panel_embed(self) -> discord.Embed:
+        return discord.Embed(
+            title="Painel de Criação de Mensagens",
+            description=f"Editando **Embed #{self.current_embed_index + 1}** de **{self.embed_count}**.\n"
+                        f"Destino: <#{self.state['channel_id']}>.",
+            color=0x2B2D31
+        )
+
+    def build_view(self) -> ui.View:
+        view = ui.View(timeout=None)
+        view.add_item(EmbedBuilderSelect(self.session_id, self.embed_count, self.current_embed_index))
+        for action in BUILDER_BUTTONS:
+            view.add_item(EmbedBuilderButton(action, self.session_id, disabled=action == "delete" and self.embed_count <= 1))
+        return view
+
+    async def update_message(self, interaction: discord.Interaction):
+        """Salva a sessão e redesenha o painel com o estado atualizado."""
+        self.save()
+        embeds = [self.create_panel_embed(), self.get_current_embed()]
+        if interaction.response.is_done():
+            await interaction.edit_original_response(embeds=embeds, view=self.build_view())
+        else:
+            await interaction.response.edit_message(embeds=embeds, view=self.build_view())
 
 class BaseModal(ui.Modal):
-    def __init__(self, view: 'EmbedBuilderView', *args, **kwargs):
+    def __init__(self, session: EmbedBuilderSession, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.view = view
+        self.session = session
 
 # --- Modals ---
 class EditTitleModal(BaseModal, title="Editar Título"):
-    def __init__(self, view: 'EmbedBuilderView'):
-        super().__init__(view)
-        self.embed_title.default = view.get_current_embed().title
+    def __init__(self, session: EmbedBuilderSession):
+        super().__init__(session)
+        self.embed_title.default = session.get_current_embed().title
     embed_title = ui.TextInput(label="Título", required=False, max_length=256)
     async def on_submit(self, interaction: discord.Interaction):
-        self.view.get_current_embed().title = self.embed_title.value
-        await self.view.update_message(interaction)
+        embed = self.session.get_current_embed()
+        embed.title = self.embed_title.value
+        self.session.set_current_embed(embed)
+        await self.session.update_message(interaction)
 
 class EditDescriptionModal(BaseModal, title="Editar Descrição"):
-    def __init__(self, view: 'EmbedBuilderView'):
-        super().__init__(view)
-        self.description.default = view.get_current_embed().description
+    def __init__(self, session: EmbedBuilderSession):
+        super().__init__(session)
+        self.description.default = session.get_current_embed().description
     description = ui.TextInput(label="Descrição", style=discord.TextStyle.paragraph, required=False, max_length=4000)
     async def on_submit(self, interaction: discord.Interaction):
-        self.view.get_current_embed().description = self.description.value
-        await self.view.update_message(interaction)
+        embed = self.session.get_current_embed()
+        embed.description = self.description.value
+        self.session.set_current_embed(embed)
+        await self.session.update_message(interaction)
 
 class EditColorModal(BaseModal, title="Editar Cor"):
-    def __init__(self, view: 'EmbedBuilderView'):
-        super().__init__(view)
-        if view.get_current_embed().color: self.color.default = f"#{view.get_current_embed().color.value:06x}"
+    def __init__(self, session: EmbedBuilderSession):
+        super().__init__(session)
+        if session.get_current_embed().color: self.color.default = f"#{session.get_current_embed().color.value:06x}"
     color = ui.TextInput(label="Cor Hexadecimal (ex: #FF5733)", required=False, max_length=7)
     async def on_submit(self, interaction: discord.Interaction):
+        embed = self.session.get_current_embed()
         color_val = self.color.value
-        if not color_val: self.view.get_current_embed().color = None
+        if not color_val: embed.color = None
         else:
-            try: self.view.get_current_embed().color = int(color_val.lstrip('#'), 16)
+            try: embed.color = int(color_val.lstrip('#'), 16)
             except ValueError: return await interaction.response.send_message("Cor inválida.", ephemeral=True, delete_after=5)
-        await self.view.update_message(interaction)
+        self.session.set_current_embed(embed)
+        await self.session.update_message(interaction)
 
 class EditAuthorModal(BaseModal, title="Editar Autor"):
-    def __init__(self, view: 'EmbedBuilderView'):
-        super().__init__(view)
-        author = view.get_current_embed().author
+    def __init__(self, session: EmbedBuilderSession):
+        super().__init__(session)
+        author = session.get_current_embed().author
         self.author_name.default = author.name
         self.author_url.default = author.url
         self.author_icon_url.default = author.icon_url
@@ -77,156 +136,170 @@ class EditAuthorModal(BaseModal, title="Editar Autor"):
     author_url = ui.TextInput(label="URL do Autor (Opcional)", required=False)
     author_icon_url = ui.TextInput(label="URL do Ícone do Autor (Opcional)", required=False)
     async def on_submit(self, interaction: discord.Interaction):
-        self.view.get_current_embed().set_author(name=self.author_name.value or "", url=self.author_url.value or None, icon_url=self.author_icon_url.value or None)
-        await self.view.update_message(interaction)
+        embed = self.session.get_current_embed()
+        embed.set_author(name=self.author_name.value or "", url=self.author_url.value or None, icon_url=self.author_icon_url.value or None)
+        self.session.set_current_embed(embed)
+        await self.session.update_message(interaction)
 
 class EditImageModal(BaseModal, title="Editar Imagens"):
-    def __init__(self, view: 'EmbedBuilderView'):
-        super().__init__(view)
-        embed = view.get_current_embed()
+    def __init__(self, session: EmbedBuilderSession):
+        super().__init__(session)
+        embed = session.get_current_embed()
         self.image_url.default = embed.image.url
         self.thumbnail_url.default = embed.thumbnail.url
     image_url = ui.TextInput(label="URL da Imagem Principal (Opcional)", required=False)
     thumbnail_url = ui.TextInput(label="URL da Miniatura (Opcional)", required=False)
     async def on_submit(self, interaction: discord.Interaction):
-        embed = self.view.get_current_embed()
+        embed = self.session.get_current_embed()
         embed.set_image(url=self.image_url.value or None)
         embed.set_thumbnail(url=self.thumbnail_url.value or None)
-        await self.view.update_message(interaction)
+        self.session.set_current_embed(embed)
+        await self.session.update_message(interaction)
 
 class EditFooterModal(BaseModal, title="Editar Rodapé"):
-    def __init__(self, view: 'EmbedBuilderView'):
-        super().__init__(view)
-        footer = view.get_current_embed().footer
+    def __init__(self, session: EmbedBuilderSession):
+        super().__init__(session)
+        footer = session.get_current_embed().footer
         self.footer_text.default = footer.text
         self.footer_icon_url.default = footer.icon_url
     footer_text = ui.TextInput(label="Texto do Rodapé", required=False, max_length=2048)
     footer_icon_url = ui.TextInput(label="URL do Ícone do Rodapé (Opcional)", required=False)
     async def on_submit(self, interaction: discord.Interaction):
-        self.view.get_current_embed().set_footer(text=self.footer_text.value or "", icon_url=self.footer_icon_url.value or None)
-        await self.view.update_message(interaction)
+        embed = self.session.get_current_embed()
+        embed.set_footer(text=self.footer_text.value or "", icon_url=self.footer_icon_url.value or None)
+        self.session.set_current_embed(embed)
+        await self.session.update_message(interaction)
 
-class ImportJsonModal(ui.Modal, title="Importar JSON"):
-    def __init__(self, view: 'EmbedBuilderView'):
-        super().__init__()
-        self.view = view
+class ImportJsonModal(BaseModal, title="Importar JSON"):
     json_data = ui.TextInput(label="Cole o código JSON aqui", style=discord.TextStyle.paragraph, required=True)
     async def on_submit(self, interaction: discord.Interaction):
         try:
             data = json.loads(self.json_data.value)
             embed_dicts = data.get('embeds', [data])
-            self.view.embeds = [discord.Embed.from_dict(d) for d in embed_dicts]
-            self.view.components = [] # Reset components on import
-            self.view.current_embed_index = 0
-            await self.view.update_message(interaction)
+            # Passa pelo discord.Embed para validar e normalizar cada embed
+            self.session.state["embeds"] = [discord.Embed.from_dict(d).to_dict() for d in embed_dicts][:10]
+            self.session.state["index"] = 0
+            await self.session.update_message(interaction)
         except Exception as e:
             await interaction.response.send_message(f"Erro ao processar JSON: {e}", ephemeral=True, delete_after=10)
 
-class AIGenerateModal(ui.Modal, title="Gerar Embed com IA"):
-    def __init__(self, view: 'EmbedBuilderView'):
-        super().__init__()
-        self.view = view
+class AIGenerateModal(BaseModal, title="Gerar Embed com IA"):
     prompt = ui.TextInput(label="Qual o tema do embed?", placeholder="Ex: 'um resumo sobre a história da Roma Antiga'", style=discord.TextStyle.paragraph)
     async def on_submit(self, interaction: discord.Interaction):
-        await interaction.response.defer(ephemeral=True, thinking=True)
+        await interaction.response.defer()
+        # Import tardio: a IA (e o cache de respostas) só carrega quando alguém usa o botão
+        from ai_service import generate_embed_content
         content = await generate_embed_content(self.prompt.value)
         if content:
-            embed = self.view.get_current_embed()
+            embed = self.session.get_current_embed()
             embed.title = content.get("title")
             embed.description = content.get("description")
-            await self.view.update_message(interaction.message)
-            await interaction.followup.send("✅ Conteúdo gerado!", ephemeral=True, delete_after=5)
+            self.session.set_current_embed(embed)
+            await self.session.update_message(interaction)
+            await interaction.followup.send("✅ Conteúdo gerado!", ephemeral=True)
         else:
-            await interaction.followup.send("❌ Não foi possível gerar o conteúdo.", ephemeral=True, delete_after=5)
-
-# --- VIEW PRINCIPAL DO CONSTRUTOR DE EMBED ---
-class EmbedBuilderView(BaseManagerView):
-    def __init__(self, original_interaction: discord.Interaction, target_channel: discord.TextChannel):
-        super().__init__(original_interaction)
-        self.target_channel = target_channel
-        self.embeds: List[discord.Embed] = [discord.Embed(title="Novo Embed", description="Comece a editar!")]
-        self.components: List[ui.ActionRow] = []
-        self.current_embed_index = 0
-        self._add_components()
+            await interaction.followup.send("❌ Não foi possível gerar o conteúdo.", ephemeral=True)
 
-    def get_current_embed(self) -> discord.Embed:
-        return self.embeds[self.current_embed_index]
+# --- COMPONENTES PERSISTENTES DO CONSTRUTOR DE EMBED ---
+# ação -> (label, emoji, estilo, linha)
+BUILDER_BUTTONS = {
+    "add": ("Adicionar Embed", "➕", discord.ButtonStyle.success, 1),
+    "delete": ("Apagar Embed", "🗑️", discord.ButtonStyle.danger, 1),
+    "ai": ("Gerar com IA", "✨", discord.ButtonStyle.primary, 1),
+    "title": ("Título", "✏️", discord.ButtonStyle.secondary, 2),
+    "description": ("Descrição", "📄", discord.ButtonStyle.secondary, 2),
+    "color": ("Cor", "🎨", discord.ButtonStyle.secondary, 2),
+    "author": ("Autor", "👤", discord.ButtonStyle.secondary, 3),
+    "image": ("Imagem/Thumb", "🖼️", discord.ButtonStyle.secondary, 3),
+    "footer": ("Rodapé", "🦶", discord.ButtonStyle.secondary, 3),
+    "fields": ("Campos", "➕", discord.ButtonStyle.secondary, 3),
+    "import": ("Importar JSON", "📥", discord.ButtonStyle.grey, 4),
+    "export": ("Exportar JSON", "📤", discord.ButtonStyle.grey, 4),
+    "send": ("Enviar Mensagem", "🚀", discord.ButtonStyle.primary, 4),
+}
+BUILDER_MODALS = {
+    "ai": AIGenerateModal, "title": EditTitleModal, "description": EditDescriptionModal, "color": EditColorModal,
+    "author": EditAuthorModal, "image": EditImageModal, "footer": EditFooterModal, "import": ImportJsonModal,
+}
 
-    def create_panel_embed(self) -> discord.Embed:
-        return discord.Embed(
-            title="Painel de Criação de Mensagens",
-            description=f"Editando **Embed #{self.current_embed_index + 1}** de **{len(self.embeds)}**.\n"
-                        f"Destino: {self.target_channel.mention}.",
-            color=0x2B2D31
-        )
-    
-    def _add_components(self):
-        self.clear_items()
-        options = [discord.SelectOption(label=f"Embed #{i+1}", value=str(i)) for i in range(len(self.embeds))]
-        self.add_item(ui.Select(placeholder=f"Editando Embed #{self.current_embed_index + 1}", options=options, row=0))
-        self.add_item(ui.Button(label="Adicionar Embed", emoji="➕", style=discord.ButtonStyle.success, row=1))
-        self.add_item(ui.Button(label="Apagar Embed", emoji="🗑️", style=discord.ButtonStyle.danger, row=1, disabled=len(self.embeds) <= 1))
-        self.add_item(ui.Button(label="Gerar com IA", emoji="✨", style=discord.ButtonStyle.primary, row=1))
-        self.add_item(ui.Button(label="Título", emoji="✏️", style=discord.ButtonStyle.secondary, row=2))
-        self.add_item(ui.Button(label="Descrição", emoji="📄", style=discord.ButtonStyle.secondary, row=2))
-        self.add_item(ui.Button(label="Cor", emoji="🎨", style=discord.ButtonStyle.secondary, row=2))
-        self.add_item(ui.Button(label="Autor", emoji="👤", style=discord.ButtonStyle.secondary, row=3))
-        self.add_item(ui.Button(label="Imagem/Thumb", emoji="🖼️", style=discord.ButtonStyle.secondary, row=3))
-        self.add_item(ui.Button(label="Rodapé", emoji="🦶", style=discord.ButtonStyle.secondary, row=3))
-        self.add_item(ui.Button(label="Campos", emoji="➕", style=discord.ButtonStyle.secondary, row=3))
-        self.add_item(ui.Button(label="Importar JSON", emoji="📥", style=discord.ButtonStyle.grey, row=4))
-        self.add_item(ui.Button(label="Exportar JSON", emoji="📤", style=discord.ButtonStyle.grey, row=4))
-        self.add_item(ui.Button(label="Enviar Mensagem", emoji="🚀", style=discord.ButtonStyle.primary, row=4))
+async def load_session(interaction: discord.Interaction, session_id: str) -> Optional[EmbedBuilderSession]:
+    """Carrega a sessão do clique; responde e retorna None se ela venceu ou não é do usuário."""
+    session = EmbedBuilderSession.load(session_id)
+    if session is None:
+        await interaction.response.edit_message(content=EXPIRED_TEXT, embeds=[], view=None)
+        return None
+    if interaction.user.id != session.state["owner_id"]:
+        await interaction.response.send_message("Você não pode controlar este painel.", ephemeral=True, delete_after=5)
+        return None
+    return session
 
-    async def update_message(self, interaction: discord.Interaction):
-        self._add_components() # Recria os botões com o estado atualizado (ex: botão de apagar)
-        await interaction.response.edit_message(
-            embeds=[self.create_panel_embed(), self.get_current_embed()], 
-            view=self
-        )
+class EmbedBuilderSelect(ui.DynamicItem[ui.Select], template=r"lyrio:embed:select:(?P<session_id>\d+)"):
+    def __init__(self, session_id: str, embed_count: int = 1, current_index: int = 0, item: Optional[ui.Select] = None):
+        options = [discord.SelectOption(label=f"Embed #{i+1}", value=str(i)) for i in range(embed_count)]
+        super().__init__(item or ui.Select(
+            placeholder=f"Editando Embed #{current_index + 1}", options=options, row=0,
+            custom_id=f"lyrio:embed:select:{session_id}"
+        ))
+        self.session_id = session_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Select, match):
+        return cls(match["session_id"], item=item)
 
     async def callback(self, interaction: discord.Interaction):
-        # Este callback agora lida com todos os botões e selects
-        custom_id = interaction.data.get('custom_id') # Para componentes com ID
-        
-        # Lógica para o Menu de Seleção
-        if interaction.data.get('component_type') == 3:
-             self.current_embed_index = int(interaction.data['values'][0])
-             await self.update_message(interaction)
-             return
-
-        # Lógica para os Botões (usa o label como identificador)
-        label = interaction.data.get('label')
-        if label == "Adicionar Embed":
-            if len(self.embeds) >= 10: return await interaction.response.send_message("Limite de 10 embeds.", ephemeral=True, delete_after=5)
-            self.embeds.append(discord.Embed(description=f"Novo Embed #{len(self.embeds) + 1}"))
-            self.current_embed_index = len(self.embeds) - 1
-            await self.update_message(interaction)
-        elif label == "Apagar Embed":
-            self.embeds.pop(self.current_embed_index)
-            self.current_embed_index = min(self.current_embed_index, len(self.embeds) - 1)
-            await self.update_message(interaction)
-        elif label == "Gerar com IA": await interaction.response.send_modal(AIGenerateModal(self))
-        elif label == "Título": await interaction.response.send_modal(EditTitleModal(self))
-        elif label == "Descrição": await interaction.response.send_modal(EditDescriptionModal(self))
-        elif label == "Cor": await interaction.response.send_modal(EditColorModal(self))
-        elif label == "Autor": await interaction.response.send_modal(EditAuthorModal(self))
-        elif label == "Imagem/Thumb": await interaction.response.send_modal(EditImageModal(self))
-        elif label == "Rodapé": await interaction.response.send_modal(EditFooterModal(self))
-        elif label == "Campos": await interaction.response.send_message("Funcionalidade de Campos em desenvolvimento.", ephemeral=True, delete_after=5)
-        elif label == "Importar JSON": await interaction.response.send_modal(ImportJsonModal(self))
-        elif label == "Exportar JSON":
-            output = {"embeds": [e.to_dict() for e in self.embeds]}
-            if self.components: output["components"] = [c.to_dict() for c in self.components]
-            json_string = json.dumps(output, indent=4, ensure_ascii=False)
+        session = await load_session(interaction, self.session_id)
+        if session is None:
+            return
+        session.state["index"] = min(int(self.item.values[0]), session.embed_count - 1)
+        await session.update_message(interaction)
+
+class EmbedBuilderButton(ui.DynamicItem[ui.Button], template=rf"lyrio:embed:(?P<action>{'|'.join(BUILDER_BUTTONS)}):(?P<session_id>\d+)"):
+    def __init__(self, action: str, session_id: str, disabled: bool = False):
+        label, emoji, style, row = BUILDER_BUTTONS[action]
+        super().__init__(ui.Button(
+            label=label, emoji=emoji, style=style, row=row, disabled=disabled,
+            custom_id=f"lyrio:embed:{action}:{session_id}"
+        ))
+        self.action = action
+        self.session_id = session_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: ui.Button, match):
+        return cls(match["action"], match["session_id"])
+
+    async def callback(self, interaction: discord.Interaction):
+        session = await load_session(interaction, self.session_id)
+        if session is None:
+            return
+        action = self.action
+        if action in BUILDER_MODALS:
+            await interaction.response.send_modal(BUILDER_MODALS[action](session))
+        elif action == "add":
+            if session.embed_count >= 10: return await interaction.response.send_message("Limite de 10 embeds.", ephemeral=True, delete_after=5)
+            session.state["embeds"].append(discord.Embed(description=f"Novo Embed #{session.embed_count + 1}").to_dict())
+            session.state["index"] = session.embed_count - 1
+            await session.update_message(interaction)
+        elif action == "delete":
+            if session.embed_count <= 1: return await interaction.response.send_message("O painel precisa de pelo menos um embed.", ephemeral=True, delete_after=5)
+            session.state["embeds"].pop(session.current_embed_index)
+            session.state["index"] = min(session.current_embed_index, session.embed_count - 1)
+            await session.update_message(interaction)
+        elif action == "fields":
+            await interaction.response.send_message("Funcionalidade de Campos em desenvolvimento.", ephemeral=True, delete_after=5)
+        elif action == "export":
+            json_string = json.dumps({"embeds": session.state["embeds"]}, indent=4, ensure_ascii=False)
             file = discord.File(BytesIO(json_string.encode('utf-8')), filename="message.json")
             await interaction.response.send_message("JSON da sua mensagem:", file=file, ephemeral=True)
-        elif label == "Enviar Mensagem":
+        elif action == "send":
             await interaction.response.defer(ephemeral=True)
+            channel = interaction.guild.get_channel(session.state["channel_id"]) if interaction.guild else None
+            if channel is None:
+                return await interaction.followup.send("❌ O canal de destino não existe mais.", ephemeral=True)
             try:
-                await self.target_channel.send(embeds=self.embeds)
-                await interaction.followup.send(f"✅ Mensagem enviada para {self.target_channel.mention}!", ephemeral=True)
-                self.stop()
+                await channel.send(embeds=session.get_embeds())
+                await interaction.followup.send(f"✅ Mensagem enviada para {channel.mention}!", ephemeral=True)
+                session.close()
+                await interaction.edit_original_response(view=None)
             except Exception as e:
                 await interaction.followup.send(f"❌ Ocorreu um erro: {e}", ephemeral=True)
 
@@ -237,10 +310,9 @@ def setup_embed_builder_command(tree: app_commands.CommandTree):
         if not (isinstance(interaction.user, discord.Member) and staff_system.is_staff(interaction.user)):
             return await interaction.response.send_message("❌ Você não tem permissão para usar este comando.", ephemeral=True)
         
-        view = EmbedBuilderView(interaction, canal)
+        session = EmbedBuilderSession.create(str(interaction.id), interaction.user.id, canal.id)
         await interaction.response.send_message(
-            embeds=[view.create_panel_embed(), view.get_current_embed()], 
-            view=view, 
+            embeds=[session.create_panel_embed(), session.get_current_embed()], 
+            view=session.build_view(), 
             ephemeral=True
         )
-        view.message = await interaction.original_response()
\ No newline at end of file
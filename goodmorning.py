@@ -1,129 +1,264 @@
 # goodmorning.py
 import discord
 from discord import app_commands
-import random
-import json
 import os
+import random
+import time
 from datetime import datetime, timedelta
 from typing import Optional
 
 # Importa os sistemas
 from marriage_system import marriage_system
+from persistence import WriteBehind
+from storage import get_repository
+from leaderboard import Leaderboard, MergedLeaderboard
+from member_resolver import member_resolver
+from view_state import view_states
+from lazy import LazyProxy
+
+# "guild": cada servidor tem sua própria economia; "global": uma carteira única por usuário
+ECONOMY_MODE = os.getenv("ECONOMY_MODE", "guild").lower()
+GLOBAL_SCOPE = "global"
 
 class CoinSystem:
-    def __init__(self, filename="user_coins.json"):
+    def __init__(self, filename="user_coins.json", mode: str = ECONOMY_MODE):
         self.filename = filename
-        self.data = self.load_data()
+        self.mode = mode
+        self.repo = get_repository("coins", filename)
+        # Dados particionados: escopo (ID do servidor ou "global") -> usuário -> registro
+        self.shards = self.load_data()
+        # Um índice de riqueza por escopo, mantido a cada mudança de saldo (usado no /ranking)
+        self.leaderboards = {}
+        for scope, shard in self.shards.items():
+            leaderboard = self.leaderboards.setdefault(scope, Leaderboard())
+            for user_id, user_data in shard.items():
+                leaderboard.update(user_id, user_data.get("coins", 0))
+        # As mutações só marcam o usuário como alterado; o arquivo é gravado em lote
+        self.writer = WriteBehind(self._write_dirty)
+
+    @staticmethod
+    def storage_key(scope: str, user_id: str) -> str:
+        """Chave no backend: "servidor:usuário", ou só o usuário no escopo global (formato legado)."""
+        return user_id if scope == GLOBAL_SCOPE else f"{scope}:{user_id}"
 
     def load_data(self):
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                return {}
-        return {}
+        shards = {}
+        for key, user_data in self.repo.load_all().items():
+            scope, _, user_id = key.rpartition(":")
+            shards.setdefault(scope or GLOBAL_SCOPE, {})[user_id] = user_data
+        return shards
 
     def save_data(self):
-        with open(self.filename, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
-
-    def add_coins(self, user_id: str, amount: int):
-        if user_id not in self.data:
-            self.data[user_id] = {"coins": 0, "last_daily": None, "total_earned": 0, "roleplay_counts": {}}
+        self.repo.upsert_many({self.storage_key(scope, user_id): user_data for scope, shard in self.shards.items() for user_id, user_data in shard.items()})
+
+    def _write_dirty(self, keys):
+        # Só os usuários alterados vão para o backend (no SQLite, um upsert por linha)
+        view = {}
+        for key in keys:
+            scope, _, user_id = key.rpartition(":")
+            user_data = self.shards.get(scope or GLOBAL_SCOPE, {}).get(user_id)
+            if user_data is not None:
+                view[key] = user_data
+        return self.repo.save_keys(view, keys)
+
+    def flush(self):
+        """Grava imediatamente as alterações pendentes."""
+        self.writer.flush()
+
+    def scope(self, guild_id: Optional[str]) -> str:
+        """Escopo da economia para um servidor (DMs e o modo global usam a carteira global)."""
+        if self.mode == GLOBAL_SCOPE or not guild_id:
+            return GLOBAL_SCOPE
+        return str(guild_id)
+
+    def get_shard(self, guild_id: Optional[str]) -> dict:
+        """Todos os usuários da economia de um servidor."""
+        return self.shards.get(self.scope(guild_id), {})
+
+    def get_leaderboard(self, guild_id: Optional[str]) -> Leaderboard:
+        return self.leaderboards.setdefault(self.scope(guild_id), Leaderboard())
+
+    def get_ranking(self, guild_id: Optional[str]):
+        """Índice para o /ranking: no modo por servidor inclui as carteiras globais ainda não migradas."""
+        scope = self.scope(guild_id)
+        if scope == GLOBAL_SCOPE or not self.shards.get(GLOBAL_SCOPE):
+            return self.get_leaderboard(guild_id)
+        return MergedLeaderboard(self.get_leaderboard(guild_id), self.get_leaderboard(None))
+
+    def _get_user(self, guild_id: Optional[str], user_id: str, create: bool = False, claim: bool = False) -> Optional[dict]:
+        """Registro do usuário no escopo do servidor.
+
+        Leituras enxergam a carteira global antiga sem mexer nela; só as mutações do
+        próprio dono (`claim` ou `create`) a movem para o servidor.
+        """
+        scope = self.scope(guild_id)
+        shard = self.shards.get(scope)
+        user_data = shard.get(user_id) if shard else None
+        if user_data is None and scope != GLOBAL_SCOPE:
+            if claim or create:
+                user_data = self._claim_legacy_wallet(scope, user_id)
+            else:
+                user_data = self.shards.get(GLOBAL_SCOPE, {}).get(user_id)
+        if user_data is None and create:
+            user_data = {"coins": 0, "last_daily": None, "total_earned": 0, "roleplay_counts": {}}
+            self.shards.setdefault(scope, {})[user_id] = user_data
+        return user_data
+
+    def _claim_legacy_wallet(self, scope: str, user_id: str) -> Optional[dict]:
+        """Move uma carteira global antiga (de antes da partição) para o primeiro servidor onde o usuário a usar."""
+        legacy_shard = self.shards.get(GLOBAL_SCOPE)
+        if not legacy_shard or user_id not in legacy_shard:
+            return None
+        user_data = legacy_shard.pop(user_id)
+        self.get_leaderboard(None).remove(user_id)
+        self.shards.setdefault(scope, {})[user_id] = user_data
+        self.leaderboards.setdefault(scope, Leaderboard()).update(user_id, user_data.get("coins", 0))
+        self.writer.mark_dirty(self.storage_key(GLOBAL_SCOPE, user_id), self.storage_key(scope, user_id))
+        return user_data
+
+    def _mark_dirty(self, guild_id: Optional[str], user_id: str):
+        self.writer.mark_dirty(self.storage_key(self.scope(guild_id), user_id))
+
+    def add_coins(self, guild_id: Optional[str], user_id: str, amount: int):
+        user_data = self._get_user(guild_id, user_id, create=True)
         
-        if "coins" not in self.data[user_id]:
-            self.data[user_id]["coins"] = 0
-        if "total_earned" not in self.data[user_id]:
-            self.data[user_id]["total_earned"] = 0
-
-        self.data[user_id]["coins"] += amount
-        self.data[user_id]["total_earned"] += amount
-        self.save_data()
-        return self.data[user_id]["coins"]
-
-    def remove_coins(self, user_id: str, amount: int):
-        if user_id not in self.data or self.data[user_id].get("coins", 0) < amount:
+        if "coins" not in user_data:
+            user_data["coins"] = 0
+        if "total_earned" not in user_data:
+            user_data["total_earned"] = 0
+
+        user_data["coins"] += amount
+        user_data["total_earned"] += amount
+        self.get_leaderboard(guild_id).update(user_id, user_data["coins"])
+        self._mark_dirty(guild_id, user_id)
+        return user_data["coins"]
+
+    def remove_coins(self, guild_id: Optional[str], user_id: str, amount: int):
+        user_data = self._get_user(guild_id, user_id, claim=True)
+        if user_data is None or user_data.get("coins", 0) < amount:
             return False
-        self.data[user_id]["coins"] -= amount
-        self.save_data()
+        user_data["coins"] -= amount
+        self.get_leaderboard(guild_id).update(user_id, user_data["coins"])
+        self._mark_dirty(guild_id, user_id)
         return True
 
-    def get_coins(self, user_id: str):
-        if user_id not in self.data:
+    def get_coins(self, guild_id: Optional[str], user_id: str):
+        user_data = self._get_user(guild_id, user_id)
+        if user_data is None:
+            return 0
+        return user_data.get("coins", 0)
+
+    def get_total_earned(self, guild_id: Optional[str], user_id: str):
+        user_data = self._get_user(guild_id, user_id)
+        if user_data is None:
             return 0
-        return self.data[user_id].get("coins", 0)
-
-    def increment_roleplay_count(self, user_id: str, action_type: str):
-        if user_id not in self.data:
-            self.data[user_id] = {"coins": 0, "last_daily": None, "total_earned": 0, "roleplay_counts": {}}
-        if "roleplay_counts" not in self.data[user_id]:
-            self.data[user_id]["roleplay_counts"] = {}
-        if action_type not in self.data[user_id]["roleplay_counts"]:
-            self.data[user_id]["roleplay_counts"][action_type] = 0
-        self.data[user_id]["roleplay_counts"][action_type] += 1
-        self.save_data()
-
-    def get_roleplay_counts(self, user_id: str):
-        if user_id not in self.data:
+        return user_data.get("total_earned", 0)
+
+    def increment_roleplay_count(self, guild_id: Optional[str], user_id: str, action_type: str):
+        user_data = self._get_user(guild_id, user_id, create=True)
+        if "roleplay_counts" not in user_data:
+            user_data["roleplay_counts"] = {}
+        if action_type not in user_data["roleplay_counts"]:
+            user_data["roleplay_counts"][action_type] = 0
+        user_data["roleplay_counts"][action_type] += 1
+        self._mark_dirty(guild_id, user_id)
+
+    def get_roleplay_counts(self, guild_id: Optional[str], user_id: str):
+        user_data = self._get_user(guild_id, user_id)
+        if user_data is None:
             return {}
-        return self.data[user_id].get("roleplay_counts", {})
+        return user_data.get("roleplay_counts", {})
 
-    def can_claim_daily(self, user_id: str):
-        if user_id not in self.data: return True
-        last_daily = self.data[user_id].get("last_daily")
+    def can_claim_daily(self, guild_id: Optional[str], user_id: str):
+        user_data = self._get_user(guild_id, user_id)
+        if user_data is None: return True
+        last_daily = user_data.get("last_daily")
         if not last_daily: return True
         last_date = datetime.fromisoformat(last_daily).date()
         return last_date < datetime.now().date()
 
-    def claim_daily(self, user_id: str):
-        if not self.can_claim_daily(user_id): return False, 0
+    def claim_daily(self, guild_id: Optional[str], user_id: str):
+        if not self.can_claim_daily(guild_id, user_id): return False, 0
         amount = random.randint(50, 150)
-        self.add_coins(user_id, amount)
-        if user_id not in self.data:
-            self.data[user_id] = {"coins": 0, "last_daily": None, "total_earned": 0}
-        self.data[user_id]["last_daily"] = datetime.now().isoformat()
-        self.save_data()
+        self.add_coins(guild_id, user_id, amount)
+        self._get_user(guild_id, user_id, claim=True)["last_daily"] = datetime.now().isoformat()
+        self._mark_dirty(guild_id, user_id)
         return True, amount
 
-    def can_use_new_phrase(self, user_id: str):
-        if user_id not in self.data: return True
-        last_phrase = self.data[user_id].get("last_new_phrase")
+    def can_use_new_phrase(self, guild_id: Optional[str], user_id: str):
+        user_data = self._get_user(guild_id, user_id)
+        if user_data is None: return True
+        last_phrase = user_data.get("last_new_phrase")
         if not last_phrase: return True
         last_date = datetime.fromisoformat(last_phrase).date()
         return last_date < datetime.now().date()
 
-    def use_new_phrase(self, user_id: str):
-        if not self.can_use_new_phrase(user_id): return False, 0
+    def use_new_phrase(self, guild_id: Optional[str], user_id: str):
+        if not self.can_use_new_phrase(guild_id, user_id): return False, 0
         amount = random.randint(5, 15)
-        self.add_coins(user_id, amount)
-        if user_id not in self.data:
-            self.data[user_id] = {"coins": 0, "last_daily": None, "total_earned": 0, "last_new_phrase": None}
-        self.data[user_id]["last_new_phrase"] = datetime.now().isoformat()
-        self.save_data()
+        self.add_coins(guild_id, user_id, amount)
+        self._get_user(guild_id, user_id, claim=True)["last_new_phrase"] = datetime.now().isoformat()
+        self._mark_dirty(guild_id, user_id)
         return True, amount
 
-coin_system = CoinSystem()
+# Criada no primeiro uso: o arquivo de Orbs só é lido quando alguém mexe na economia
+coin_system = LazyProxy(CoinSystem, "coin_system")
+
+# Botões do /daily: o custom_id carrega a ação e o dono; o resto do estado já vive no CoinSystem
+DAILY_BUTTONS = {
+    "claim": ("🎁 Recompensa Diária", discord.ButtonStyle.primary, "💰"),
+    "stats": ("📊 Estatísticas", discord.ButtonStyle.secondary, "📈"),
+    "phrase": ("🔄 Nova Frase", discord.ButtonStyle.secondary, "✨"),
+}
+DAILY_NOT_YOURS = {
+    "claim": "<:policial:1387164051586682942> Esta recompensa não é para você!",
+    "stats": "<:policial:1387164051586682942> Estas estatísticas não são suas!",
+    "phrase": "<:pepebravo:1387163775810928782> Este botão não é para você, seu bobão!",
+}
+
+class DailyButton(discord.ui.DynamicItem[discord.ui.Button], template=r"lyrio:daily:(?P<action>claim|stats|phrase):(?P<user_id>\d+)"):
+    def __init__(self, action: str, user_id: str):
+        label, style, emoji = DAILY_BUTTONS[action]
+        super().__init__(discord.ui.Button(label=label, style=style, emoji=emoji, custom_id=f"lyrio:daily:{action}:{user_id}"))
+        self.action = action
+        self.user_id = user_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["action"], match["user_id"])
+
+    async def callback(self, interaction: discord.Interaction):
+        if interaction.user.id != int(self.user_id):
+            await interaction.response.send_message(DAILY_NOT_YOURS[self.action], ephemeral=True)
+            return
+        view = GoodMorningView(str(interaction.guild_id) if interaction.guild_id else None, self.user_id, interaction.user.mention)
+        if self.action == "claim":
+            await view.claim_daily(interaction)
+        elif self.action == "phrase":
+            await view.new_phrase(interaction)
+        else:
+            await interaction.response.send_message("Use o comando `/perfil` para ver suas estatísticas completas!", ephemeral=True)
 
 class GoodMorningView(discord.ui.View):
-    def __init__(self, user_id: str, user_mention: str):
-        super().__init__(timeout=300)
+    def __init__(self, guild_id: Optional[str], user_id: str, user_mention: str):
+        # Sem timeout: os botões continuam funcionando depois de um reinício
+        super().__init__(timeout=None)
+        self.guild_id = guild_id
         self.user_id = user_id
         self.user_mention = user_mention
-        self.has_claimed = False
-        self.has_used_new_phrase = False
-        self.message = None
-
-    async def on_timeout(self):
-        if self.message:
-            for item in self.children:
-                item.disabled = True
-            expired_embed = self.create_embed()
-            expired_embed.set_footer(text="Esta sessão expirou. Use /daily novamente.")
-            try:
-                await self.message.edit(embed=expired_embed, view=self)
-            except discord.NotFound:
-                pass
+        claim_button = DailyButton("claim", user_id)
+        if not coin_system.can_claim_daily(guild_id, user_id):
+            claim_button.item.disabled = True
+            claim_button.item.label = "✅ Coletado!"
+            claim_button.item.style = discord.ButtonStyle.success
+        phrase_button = DailyButton("phrase", user_id)
+        if not coin_system.can_use_new_phrase(guild_id, user_id):
+            phrase_button.item.disabled = True
+            phrase_button.item.label = "Usada hoje!"
+            phrase_button.item.style = discord.ButtonStyle.success
+        self.add_item(claim_button)
+        self.add_item(DailyButton("stats", user_id))
+        self.add_item(phrase_button)
 
     def get_greeting_phrases(self):
         greetings = ["☀️ Bom dia! Que seu dia seja repleto de alegria!", "🌅 Bom dia! Um novo dia, novas oportunidades!", "🌞 Bom dia! Que a energia positiva te acompanhe!", "🌻 Bom dia! Desperte com gratidão e determinação!", "🌈 Bom dia! Hoje é um ótimo dia para ser feliz!", "☕ Bom dia! Que seu café seja forte e seu dia seja incrível!", "🦋 Bom dia! Transforme cada momento em algo especial!", "🌺 Bom dia! Floresça onde você estiver plantado!", "✨ Bom dia! Brilhe como a estrela que você é!", "🎵 Bom dia! Que sua vida seja uma música feliz!"]
@@ -134,15 +269,15 @@ class GoodMorningView(discord.ui.View):
         return random.choice(quotes)
 
     def create_embed(self):
-        current_coins = coin_system.get_coins(self.user_id)
+        current_coins = coin_system.get_coins(self.guild_id, self.user_id)
         embed = discord.Embed(title="🌅 Bom Dia!", description=f"{self.get_greeting_phrases()}\n\n{self.user_mention}", color=0xFFD700)
         embed.add_field(name="💭 Frase Motivacional", value=self.get_motivational_quote(), inline=False)
         embed.add_field(name="🪙 Seus Orbs", value=f"**{current_coins}** Orbs", inline=True)
-        if coin_system.can_claim_daily(self.user_id):
+        if coin_system.can_claim_daily(self.guild_id, self.user_id):
             embed.add_field(name="🎁 Recompensa Diária", value="Disponível! Clique no botão abaixo.", inline=True)
         else:
             embed.add_field(name="⏰ Próxima Recompensa", value="Disponível amanhã!", inline=True)
-        if coin_system.can_use_new_phrase(self.user_id) and not self.has_used_new_phrase:
+        if coin_system.can_use_new_phrase(self.guild_id, self.user_id):
             embed.add_field(name="✨ Nova Frase", value="Disponível! (5-15 Orbs)", inline=True)
         else:
             embed.add_field(name="🔄 Nova Frase", value="Usada hoje!", inline=True)
@@ -150,101 +285,91 @@ class GoodMorningView(discord.ui.View):
         embed.timestamp = discord.utils.utcnow()
         return embed
 
-    @discord.ui.button(label="🎁 Recompensa Diária", style=discord.ButtonStyle.primary, emoji="💰")
-    async def daily_reward_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.user.id != int(self.user_id):
-            await interaction.response.send_message("<:policial:1387164051586682942> Esta recompensa não é para você!", ephemeral=True)
-            return
-        if self.has_claimed:
-            await interaction.response.send_message("<:policial:1387164051586682942> Você já coletou sua recompensa diária!", ephemeral=True)
-            return
-        success, amount = coin_system.claim_daily(self.user_id)
+    async def claim_daily(self, interaction: discord.Interaction):
+        success, amount = coin_system.claim_daily(self.guild_id, self.user_id)
         if not success:
             await interaction.response.send_message("<:policial:1387164051586682942> Você já coletou sua recompensa diária hoje! Volte amanhã.", ephemeral=True)
             return
-        self.has_claimed = True
-        button.disabled = True
-        button.label = "✅ Coletado!"
-        button.style = discord.ButtonStyle.success
-        new_embed = self.create_embed()
-        total_coins = coin_system.get_coins(self.user_id)
+        # Recria a view a partir do estado salvo, já com o botão marcado como coletado
+        view = GoodMorningView(self.guild_id, self.user_id, self.user_mention)
+        total_coins = coin_system.get_coins(self.guild_id, self.user_id)
         success_embed = discord.Embed(title="Recompensa Coletada!", description=f"Você ganhou **{amount} Orbs**!\n\nTotal: **{total_coins} Orbs** 🪙", color=0x00FF00)
         success_embed.set_footer(text="Volte amanhã para mais recompensas!")
-        await interaction.response.edit_message(embed=new_embed, view=self)
+        await interaction.response.edit_message(embed=view.create_embed(), view=view)
         await interaction.followup.send(embed=success_embed, ephemeral=True)
 
-    @discord.ui.button(label="📊 Estatísticas", style=discord.ButtonStyle.secondary, emoji="📈")
-    async def stats_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.user.id != int(self.user_id):
-            await interaction.response.send_message("<:policial:1387164051586682942> Estas estatísticas não são suas!", ephemeral=True)
-            return
-        await interaction.response.send_message("Use o comando `/perfil` para ver suas estatísticas completas!", ephemeral=True)
-
-    @discord.ui.button(label="🔄 Nova Frase", style=discord.ButtonStyle.secondary, emoji="✨")
-    async def new_phrase_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        if interaction.user.id != int(self.user_id):
-            await interaction.response.send_message("<:pepebravo:1387163775810928782> Este botão não é para você, seu bobão!", ephemeral=True)
-            return
-        if self.has_used_new_phrase:
-            await interaction.response.send_message("<:policial:1387164051586682942> Você já usou a nova frase hoje!", ephemeral=True)
-            return
-        success, coins_earned = coin_system.use_new_phrase(str(interaction.user.id))
+    async def new_phrase(self, interaction: discord.Interaction):
+        success, coins_earned = coin_system.use_new_phrase(self.guild_id, self.user_id)
         if not success:
             await interaction.response.send_message("<:policial:1387164051586682942> Você já gerou uma nova frase hoje! Volte amanhã para gerar outra.", ephemeral=True)
             return
-        self.has_used_new_phrase = True
-        button.disabled = True
-        button.label = "Usada hoje!"
-        button.style = discord.ButtonStyle.success
-        new_embed = self.create_embed()
-        await interaction.response.edit_message(embed=new_embed, view=self)
+        view = GoodMorningView(self.guild_id, self.user_id, self.user_mention)
+        await interaction.response.edit_message(embed=view.create_embed(), view=view)
         await interaction.followup.send(f"✨ Nova frase gerada! Você ganhou **{coins_earned} Orbs** por interagir! 🪙", ephemeral=True)
 
-class ProposalView(discord.ui.View):
-    def __init__(self, proposer: discord.Member, target: discord.Member, cost: int):
-        super().__init__(timeout=300)
-        self.proposer = proposer
-        self.target = target
-        self.cost = cost
-        self.result = None
-        self.message = None
-
-    async def on_timeout(self):
-        if self.message:
-            for item in self.children:
-                item.disabled = True
-            try:
-                await self.message.edit(content=f"O pedido de casamento de {self.proposer.mention} para {self.target.mention} expirou por falta de resposta.", view=self)
-            except discord.NotFound:
-                pass
-
-    async def interaction_check(self, interaction: discord.Interaction) -> bool:
-        if interaction.user.id != self.target.id:
+# Pedidos de casamento pendentes ficam no armazenamento, não em objetos de View
+PROPOSAL_TTL = 300
+
+def proposal_view(proposer_id: str, target_id: str) -> discord.ui.View:
+    view = discord.ui.View(timeout=None)
+    view.add_item(ProposalButton("accept", proposer_id, target_id))
+    view.add_item(ProposalButton("decline", proposer_id, target_id))
+    return view
+
+async def expire_proposal(client: discord.Client, state: dict):
+    if not state.get("message_id"):
+        return
+    message = client.get_partial_messageable(state["channel_id"]).get_partial_message(state["message_id"])
+    try:
+        await message.edit(content=f"O pedido de casamento de <@{state['proposer_id']}> para <@{state['target_id']}> expirou por falta de resposta.", view=None)
+    except discord.NotFound:
+        pass
+
+view_states.on_expire("proposal", expire_proposal)
+
+class ProposalButton(discord.ui.DynamicItem[discord.ui.Button], template=r"lyrio:proposal:(?P<answer>accept|decline):(?P<proposer_id>\d+):(?P<target_id>\d+)"):
+    def __init__(self, answer: str, proposer_id: str, target_id: str):
+        if answer == "accept":
+            button = discord.ui.Button(label="Aceitar", style=discord.ButtonStyle.success, emoji="💍")
+        else:
+            button = discord.ui.Button(label="Recusar", style=discord.ButtonStyle.danger, emoji="💔")
+        button.custom_id = f"lyrio:proposal:{answer}:{proposer_id}:{target_id}"
+        super().__init__(button)
+        self.answer = answer
+        self.proposer_id = proposer_id
+        self.target_id = target_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: discord.Interaction, item: discord.ui.Button, match):
+        return cls(match["answer"], match["proposer_id"], match["target_id"])
+
+    async def callback(self, interaction: discord.Interaction):
+        if interaction.user.id != int(self.target_id):
             await interaction.response.send_message("Seu boboca, não se meta no casamento dos outros.", ephemeral=True)
-            return False
-        
-        if coin_system.get_coins(str(self.target.id)) < self.cost:
-            await interaction.response.send_message(f"Você não pode aceitar, pois não tem **{self.cost:,} Orbs** necessários!", ephemeral=True)
-            self.result = "no_coins"
-            self.stop()
-            return False
-        return True
+            return
+        state_id = f"{self.proposer_id}:{self.target_id}"
+        state = view_states.pop("proposal", state_id)
+        proposer_mention, target_mention = f"<@{self.proposer_id}>", f"<@{self.target_id}>"
+        if state is None or state["expires_at"] < time.time():
+            await interaction.response.edit_message(content=f"O pedido de casamento de {proposer_mention} para {target_mention} expirou por falta de resposta.", view=None)
+            return
 
-    @discord.ui.button(label="Aceitar", style=discord.ButtonStyle.success, emoji="💍")
-    async def accept_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.result = True
-        self.stop()
-        for item in self.children:
-            item.disabled = True
-        await interaction.response.edit_message(view=self)
+        guild_id, cost = state["guild_id"], state["cost"]
+        if self.answer == "decline":
+            await interaction.response.edit_message(content=f"💔 Que pena, {proposer_mention}...", view=None)
+            await interaction.followup.send(f"{target_mention} recusou o pedido de casamento de {proposer_mention}.")
+            return
 
-    @discord.ui.button(label="Recusar", style=discord.ButtonStyle.danger, emoji="💔")
-    async def decline_button(self, interaction: discord.Interaction, button: discord.ui.Button):
-        self.result = False
-        self.stop()
-        for item in self.children:
-            item.disabled = True
-        await interaction.response.edit_message(view=self)
+        if coin_system.get_coins(guild_id, self.target_id) < cost:
+            await interaction.response.send_message(f"Você não pode aceitar, pois não tem **{cost:,} Orbs** necessários!", ephemeral=True)
+            await interaction.message.edit(content=f"{proposer_mention}, seu pedido foi recusado pois {target_mention} não tinha os Orbs necessários no momento do aceite.", view=None)
+            return
+
+        coin_system.remove_coins(guild_id, self.proposer_id, cost)
+        coin_system.remove_coins(guild_id, self.target_id, cost)
+        marriage_system.marry(self.proposer_id, self.target_id)
+        await interaction.response.edit_message(content=f"🎉 Parabéns, {proposer_mention} e {target_mention}!", view=None)
+        await interaction.followup.send(f"Parabéns! {proposer_mention} e {target_mention} agora estão casados! ❤️")
 
 class DivorceConfirmationView(discord.ui.View):
     def __init__(self, interaction: discord.Interaction):
@@ -285,12 +410,12 @@ def setup_goodmorning_command(tree: app_commands.CommandTree):
     async def goodmorning_command(interaction: discord.Interaction):
         user_id = str(interaction.user.id)
         user_mention = interaction.user.mention
-        view = GoodMorningView(user_id, user_mention)
+        guild_id = str(interaction.guild_id) if interaction.guild_id else None
+        view = GoodMorningView(guild_id, user_id, user_mention)
         embed = view.create_embed()
         if interaction.client.user.avatar:
             embed.set_thumbnail(url=interaction.client.user.avatar.url)
         await interaction.response.send_message(embed=embed, view=view)
-        view.message = await interaction.original_response()
 
     @tree.command(name="perfil", description="Veja seu perfil, Orbs e status de casamento! 🤵👰")
     @app_commands.describe(user="Opcional: veja o perfil de outro usuário.")
@@ -303,27 +428,28 @@ def setup_goodmorning_command(tree: app_commands.CommandTree):
             embed.set_thumbnail(url=target_user.avatar.url)
 
         # Dados de Orbs
-        current_coins = coin_system.get_coins(user_id)
-        total_earned = coin_system.data.get(user_id, {}).get("total_earned", 0)
+        guild_id = str(interaction.guild_id) if interaction.guild_id else None
+        current_coins = coin_system.get_coins(guild_id, user_id)
+        total_earned = coin_system.get_total_earned(guild_id, user_id)
         embed.add_field(name="💰 Saldo Atual", value=f"**{current_coins:,}** Orbs", inline=True)
         embed.add_field(name="📈 Total Ganho", value=f"**{total_earned:,}** Orbs", inline=True)
         
         # Dados do Casamento
         marriage_data = marriage_system.get_marriage_data(user_id)
         if marriage_data:
-            partner_id = marriage_data["partner_id"]
+            partner_id = marriage_system.get_partner_id(user_id)
             affinity = marriage_data["affinity"]
-            try:
-                partner_member = await interaction.guild.fetch_member(int(partner_id))
+            partner_member = await member_resolver.resolve(interaction.guild, int(partner_id)) if interaction.guild else None
+            if partner_member:
                 embed.add_field(name="💍 Estado Civil", value=f"Casado(a) com {partner_member.mention}", inline=False)
                 embed.add_field(name="💕 Pontos de Afinidade", value=f"**{affinity}** / 20", inline=True)
-            except discord.NotFound:
+            else:
                  embed.add_field(name="💍 Estado Civil", value="Casado(a) com um mistério (usuário não encontrado)", inline=False)
         else:
             embed.add_field(name="💍 Estado Civil", value="Solteiro(a)", inline=False)
 
         # Dados de Interações Recebidas
-        counts = coin_system.get_roleplay_counts(user_id)
+        counts = coin_system.get_roleplay_counts(guild_id, user_id)
         kisses = counts.get('kiss', 0)
         hugs = counts.get('hug', 0)
         pats = counts.get('pat', 0)
@@ -333,7 +459,7 @@ def setup_goodmorning_command(tree: app_commands.CommandTree):
             embed.add_field(name="💖 Interações Recebidas", value=counts_text, inline=False)
 
         # Daily
-        can_claim = coin_system.can_claim_daily(user_id)
+        can_claim = coin_system.can_claim_daily(guild_id, user_id)
         embed.add_field(name="🎁 Recompensa Diária", value="✅ Disponível!" if can_claim else "⏰ Disponível amanhã!", inline=True)
         embed.set_footer(text=f"ID do Usuário: {user_id}")
         embed.timestamp = discord.utils.utcnow()
@@ -344,6 +470,7 @@ def setup_goodmorning_command(tree: app_commands.CommandTree):
     async def marry_command(interaction: discord.Interaction, alvo: discord.Member):
         proposer = interaction.user
         cost = 25000
+        guild_id = str(interaction.guild.id)
 
         if alvo.id == proposer.id:
             await interaction.response.send_message("Tá com muito amor próprio.", ephemeral=True)
@@ -357,15 +484,13 @@ def setup_goodmorning_command(tree: app_commands.CommandTree):
         if marriage_system.is_married(str(alvo.id)):
             await interaction.response.send_message(f"Querendo pegar ele(a)? {alvo.display_name}, ele(a) já é casado, tome cuidado.", ephemeral=True)
             return
-        if coin_system.get_coins(str(proposer.id)) < cost:
+        if coin_system.get_coins(guild_id, str(proposer.id)) < cost:
             await interaction.response.send_message(f"Você não tem Orbs o suficiente! O casamento custa **{cost:,} Orbs**.", ephemeral=True)
             return
-        if coin_system.get_coins(str(alvo.id)) < cost:
+        if coin_system.get_coins(guild_id, str(alvo.id)) < cost:
             await interaction.response.send_message(f"Infelizmente, {alvo.display_name}, não possui os **{cost:,} Orbs** necessários para casar.", ephemeral=True)
             return
 
-        view = ProposalView(proposer, alvo, cost)
-        
         proposal_text = (
             f"💍 | {alvo.mention} Você recebeu uma proposta de casamento de {proposer.mention}!\n\n"
             f"💵 | Para aceitar, clique no 💍! Mas lembrando, o custo de um casamento é **50.000 Orbs** ({cost:,} para cada usuário) "
@@ -374,26 +499,17 @@ def setup_goodmorning_command(tree: app_commands.CommandTree):
             f"<:pepeanalise:1387206432553959596> | O sistema de casamento pode mudar ao longo do tempo, então os valores podem ser alterados no futuro, fique de olho nas novidades!"
         )
 
-        await interaction.response.send_message(content=proposal_text, view=view)
-        view.message = await interaction.original_response()
-        
-        await view.wait()
-
-        if view.result == "no_coins":
-            await view.message.edit(content=f"{proposer.mention}, seu pedido foi recusado pois {alvo.mention} não tinha os Orbs necessários no momento do aceite.", view=None)
-            return
-
-        if view.result is True:
-            coin_system.remove_coins(str(proposer.id), cost)
-            coin_system.remove_coins(str(alvo.id), cost)
-            marriage_system.marry(str(proposer.id), str(alvo.id))
-            await view.message.edit(content=f"🎉 Parabéns, {proposer.mention} e {alvo.mention}!", view=None)
-            await interaction.followup.send(f"Parabéns! {proposer.mention} e {alvo.mention} agora estão casados! ❤️")
+        # O estado é salvo antes do envio para um clique imediato já encontrar o pedido
+        state_id = f"{proposer.id}:{alvo.id}"
+        state = view_states.put("proposal", state_id, {
+            "guild_id": guild_id, "channel_id": interaction.channel_id, "message_id": None,
+            "proposer_id": str(proposer.id), "target_id": str(alvo.id), "cost": cost
+        }, ttl=PROPOSAL_TTL)
+        await interaction.response.send_message(content=proposal_text, view=proposal_view(str(proposer.id), str(alvo.id)))
+        message = await interaction.original_response()
+        state["message_id"] = message.id
+        view_states.touch("proposal", state_id)
 
-        elif view.result is False:
-            await view.message.edit(content=f"💔 Que pena, {proposer.mention}...", view=None)
-            await interaction.followup.send(f"{alvo.mention} recusou o pedido de casamento de {proposer.mention}.")
-        
     @tree.command(name="divorciar", description="💔 Termine seu casamento atual.")
     async def divorce_command(interaction: discord.Interaction):
         user_id = str(interaction.user.id)
@@ -401,11 +517,8 @@ def setup_goodmorning_command(tree: app_commands.CommandTree):
             await interaction.response.send_message("Você não está casado!", ephemeral=True)
             return
         partner_id = marriage_system.get_partner_id(user_id)
-        try:
-            partner = await interaction.guild.fetch_member(int(partner_id))
-            partner_mention = partner.mention
-        except (discord.NotFound, TypeError):
-            partner_mention = "alguém que já não está mais por aqui"
+        partner = await member_resolver.resolve(interaction.guild, int(partner_id)) if partner_id and interaction.guild else None
+        partner_mention = partner.mention if partner else "alguém que já não está mais por aqui"
         view = DivorceConfirmationView(interaction)
         await interaction.response.send_message(f"Vish, eu entendo que o amor não foi tão forte, mas, se decidir clicar no botão abaixo, vão se divorciar totalmente. Tem certeza que quer se divorciar dele(a) {partner_mention}?", view=view, ephemeral=True)
         await view.wait()
@@ -414,47 +527,59 @@ def setup_goodmorning_command(tree: app_commands.CommandTree):
             await interaction.followup.send(f"{interaction.user.mention} se divorciou de {partner_mention}. A vida continua...")
 
     @tree.command(name="ranking", description="🏆 Veja os rankings de Orbs e de casais do servidor!")
-    async def ranking(interaction: discord.Interaction):
+    @app_commands.describe(pagina="Opcional: página do ranking completo (10 por página, até o top 100).")
+    async def ranking(interaction: discord.Interaction, pagina: Optional[app_commands.Range[int, 1, 10]] = None):
         await interaction.response.defer(ephemeral=True)
 
+        # Sem página: pódio com os 3 primeiros. Com página: posições 10*(p-1)+1 até 10*p
+        per_page = 10 if pagina else 3
+        offset = (pagina - 1) * per_page if pagina else 0
+        medals = ["🥇", "🥈", "🥉"]
+
+        def position_label(index: int) -> str:
+            position = offset + index
+            return medals[position] if position < len(medals) else f"**#{position + 1}**"
+
+        async def pick_present(leaderboard, ids_of):
+            """Anda pelo índice em lotes, resolvendo os membros de cada lote de uma vez só."""
+            picked = []
+            skipped = 0
+            position = 0
+            while len(picked) < per_page:
+                batch = leaderboard.top(25, offset=position)
+                if not batch:
+                    break
+                position += len(batch)
+                members = await member_resolver.resolve_many(interaction.guild, [uid for key, _ in batch for uid in ids_of(key)])
+                for key, score in batch:
+                    entry_members = [members.get(int(uid)) for uid in ids_of(key)]
+                    if not all(entry_members):
+                        continue
+                    if skipped < offset:
+                        skipped += 1
+                        continue
+                    picked.append((*entry_members, score))
+                    if len(picked) >= per_page:
+                        break
+            return picked
+
         # --- RANKING DE RIQUEZA ---
-        all_users_data = coin_system.data
-        richest_users = sorted(all_users_data.items(), key=lambda item: item[1].get('coins', 0), reverse=True)
-        
+        # O índice do servidor já está ordenado: só andamos até achar membros presentes suficientes
+        richest = await pick_present(coin_system.get_ranking(str(interaction.guild.id)), lambda user_id: [user_id])
+
         richest_desc = ""
-        for i, (user_id, data) in enumerate(richest_users[:3]):
-            user = interaction.guild.get_member(int(user_id))
-            if user:
-                medals = ["🥇", "🥈", "🥉"]
-                richest_desc += f"{medals[i]} {user.mention} - **{data.get('coins', 0):,}** Orbs\n"
+        for i, (user, coins) in enumerate(richest):
+            richest_desc += f"{position_label(i)} {user.mention} - **{coins:,}** Orbs\n"
         
         if not richest_desc:
             richest_desc = "Ninguém tem Orbs ainda."
 
         # --- RANKING DE CASAIS ---
-        all_marriages_data = marriage_system.data
-        processed_couples = set()
-        couples_list = []
-        for user_id, data in all_marriages_data.items():
-            partner_id = data.get("partner_id")
-            if user_id not in processed_couples and partner_id not in processed_couples:
-                couples_list.append({
-                    "user1_id": user_id,
-                    "user2_id": partner_id,
-                    "affinity": data.get("affinity", 0)
-                })
-                processed_couples.add(user_id)
-                processed_couples.add(partner_id)
-        
-        top_couples = sorted(couples_list, key=lambda item: item['affinity'], reverse=True)
+        top_couples = await pick_present(marriage_system.leaderboard, lambda couple_key: couple_key.split(":"))
         
         couples_desc = ""
-        for i, couple_data in enumerate(top_couples[:3]):
-            user1 = interaction.guild.get_member(int(couple_data["user1_id"]))
-            user2 = interaction.guild.get_member(int(couple_data["user2_id"]))
-            if user1 and user2:
-                medals = ["🥇", "🥈", "🥉"]
-                couples_desc += f"{medals[i]} {user1.mention} & {user2.mention} - **{couple_data['affinity']}** de Afinidade ❤️\n"
+        for i, (user1, user2, affinity) in enumerate(top_couples):
+            couples_desc += f"{position_label(i)} {user1.mention} & {user2.mention} - **{affinity}** de Afinidade ❤️\n"
         
         if not couples_desc:
             couples_desc = "Nenhum casal no servidor ainda."
@@ -462,7 +587,7 @@ def setup_goodmorning_command(tree: app_commands.CommandTree):
         embed = discord.Embed(title=f"🏆 Rankings do Servidor {interaction.guild.name}", color=0xFFD700)
         embed.add_field(name="💰 Mais Ricos", value=richest_desc, inline=False)
         embed.add_field(name="💞 Casais do Ano", value=couples_desc, inline=False)
-        embed.set_footer(text=f"Ranking gerado em: {datetime.now().strftime('%d/%m/%Y às %H:%M')}")
+        embed.set_footer(text=f"{f'Página {pagina} • ' if pagina else ''}Ranking gerado em: {datetime.now().strftime('%d/%m/%Y às %H:%M')}")
         
         await interaction.followup.send(embed=embed)
 
@@ -513,7 +638,7 @@ def setup_goodmorning_command(tree: app_commands.CommandTree):
         
         await interaction.response.send_message(embed=embed)
         
-        coin_system.increment_roleplay_count(str(alvo.id), action_type)
+        coin_system.increment_roleplay_count(str(interaction.guild_id) if interaction.guild_id else None, str(alvo.id), action_type)
         
         user_id = str(interaction.user.id)
         partner_id = marriage_system.get_partner_id(user_id)
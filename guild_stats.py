@@ -0,0 +1,159 @@
+# guild_stats.py
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+import discord
+from member_cache import member_cache
+
+# Amostra: (timestamp, humanos, bots)
+Sample = Tuple[float, int, int]
+
+class GuildCounters:
+    __slots__ = ("humans", "bots", "online", "text_channels", "voice_channels", "categories",
+                 "history", "last_sample_at", "approx_online", "approx_online_at")
+
+    def __init__(self, history_size: int):
+        self.humans = 0
+        self.bots = 0
+        self.online = 0
+        self.text_channels = 0
+        self.voice_channels = 0
+        self.categories = 0
+        self.history: Deque[Sample] = deque(maxlen=history_size)
+        self.last_sample_at = 0.0
+        self.approx_online: Optional[int] = None
+        self.approx_online_at = 0.0
+
+class GuildStatsAggregator:
+    """Contadores por servidor mantidos pelos eventos do gateway.
+
+    A lista de membros é percorrida uma única vez por servidor (na primeira
+    leitura); depois entradas, saídas, presenças e canais só somam ou subtraem.
+    As saídas chegam pelo evento raw, que o gateway entrega mesmo para membros
+    fora do cache (modo "lean"); se ainda assim a soma divergir do
+    `member_count` do servidor, os contadores são refeitos na próxima leitura.
+    Sem o intent de presenças, o número de online vem da contagem aproximada
+    da API, consultada no máximo uma vez a cada `approx_ttl` segundos.
+    """
+    def __init__(self, sample_interval: float = 3600, history_size: int = 168, approx_ttl: float = 300):
+        self.sample_interval = sample_interval
+        self.history_size = history_size
+        self.approx_ttl = approx_ttl
+        self.guilds: Dict[int, GuildCounters] = {}
+
+    def rebuild(self, guild: discord.Guild) -> GuildCounters:
+        previous = self.guilds.get(guild.id)
+        counters = GuildCounters(self.history_size)
+        if previous is not None:
+            counters.history = previous.history
+            counters.last_sample_at = previous.last_sample_at
+        for member in guild.members:
+            if member.bot:
+                counters.bots += 1
+            else:
+                counters.humans += 1
+                if member.status != discord.Status.offline:
+                    counters.online += 1
+        counters.text_channels = len(guild.text_channels)
+        counters.voice_channels = len(guild.voice_channels)
+        counters.categories = len(guild.categories)
+        self.guilds[guild.id] = counters
+        self._maybe_sample(counters)
+        return counters
+
+    async def get(self, guild: discord.Guild) -> GuildCounters:
+        """Contadores do servidor; na primeira vez (ou se divergirem do servidor), refaz com a lista completa."""
+        counters = self.guilds.get(guild.id)
+        if counters is None or self.is_stale(guild, counters):
+            await member_cache.ensure_roster(guild)
+            counters = self.rebuild(guild)
+        self._maybe_sample(counters)
+        return counters
+
+    def is_stale(self, guild: discord.Guild, counters: GuildCounters) -> bool:
+        """Algum evento de entrada/saída se perdeu (ex: reconexão sem resume)."""
+        return guild.member_count is not None and counters.humans + counters.bots != guild.member_count
+
+    def forget(self, guild_id: int):
+        self.guilds.pop(guild_id, None)
+
+    def _maybe_sample(self, counters: GuildCounters):
+        now = time.time()
+        if now - counters.last_sample_at >= self.sample_interval:
+            counters.history.append((now, counters.humans, counters.bots))
+            counters.last_sample_at = now
+
+    # --- Eventos (ignorados enquanto o servidor ainda não foi contado) ---
+    def on_member_join(self, member: discord.Member):
+        counters = self.guilds.get(member.guild.id)
+        if counters is None:
+            return
+        if member.bot:
+            counters.bots += 1
+        else:
+            counters.humans += 1
+        self._maybe_sample(counters)
+
+    def on_member_remove(self, payload: discord.RawMemberRemoveEvent):
+        """Saída pelo evento raw: `payload.user` é Member se estava em cache, senão User (sem status)."""
+        counters = self.guilds.get(payload.guild_id)
+        if counters is None:
+            return
+        user = payload.user
+        if user.bot:
+            counters.bots = max(0, counters.bots - 1)
+        else:
+            counters.humans = max(0, counters.humans - 1)
+            if getattr(user, "status", discord.Status.offline) != discord.Status.offline:
+                counters.online = max(0, counters.online - 1)
+        self._maybe_sample(counters)
+
+    def on_presence_update(self, before: discord.Member, after: discord.Member):
+        counters = self.guilds.get(after.guild.id)
+        if counters is None or after.bot:
+            return
+        was_online = before.status != discord.Status.offline
+        is_online = after.status != discord.Status.offline
+        if was_online != is_online:
+            counters.online += 1 if is_online else -1
+
+    def on_channel_change(self, channel: discord.abc.GuildChannel, delta: int):
+        counters = self.guilds.get(channel.guild.id)
+        if counters is None:
+            return
+        if isinstance(channel, discord.CategoryChannel):
+            counters.categories += delta
+        elif isinstance(channel, (discord.VoiceChannel, discord.StageChannel)):
+            counters.voice_channels += delta
+        elif isinstance(channel, discord.TextChannel):
+            counters.text_channels += delta
+
+    async def online_count(self, client: discord.Client, guild: discord.Guild) -> Optional[int]:
+        """Online pelos eventos de presença, ou a contagem aproximada da API sem esse intent."""
+        counters = await self.get(guild)
+        if client.intents.presences:
+            return counters.online
+        if counters.approx_online is None or time.monotonic() - counters.approx_online_at > self.approx_ttl:
+            try:
+                fetched = await client.fetch_guild(guild.id, with_counts=True)
+                counters.approx_online = fetched.approximate_presence_count
+                counters.approx_online_at = time.monotonic()
+            except discord.HTTPException as e:
+                print(f"Não foi possível obter a contagem de online de {guild.id}: {e}")
+        return counters.approx_online
+
+    def trend(self, counters: GuildCounters, hours: float = 24) -> Optional[int]:
+        """Variação de membros humanos em relação à amostra mais próxima de `hours` atrás."""
+        if not counters.history:
+            return None
+        target = time.time() - hours * 3600
+        # Última amostra até o instante alvo; se o histórico for mais curto, a mais antiga
+        baseline = counters.history[0][1]
+        for timestamp, humans, _ in counters.history:
+            if timestamp > target:
+                break
+            baseline = humans
+        return counters.humans - baseline
+
+# Instância global
+guild_stats = GuildStatsAggregator()
@@ -0,0 +1,40 @@
+# lazy.py
+import time
+from typing import Callable, Generic, TypeVar
+from startup_profile import startup_profile
+
+T = TypeVar("T")
+
+class LazyProxy(Generic[T]):
+    """Instância global criada só no primeiro acesso a um atributo.
+
+    Permite manter o `from modulo import instancia` de sempre sem ler arquivos
+    nem alocar estruturas no import de subsistemas que podem nem ser usados.
+    """
+    def __init__(self, factory: Callable[[], T], name: str):
+        object.__setattr__(self, "_factory", factory)
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_instance", None)
+
+    def _get(self) -> T:
+        instance = object.__getattribute__(self, "_instance")
+        if instance is None:
+            start = time.perf_counter()
+            instance = object.__getattribute__(self, "_factory")()
+            object.__setattr__(self, "_instance", instance)
+            startup_profile.add(f"criar {object.__getattribute__(self, '_name')}", time.perf_counter() - start)
+        return instance
+
+    @property
+    def is_loaded(self) -> bool:
+        return object.__getattribute__(self, "_instance") is not None
+
+    def __getattr__(self, name: str):
+        return getattr(self._get(), name)
+
+    def __setattr__(self, name: str, value):
+        setattr(self._get(), name, value)
+
+    def __repr__(self) -> str:
+        name = object.__getattribute__(self, "_name")
+        return repr(self._get()) if self.is_loaded else f"<LazyProxy {name} (não carregado)>"
@@ -0,0 +1,62 @@
+# leaderboard.py
+import heapq
+from bisect import bisect_left, insort
+from itertools import islice
+from typing import Dict, Iterator, List, Tuple
+
+class Leaderboard:
+    """Índice ordenado por pontuação (maior primeiro), atualizado a cada mudança.
+
+    Guarda uma lista ordenada de (-pontuação, chave) e um dicionário chave -> pontuação.
+    Atualizar custa uma busca binária + um insert; ler o top-K custa O(K).
+    """
+    def __init__(self):
+        self._entries: List[Tuple[int, str]] = []
+        self._scores: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def update(self, key: str, score: int):
+        """Insere ou move a chave para a nova pontuação."""
+        old = self._scores.get(key)
+        if old == score:
+            return
+        if old is not None:
+            self._remove_entry(key, old)
+        self._scores[key] = score
+        insort(self._entries, (-score, key))
+
+    def remove(self, key: str):
+        old = self._scores.pop(key, None)
+        if old is not None:
+            self._remove_entry(key, old)
+
+    def _remove_entry(self, key: str, score: int):
+        index = bisect_left(self._entries, (-score, key))
+        if index < len(self._entries) and self._entries[index] == (-score, key):
+            del self._entries[index]
+
+    def iter(self) -> Iterator[Tuple[str, int]]:
+        """Percorre (chave, pontuação) do maior para o menor."""
+        for neg_score, key in self._entries:
+            yield key, -neg_score
+
+    def top(self, k: int, offset: int = 0) -> List[Tuple[str, int]]:
+        return [(key, -neg_score) for neg_score, key in self._entries[offset:offset + k]]
+
+class MergedLeaderboard:
+    """Visão somente leitura de vários índices como se fossem um só (mesma ordem, sem duplicatas)."""
+    def __init__(self, *boards: Leaderboard):
+        self.boards = boards
+
+    def iter(self) -> Iterator[Tuple[str, int]]:
+        seen = set()
+        merged = heapq.merge(*(board._entries for board in self.boards))
+        for neg_score, key in merged:
+            if key not in seen:
+                seen.add(key)
+                yield key, -neg_score
+
+    def top(self, k: int, offset: int = 0) -> List[Tuple[str, int]]:
+        return list(islice(self.iter(), offset, offset + k))
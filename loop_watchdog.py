@@ -0,0 +1,88 @@
+# loop_watchdog.py
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Optional, Tuple
+from metrics import metrics
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+class LoopWatchdog:
+    """Mede o atraso do event loop e mostra onde ele travou.
+
+    Uma tarefa acorda a cada `interval` e registra quanto atrasou. Uma thread
+    separada confere se essas batidas continuam chegando: se o loop ficar mais
+    de `threshold` sem bater, ela copia a pilha da thread do loop naquele
+    instante (via `sys._current_frames`), ou seja, a chamada síncrona que está
+    segurando o gateway. Quando o loop volta, o travamento é impresso com a
+    pilha e contado nas métricas.
+    """
+    def __init__(self, interval: float = 0.25, threshold: Optional[float] = None, max_frames: int = 12):
+        self.interval = interval
+        self.threshold = threshold if threshold is not None else float(os.getenv("LOOP_LAG_THRESHOLD_MS", "250")) / 1000
+        self.max_frames = max_frames
+        self.last_beat = time.monotonic()
+        self.loop_thread_id: Optional[int] = None
+        self.captured: Optional[Tuple[str, str]] = None  # (local, pilha) do travamento em andamento
+        self.recent: Deque[Tuple[float, float, str]] = deque(maxlen=10)  # (quando, segundos, local)
+        self.stalls = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    async def run(self):
+        """Batida do loop; roda como tarefa de fundo enquanto o bot estiver ligado."""
+        self.loop_thread_id = threading.get_ident()
+        self.last_beat = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+                now = time.monotonic()
+                lag = max(0.0, now - self.last_beat - self.interval)
+                self.last_beat = now
+                metrics.observe("loop_lag_seconds", lag)
+                if lag >= self.threshold:
+                    self._report(lag)
+        finally:
+            self._stop.set()
+
+    def _watch(self):
+        # Confere com mais frequência que a batida, para pegar a pilha enquanto o loop ainda está preso
+        while not self._stop.wait(self.interval / 2):
+            if self.captured is None and time.monotonic() - self.last_beat > self.interval + self.threshold:
+                self.captured = self._capture()
+
+    def _capture(self) -> Optional[Tuple[str, str]]:
+        frame = sys._current_frames().get(self.loop_thread_id)
+        if frame is None:
+            return None
+        stack = traceback.extract_stack(frame)[-self.max_frames:]
+        # O culpado é o frame mais interno que pertence ao bot (não ao discord.py ou à stdlib)
+        own = [entry for entry in stack if entry.filename.startswith(PROJECT_DIR)]
+        culprit = own[-1] if own else stack[-1]
+        location = f"{os.path.basename(culprit.filename)}:{culprit.lineno} em {culprit.name}"
+        return location, "".join(traceback.format_list(stack))
+
+    def _report(self, lag: float):
+        captured, self.captured = self.captured, None
+        location, stack = captured if captured else ("desconhecido", "")
+        self.stalls += 1
+        self.recent.append((time.time(), lag, location))
+        metrics.inc("loop_stalls_total")
+        print(f"Event loop travado por {lag * 1000:.0f} ms ({location})")
+        if stack:
+            print(stack, end="")
+
+    def stop(self):
+        self._stop.set()
+
+# Instância global
+loop_watchdog = LoopWatchdog()
+metrics.describe("loop_lag_seconds", "histogram", "Atraso do event loop medido a cada batida do watchdog.")
+metrics.describe("loop_stalls_total", "counter", "Vezes em que o event loop ficou travado acima do limite.")
@@ -1,22 +1,43 @@
 # main.py
-import discord
-from discord import app_commands
-from typing import Optional
+from startup_profile import startup_profile, current_rss_mb # Primeiro import: marca o início do cronômetro
+import asyncio
 import os
-from dotenv import load_dotenv # É bom manter, pois funciona em outros ambientes
+import signal
+import sys
+import time
+from typing import Optional
+with startup_profile.phase("bibliotecas"):
+    import discord
+    from discord import app_commands
+    from dotenv import load_dotenv # É bom manter, pois funciona em outros ambientes
 
 # Carrega as variáveis do arquivo .env (se existir)
 load_dotenv()
 
-# Importa as funções de setup
-from goodmorning import setup_goodmorning_command
-from staff_commands import setup_staff_commands
-from bot_commands import setup_bot_commands
-from help_command import setup_help_command
-from embed_builder_command import setup_embed_builder_command
-from utility_commands import setup_utility_commands
-from bot_config import bot_config
-from automod_system import automod
+# Importa as funções de setup. Só a IA e as Orbs carregam no primeiro uso; os demais
+# singletons (automod, casamentos, views, configs) já são usados no login e carregam aqui.
+# O relatório de inicialização mostra quanto cada grupo custa.
+with startup_profile.phase("import: base e armazenamento"):
+    from persistence import flush_all, executor
+    from metrics import metrics, InstrumentedCommandTree
+    from loop_watchdog import loop_watchdog
+    from bot_config import bot_config
+    from command_sync import sync_if_changed
+with startup_profile.phase("import: economia e casamento"):
+    from goodmorning import setup_goodmorning_command, DailyButton, ProposalButton
+    from marriage_system import marriage_system
+    from member_resolver import member_resolver
+    from member_cache import member_cache
+    from guild_stats import guild_stats
+    from view_state import view_states
+with startup_profile.phase("import: staff e automod"):
+    from staff_commands import setup_staff_commands
+    from automod_system import automod
+with startup_profile.phase("import: demais comandos"):
+    from bot_commands import setup_bot_commands
+    from help_command import setup_help_command
+    from embed_builder_command import setup_embed_builder_command, EmbedBuilderButton, EmbedBuilderSelect
+    from utility_commands import setup_utility_commands
 
 # Carrega o token de forma segura do ambiente (Discloud ou .env)
 TOKEN = os.getenv("DISCORD_TOKEN")
@@ -26,50 +47,136 @@ intents.message_content = True
 intents.guilds = True 
 intents.members = True
 
-client = discord.Client(intents=intents)
-tree = app_commands.CommandTree(client)
-
-@client.event
-async def on_ready():
-    print(f'Bot logado como {client.user}')
-
-    automod.client = client
-    
+def load_saved_presence():
+    """Monta (status, atividade) salvos no bot_config, enviados já no IDENTIFY do gateway."""
     try:
         presence_data = bot_config.get_presence()
-        if presence_data:
-            status_map = {"online": discord.Status.online, "idle": discord.Status.idle, "dnd": discord.Status.dnd, "invisible": discord.Status.invisible}
-            activity = None
-            act_type = presence_data.get("activity_type")
-            act_name = presence_data.get("name")
-            act_url = presence_data.get("url")
-            act_emoji = presence_data.get("emoji")
-            if act_type and act_name:
-                if act_type == "playing": activity = discord.Game(name=act_name)
-                elif act_type == "listening": activity = discord.Activity(type=discord.ActivityType.listening, name=act_name)
-                elif act_type == "watching": activity = discord.Activity(type=discord.ActivityType.watching, name=act_name)
-                elif act_type == "streaming" and act_url: activity = discord.Streaming(name=act_name, url=act_url)
-                elif act_type == "custom": activity = discord.CustomActivity(name=act_name, emoji=act_emoji)
-            saved_status = presence_data.get("status")
-            if saved_status and saved_status in status_map:
-                await client.change_presence(status=status_map[saved_status], activity=activity)
-                print("Status e atividade anteriores carregados.")
+        if not presence_data:
+            return None, None
+        status_map = {"online": discord.Status.online, "idle": discord.Status.idle, "dnd": discord.Status.dnd, "invisible": discord.Status.invisible}
+        activity = None
+        act_type = presence_data.get("activity_type")
+        act_name = presence_data.get("name")
+        act_url = presence_data.get("url")
+        act_emoji = presence_data.get("emoji")
+        if act_type and act_name:
+            if act_type == "playing": activity = discord.Game(name=act_name)
+            elif act_type == "listening": activity = discord.Activity(type=discord.ActivityType.listening, name=act_name)
+            elif act_type == "watching": activity = discord.Activity(type=discord.ActivityType.watching, name=act_name)
+            elif act_type == "streaming" and act_url: activity = discord.Streaming(name=act_name, url=act_url)
+            elif act_type == "custom": activity = discord.CustomActivity(name=act_name, emoji=act_emoji)
+        saved_status = presence_data.get("status")
+        if saved_status and saved_status in status_map:
+            return status_map[saved_status], activity
     except Exception as e:
         print(f"Não foi possível carregar o status salvo: {e}")
-    
-    # Configura todos os grupos de comandos
-    setup_goodmorning_command(tree)
-    setup_staff_commands(tree)
-    setup_bot_commands(tree, client)
-    setup_help_command(tree)
-    setup_embed_builder_command(tree)
-    setup_utility_commands(tree)
-    
+    return None, None
+
+class LyrioClient(discord.Client):
+    async def setup_hook(self):
+        """Sequência de inicialização: roda uma única vez, antes de conectar ao gateway.
+
+        O `on_ready` dispara de novo a cada reconexão, então nada de registro de
+        comandos ou tarefas de fundo fica lá.
+        """
+        automod.client = self
+        with startup_profile.phase("árvore de comandos"):
+            setup_goodmorning_command(tree)
+            setup_staff_commands(tree)
+            setup_bot_commands(tree, self)
+            setup_help_command(tree)
+            setup_embed_builder_command(tree)
+            setup_utility_commands(tree)
+        with startup_profile.phase("sincronização de comandos"):
+            # Só envia a árvore ao Discord quando o hash dela mudou desde o último boot
+            try:
+                changed, count = await sync_if_changed(tree)
+                print(f"Comandos sincronizados: {count}." if changed else "Comandos sem mudanças, sincronização pulada.")
+            except discord.HTTPException as e:
+                print(f"Falha ao sincronizar comandos na inicialização: {e}")
+        with startup_profile.phase("views e tarefas"):
+            # Botões persistentes: o custom_id identifica o painel, o estado vem do armazenamento
+            self.add_dynamic_items(DailyButton, ProposalButton, EmbedBuilderButton, EmbedBuilderSelect)
+            self.view_state_task = asyncio.create_task(view_states.run_expiry_sweeper(self))
+            # Perda diária de afinidade dos casais, calculada pelas datas salvas
+            self.decay_task = asyncio.create_task(marriage_system.run_decay_scheduler())
+            executor.listeners.append(metrics.on_storage_write)
+            # Aponta chamadas síncronas que seguram o event loop (e com ele o heartbeat do gateway)
+            self.watchdog_task = asyncio.create_task(loop_watchdog.run())
+            await metrics.start_http_server()
+        self.connect_started_at = time.perf_counter()
+
+    async def close(self):
+        for task in (getattr(self, "decay_task", None), getattr(self, "view_state_task", None),
+                     getattr(self, "watchdog_task", None)):
+            if task:
+                task.cancel()
+        # A IA é importada só quando usada; se nunca foi, não há sessão HTTP para fechar
+        ai_service = sys.modules.get("ai_service")
+        if ai_service:
+            await ai_service.close_session()
+        await metrics.stop_http_server()
+        await super().close()
+
+with startup_profile.phase("presença salva"):
+    saved_status, saved_activity = load_saved_presence()
+# MEMBER_CACHE_MODE=lean troca o cache completo de membros por chunk sob demanda (ver member_cache.py)
+client = LyrioClient(intents=intents, status=saved_status, activity=saved_activity,
+                     **member_cache.client_options(intents))
+tree = InstrumentedCommandTree(client)
+
+metrics.gauge("gateway_latency_seconds", "Latência do heartbeat do gateway.", lambda: client.latency if client.is_ready() else None)
+metrics.gauge("guilds", "Servidores em que o bot está.", lambda: len(client.guilds))
+metrics.gauge("cached_members", "Membros no cache (ver MEMBER_CACHE_MODE).", lambda: sum(len(g.members) for g in client.guilds))
+metrics.gauge("storage_queue_depth", "Jobs esperando na fila de gravação.", lambda: executor.queue.qsize())
+metrics.gauge("resident_memory_bytes", "Memória residente do processo.",
+              lambda: int(rss * 1024 * 1024) if (rss := current_rss_mb()) is not None else None)
+
+@client.event
+async def on_ready():
+    print(f'Bot logado como {client.user}')
+    if not startup_profile.reported:
+        startup_profile.record("gateway até o ready", time.perf_counter() - client.connect_started_at)
+        startup_profile.print_once()
+    print(member_cache.format_report(member_cache.memory_report(client)))
     print("Bot pronto para receber comandos.")
 
 @client.event
 async def on_message(message: discord.Message):
-    await automod.check_message(message)
+    with metrics.track("automod_check"):
+        await automod.check_message(message)
+
+@client.event
+async def on_app_command_completion(interaction: discord.Interaction, command: app_commands.Command):
+    metrics.command_finished(interaction)
+
+@client.event
+async def on_member_join(member: discord.Member):
+    # Quem acabou de entrar não pode continuar marcado como ausente no cache negativo
+    member_resolver.forget(member.guild.id, member.id)
+    guild_stats.on_member_join(member)
+
+@client.event
+async def on_raw_member_remove(payload: discord.RawMemberRemoveEvent):
+    # on_member_remove só dispara para membros em cache; no modo lean quase nenhum está
+    guild_stats.on_member_remove(payload)
+
+@client.event
+async def on_presence_update(before: discord.Member, after: discord.Member):
+    guild_stats.on_presence_update(before, after)
+
+@client.event
+async def on_guild_channel_create(channel: discord.abc.GuildChannel):
+    guild_stats.on_channel_change(channel, 1)
+
+@client.event
+async def on_guild_channel_delete(channel: discord.abc.GuildChannel):
+    guild_stats.on_channel_change(channel, -1)
+
+@client.event
+async def on_guild_remove(guild: discord.Guild):
+    guild_stats.forget(guild.id)
+    member_cache.forget(guild.id)
 
 class HelloView(discord.ui.View):
     def __init__(self, user_mention: str):
@@ -108,7 +215,13 @@ async def hello_command(interaction: discord.Interaction):
 
 # --- VERIFICAÇÃO DE SEGURANÇA ANTES DE INICIAR ---
 if TOKEN:
-    client.run(TOKEN)
+    # O SIGTERM da hospedagem vira KeyboardInterrupt para o discord.py encerrar limpo
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        client.run(TOKEN)
+    finally:
+        # Grava tudo que ainda estava pendente no write-behind antes de sair
+        flush_all()
 else:
     print("ERRO CRÍTICO: O token do Discord não foi encontrado.")
     print("Verifique se você criou o arquivo 'discloud.config' e adicionou a linha 'BOT_TOKEN=SEU_TOKEN'.")
\ No newline at end of file
@@ -1,68 +1,151 @@
 # marriage_system.py
-import json
-import os
-from datetime import datetime
+import asyncio
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+from storage import get_repository
+from leaderboard import Leaderboard
+
+INITIAL_AFFINITY = 20
+# Pontos perdidos por dia de casamento (prometido no texto do pedido em /casar)
+DAILY_AFFINITY_DECAY = 2
 
 class MarriageSystem:
     def __init__(self, filename="marriages.json"):
         """Inicializa o sistema de casamento."""
         self.filename = filename
-        self.data = self.load_data()
+        self.repo = get_repository("marriages", filename)
+        # Um registro por casal, chaveado por "id1:id2" (ids em ordem)
+        self.data: Dict[str, dict] = self.load_data()
+        # Índice compacto usuário -> chave do casal
+        self.couple_of: Dict[str, str] = {}
+        # Índice de casais por afinidade, com as mesmas chaves de `data`
+        self.leaderboard = Leaderboard()
+        for key, couple in self.data.items():
+            self._index_couple(key, couple)
+
+    @staticmethod
+    def couple_key(user1_id: str, user2_id: str) -> str:
+        """Chave única de um casal, independente da ordem dos parceiros."""
+        return ":".join(sorted((user1_id, user2_id)))
 
     def load_data(self):
-        """Carrega os dados de casamento do arquivo JSON."""
-        if os.path.exists(self.filename):
-            try:
-                with open(self.filename, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return {}
-        return {}
+        """Carrega os casais do backend de armazenamento, migrando o formato antigo se preciso."""
+        data = self.repo.load_all()
+        legacy_keys = [key for key, value in data.items() if ":" not in key and "partner_id" in value]
+        if not legacy_keys:
+            return data
+        # Formato antigo: o mesmo registro duplicado sob o ID de cada parceiro
+        for user_id in legacy_keys:
+            record = data.pop(user_id)
+            key = self.couple_key(user_id, record.pop("partner_id"))
+            if key not in data:
+                data[key] = {"partners": key.split(":"), **record}
+        # Grava já na carga (antes do event loop): o bot não sobe com a migração só em memória
+        future = self.repo.save_keys(data, legacy_keys + [key for key in data if ":" in key])
+        if future is not None:
+            future.result()
+        print(f"Casamentos migrados: {len(legacy_keys)} registros por usuário viraram {len(data)} casal(is).")
+        return data
 
-    def save_data(self):
-        """Salva os dados de casamento no arquivo JSON."""
-        with open(self.filename, 'w', encoding='utf-8') as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+    def save_data(self, *couple_keys: str):
+        """Salva os casais informados (ou todos, se nenhum for passado)."""
+        self.repo.save_keys(self.data, couple_keys or list(self.data.keys()))
+
+    def _index_couple(self, key: str, couple: dict):
+        for user_id in couple["partners"]:
+            self.couple_of[user_id] = key
+        self.leaderboard.update(key, couple.get("affinity", 0))
 
     def is_married(self, user_id: str):
         """Verifica se um usuário está casado."""
-        return user_id in self.data
+        return user_id in self.couple_of
 
     def get_partner_id(self, user_id: str):
         """Obtém o ID do parceiro de um usuário."""
-        if self.is_married(user_id):
-            return self.data[user_id].get("partner_id")
-        return None
-        
+        key = self.couple_of.get(user_id)
+        if key is None:
+            return None
+        user1_id, user2_id = self.data[key]["partners"]
+        return user2_id if user1_id == user_id else user1_id
+
     def get_marriage_data(self, user_id: str):
-        """Obtém todos os dados do casamento de um usuário."""
-        return self.data.get(user_id)
+        """Obtém o registro do casal de um usuário."""
+        key = self.couple_of.get(user_id)
+        return self.data.get(key) if key else None
 
     def marry(self, user1_id: str, user2_id: str):
         """Casa dois usuários, definindo a afinidade e os cooldowns iniciais."""
-        initial_affinity = 20
-        # Cooldowns para as ações de afinidade
-        cooldowns = {
-            "last_kiss": None,
-            "last_hug": None,
-            "last_pat": None
+        key = self.couple_key(user1_id, user2_id)
+        self.data[key] = {
+            "partners": key.split(":"), "affinity": INITIAL_AFFINITY, "last_decay": date.today().isoformat(),
+            # Cooldowns para as ações de afinidade
+            "last_kiss": None, "last_hug": None, "last_pat": None
         }
-        self.data[user1_id] = {"partner_id": user2_id, "affinity": initial_affinity, **cooldowns}
-        self.data[user2_id] = {"partner_id": user1_id, "affinity": initial_affinity, **cooldowns}
-        self.save_data()
+        self._index_couple(key, self.data[key])
+        self.save_data(key)
 
     def divorce(self, user_id: str):
         """Realiza o divórcio de um usuário."""
-        marriage_data = self.get_marriage_data(user_id)
-        if marriage_data:
-            partner_id = marriage_data["partner_id"]
-            if user_id in self.data:
-                del self.data[user_id]
-            if partner_id in self.data:
-                del self.data[partner_id]
-            self.save_data()
-            return partner_id
-        return None
+        partner_id = self.get_partner_id(user_id)
+        if partner_id is None:
+            return None
+        key = self._remove_couple(self.couple_of[user_id])
+        self.save_data(key)
+        return partner_id
+
+    def _remove_couple(self, key: str) -> str:
+        """Tira o casal da memória, do índice e do ranking (sem gravar)."""
+        couple = self.data.pop(key)
+        for user_id in couple["partners"]:
+            self.couple_of.pop(user_id, None)
+        self.leaderboard.remove(key)
+        return key
+
+    def apply_decay(self, today: Optional[date] = None) -> List[Tuple[str, str]]:
+        """Aplica a perda diária de afinidade a todos os casais numa única passada.
+
+        Os dias são contados a partir de `last_decay` de cada casal, então reiniciar o
+        bot não perde nem repete dias. Casais que chegam a zero são divorciados.
+        Tudo que mudou é gravado de uma vez no final. Retorna os casais divorciados.
+        """
+        today = today or date.today()
+        changed = []
+        divorced = []
+        for key, couple in list(self.data.items()):
+            last_decay = couple.get("last_decay")
+            if not last_decay:
+                # Casamentos anteriores ao decaimento começam a contar a partir de hoje
+                couple["last_decay"] = today.isoformat()
+                changed.append(key)
+                continue
+            days = (today - date.fromisoformat(last_decay)).days
+            if days <= 0:
+                continue
+            new_affinity = couple.get("affinity", 0) - DAILY_AFFINITY_DECAY * days
+            changed.append(key)
+            if new_affinity <= 0:
+                self._remove_couple(key)
+                divorced.append(tuple(couple["partners"]))
+                continue
+            couple["affinity"] = new_affinity
+            couple["last_decay"] = today.isoformat()
+            self.leaderboard.update(key, new_affinity)
+        if changed:
+            self.save_data(*changed)
+        return divorced
+
+    async def run_decay_scheduler(self):
+        """Roda `apply_decay` na inicialização e logo após cada meia-noite."""
+        while True:
+            try:
+                divorced = self.apply_decay()
+                if divorced:
+                    print(f"Decaimento de afinidade: {len(divorced)} casamento(s) chegaram a zero e terminaram.")
+            except Exception as e:
+                print(f"Erro ao aplicar o decaimento de afinidade: {e}")
+            now = datetime.now()
+            next_midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+            await asyncio.sleep((next_midnight - now).total_seconds() + 1)
 
     def can_perform_action(self, user_id: str, action_type: str) -> bool:
         """Verifica se uma ação de afinidade pode ser realizada (cooldown diário)."""
@@ -82,21 +165,16 @@ class MarriageSystem:
         if not self.can_perform_action(user_id, action_type):
             return False
 
-        partner_id = self.get_partner_id(user_id)
-        if not partner_id:
-            return False
+        key = self.couple_of[user_id]
+        couple = self.data[key]
 
-        # Atualiza o timestamp para ambos
-        timestamp = datetime.now().isoformat()
-        self.data[user_id][f"last_{action_type}"] = timestamp
-        self.data[partner_id][f"last_{action_type}"] = timestamp
-        
-        # Atualiza a afinidade para ambos (com limite de 20)
-        new_affinity = min(self.data[user_id]["affinity"] + points, 20)
-        self.data[user_id]["affinity"] = new_affinity
-        self.data[partner_id]["affinity"] = new_affinity
-        
-        self.save_data()
+        # O registro é do casal: uma única atualização vale para os dois
+        couple[f"last_{action_type}"] = datetime.now().isoformat()
+        # Atualiza a afinidade (com limite de 20)
+        couple["affinity"] = min(couple["affinity"] + points, INITIAL_AFFINITY)
+        self.leaderboard.update(key, couple["affinity"])
+
+        self.save_data(key)
         return True
 
 # Instância global do sistema de casamento
@@ -0,0 +1,103 @@
+# mass_moderation.py
+import asyncio
+import re
+from datetime import timedelta
+from typing import Awaitable, Callable, List, Optional, Tuple
+import discord
+from member_cache import member_cache
+from purge_engine import retry_on_rate_limit
+
+# Limite de alvos por comando, para um filtro largo demais não varrer o servidor inteiro
+MAX_TARGETS = 1000
+# O endpoint de ban em massa aceita até 200 usuários por chamada
+BULK_BAN_CHUNK = 200
+WORKER_COUNT = 5
+
+class RaidSelection:
+    """Seleção de membros para ação em massa; todos os critérios informados precisam bater."""
+    def __init__(self, joined_within: Optional[timedelta] = None, name_pattern: Optional[re.Pattern] = None,
+                 role: Optional[discord.Role] = None):
+        self.joined_within = joined_within
+        self.name_pattern = name_pattern
+        self.role = role
+
+    @property
+    def is_empty(self) -> bool:
+        return self.joined_within is None and self.name_pattern is None and self.role is None
+
+    def matches(self, member: discord.Member, joined_after) -> bool:
+        if joined_after is not None and (member.joined_at is None or member.joined_at < joined_after):
+            return False
+        if self.role is not None and self.role not in member.roles:
+            return False
+        if self.name_pattern is not None and not any(
+            self.name_pattern.search(name) for name in (member.name, member.display_name) if name
+        ):
+            return False
+        return True
+
+    async def select(self, guild: discord.Guild, can_act: Callable[[discord.Member], bool]) -> List[discord.Member]:
+        """Membros que batem com a seleção e sobre os quais o moderador pode agir."""
+        await member_cache.ensure_roster(guild)
+        joined_after = discord.utils.utcnow() - self.joined_within if self.joined_within else None
+        selected = []
+        for member in guild.members:
+            if self.matches(member, joined_after) and can_act(member):
+                selected.append(member)
+                if len(selected) >= MAX_TARGETS:
+                    break
+        return selected
+
+async def run_worker_pool(targets: List[discord.Member], action: Callable[[discord.Member], Awaitable[None]],
+                          workers: int = WORKER_COUNT) -> Tuple[List[discord.Member], List[Tuple[discord.Member, str]]]:
+    """Aplica `action` aos alvos com um número fixo de tarefas concorrentes.
+
+    Os buckets de rate limit do discord.py serializam o que for da mesma rota; os
+    workers só evitam que um alvo lento segure a fila inteira.
+    """
+    queue: "asyncio.Queue[discord.Member]" = asyncio.Queue()
+    for member in targets:
+        queue.put_nowait(member)
+    done: List[discord.Member] = []
+    failed: List[Tuple[discord.Member, str]] = []
+
+    async def worker():
+        while True:
+            try:
+                member = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                await retry_on_rate_limit(lambda: action(member))
+                done.append(member)
+            except discord.HTTPException as e:
+                failed.append((member, str(e)))
+
+    await asyncio.gather(*(worker() for _ in range(min(workers, len(targets)))))
+    return done, failed
+
+async def bulk_ban(guild: discord.Guild, targets: List[discord.Member], reason: str,
+                   delete_message_seconds: int = 0) -> Tuple[List[discord.Member], List[Tuple[discord.Member, str]]]:
+    """Bane os alvos usando o endpoint de ban em massa, em lotes de até 200."""
+    done: List[discord.Member] = []
+    failed: List[Tuple[discord.Member, str]] = []
+    for start in range(0, len(targets), BULK_BAN_CHUNK):
+        chunk = targets[start:start + BULK_BAN_CHUNK]
+        by_id = {member.id: member for member in chunk}
+        try:
+            result = await retry_on_rate_limit(
+                lambda: guild.bulk_ban(chunk, reason=reason, delete_message_seconds=delete_message_seconds)
+            )
+        except discord.HTTPException as e:
+            failed.extend((member, str(e)) for member in chunk)
+            continue
+        done.extend(by_id[user.id] for user in result.banned if user.id in by_id)
+        failed.extend((by_id[user.id], "recusado pelo Discord") for user in result.failed if user.id in by_id)
+    return done, failed
+
+async def bulk_timeout(targets: List[discord.Member], until, reason: str):
+    """Aplica timeout nos alvos pelo pool de workers (não existe endpoint em massa)."""
+    return await run_worker_pool(targets, lambda member: member.timeout(until, reason=reason))
+
+async def bulk_kick(targets: List[discord.Member], reason: str):
+    return await run_worker_pool(targets, lambda member: member.kick(reason=reason))
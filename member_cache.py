@@ -0,0 +1,76 @@
+# member_cache.py
+import asyncio
+import os
+from typing import Dict
+import discord
+from startup_profile import current_rss_mb, peak_rss_mb
+
+class MemberCache:
+    """Modo do cache de membros e download sob demanda da lista de cada servidor.
+
+    - "full" (padrão): comportamento do discord.py, com cache completo e chunk de
+      todos os servidores no login.
+    - "lean": nenhum membro fica em cache pelos eventos e nada é baixado no login;
+      a lista de um servidor só é pedida quando um comando precisa dela inteira
+      (/serverinfo, /raid). Comandos que só precisam de alguns membros usam o
+      `member_resolver`.
+    """
+    MODES = ("full", "lean")
+
+    def __init__(self):
+        self.mode = os.getenv("MEMBER_CACHE_MODE", "full").lower()
+        if self.mode not in self.MODES:
+            print(f"MEMBER_CACHE_MODE inválido ({self.mode}); usando 'full'")
+            self.mode = "full"
+        self.chunk_locks: Dict[int, asyncio.Lock] = {}
+
+    @property
+    def lean(self) -> bool:
+        return self.mode == "lean"
+
+    def client_options(self, intents: discord.Intents) -> dict:
+        """Argumentos do Client para o modo configurado."""
+        if self.lean:
+            return {"member_cache_flags": discord.MemberCacheFlags.none(), "chunk_guilds_at_startup": False}
+        return {"member_cache_flags": discord.MemberCacheFlags.from_intents(intents), "chunk_guilds_at_startup": True}
+
+    async def ensure_roster(self, guild: discord.Guild):
+        """Garante a lista completa de membros do servidor, baixando-a uma única vez.
+
+        Comandos simultâneos no mesmo servidor esperam o mesmo chunk em vez de
+        pedir a lista de novo ao gateway.
+        """
+        if guild.chunked:
+            return
+        lock = self.chunk_locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            if not guild.chunked:
+                await guild.chunk()
+
+    def forget(self, guild_id: int):
+        self.chunk_locks.pop(guild_id, None)
+
+    def memory_report(self, client: discord.Client) -> dict:
+        """Ocupação do cache de membros e memória do processo, para comparar os modos."""
+        guilds = client.guilds
+        return {
+            "mode": self.mode,
+            "guilds": len(guilds),
+            "chunked_guilds": sum(1 for guild in guilds if guild.chunked),
+            "cached_members": sum(len(guild.members) for guild in guilds),
+            "total_members": sum(guild.member_count or 0 for guild in guilds),
+            "rss_mb": current_rss_mb(),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+    def format_report(self, report: dict) -> str:
+        rss = f"{report['rss_mb']:.1f} MB" if report["rss_mb"] is not None else "?"
+        peak = f"{report['peak_rss_mb']:.1f} MB" if report["peak_rss_mb"] is not None else "?"
+        return (
+            f"Cache de membros ({report['mode']}): {report['cached_members']:,} de {report['total_members']:,} "
+            f"membros em memória, {report['chunked_guilds']}/{report['guilds']} servidores completos; "
+            f"RSS {rss} (pico {peak})"
+        )
+
+# Instância global
+member_cache = MemberCache()
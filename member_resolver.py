@@ -0,0 +1,70 @@
+# member_resolver.py
+import asyncio
+import time
+from typing import Dict, Iterable, Optional, Tuple
+import discord
+
+class MemberResolver:
+    """Resolve IDs em membros sem fazer uma chamada REST por usuário.
+
+    Ordem: cache do gateway -> uma única consulta de chunk pelo gateway com todos
+    os que faltaram (até 100 IDs por consulta) -> cache negativo com TTL para
+    quem não está no servidor, evitando perguntar de novo a cada comando.
+    """
+    def __init__(self, negative_ttl: float = 600, max_negative: int = 10000):
+        self.negative_ttl = negative_ttl
+        self.max_negative = max_negative
+        self._missing: Dict[Tuple[int, int], float] = {}
+
+    def _is_known_missing(self, guild_id: int, user_id: int, now: float) -> bool:
+        expires_at = self._missing.get((guild_id, user_id))
+        if expires_at is None:
+            return False
+        if expires_at < now:
+            del self._missing[(guild_id, user_id)]
+            return False
+        return True
+
+    def _remember_missing(self, guild_id: int, user_ids: Iterable[int], now: float):
+        if len(self._missing) >= self.max_negative:
+            # Cache cheio: descarta os vencidos; se ainda não couber, recomeça do zero
+            self._missing = {key: exp for key, exp in self._missing.items() if exp >= now}
+            if len(self._missing) >= self.max_negative:
+                self._missing.clear()
+        for user_id in user_ids:
+            self._missing[(guild_id, user_id)] = now + self.negative_ttl
+
+    async def resolve_many(self, guild: discord.Guild, user_ids: Iterable[int]) -> Dict[int, discord.Member]:
+        """Retorna {id: membro} para os IDs presentes no servidor."""
+        now = time.monotonic()
+        found: Dict[int, discord.Member] = {}
+        misses = []
+        for user_id in dict.fromkeys(int(u) for u in user_ids):
+            member = guild.get_member(user_id)
+            if member:
+                found[user_id] = member
+            elif not self._is_known_missing(guild.id, user_id, now):
+                misses.append(user_id)
+
+        for start in range(0, len(misses), 100):
+            chunk = misses[start:start + 100]
+            try:
+                members = await guild.query_members(user_ids=chunk, limit=len(chunk), cache=True)
+            except (asyncio.TimeoutError, discord.ClientException) as e:
+                # Sem resposta do gateway: não marca ninguém como ausente
+                print(f"Falha ao consultar membros do servidor {guild.id}: {e}")
+                continue
+            for member in members:
+                found[member.id] = member
+            self._remember_missing(guild.id, [u for u in chunk if u not in found], now)
+        return found
+
+    async def resolve(self, guild: discord.Guild, user_id: int) -> Optional[discord.Member]:
+        return (await self.resolve_many(guild, [user_id])).get(int(user_id))
+
+    def forget(self, guild_id: int, user_id: int):
+        """Tira um usuário do cache negativo (ex: quando ele entra no servidor)."""
+        self._missing.pop((guild_id, user_id), None)
+
+# Instância global
+member_resolver = MemberResolver()
@@ -0,0 +1,246 @@
+# metrics.py
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+import discord
+from discord import app_commands
+
+# Limites dos buckets (segundos): de alguns ms (automod) até os comandos que deferem e esperam a API
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)  # Não cumulativo; acumulado só na exportação
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimativa pelo limite superior do bucket; None se passou do maior bucket ou não há dados."""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return None
+
+class MetricsRegistry:
+    """Contadores, histogramas de latência e gauges, exportados no formato texto do Prometheus.
+
+    Tudo fica em memória e é atualizado no próprio caminho do evento (O(buckets) por
+    observação). A thread de gravação também registra aqui, por isso o lock.
+    """
+    def __init__(self, prefix: str = "lyrio"):
+        self.prefix = prefix
+        self.started_at = time.time()
+        self.help: Dict[str, Tuple[str, str]] = {}  # nome -> (tipo, descrição)
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.gauges: Dict[str, Callable[[], Optional[float]]] = {}
+        self._lock = threading.Lock()
+        self._runner = None
+
+    def _name(self, name: str) -> str:
+        return f"{self.prefix}_{name}"
+
+    def describe(self, name: str, kind: str, description: str):
+        self.help[self._name(name)] = (kind, description)
+
+    def inc(self, name: str, amount: float = 1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.counters.setdefault(self._name(name), {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self.histograms.setdefault(self._name(name), {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram()
+            histogram.observe(seconds)
+
+    def gauge(self, name: str, description: str, func: Callable[[], Optional[float]]):
+        """Registra um valor lido na hora da exportação (tamanho de fila, memória, etc.)."""
+        self.describe(name, "gauge", description)
+        self.gauges[self._name(name)] = func
+
+    @contextmanager
+    def track(self, name: str, **labels):
+        """Mede o bloco em `<name>_seconds` e conta exceções em `<name>_errors_total`."""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.inc(f"{name}_errors_total", error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - start, **labels)
+
+    # --- Ganchos ---
+    def command_started(self, interaction: discord.Interaction):
+        interaction.extras["metrics_started_at"] = time.perf_counter()
+
+    def command_finished(self, interaction: discord.Interaction, error: Optional[Exception] = None):
+        started_at = interaction.extras.get("metrics_started_at")
+        command = interaction.command.qualified_name if interaction.command else "desconhecido"
+        if started_at is not None:
+            self.observe("command_seconds", time.perf_counter() - started_at, command=command)
+        if error is not None:
+            original = getattr(error, "original", error)  # CommandInvokeError embrulha a exceção real
+            self.inc("command_errors_total", command=command, error=type(original).__name__)
+
+    def on_storage_write(self, target: str, seconds: float, ok: bool):
+        """Observador do `persistence.executor` (roda na thread de escrita)."""
+        self.observe("storage_write_seconds", seconds, target=target)
+        if not ok:
+            self.inc("storage_write_errors_total", target=target)
+
+    # --- Exportação ---
+    @staticmethod
+    def _format_labels(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+        pairs = labels + extra
+        if not pairs:
+            return ""
+        escaped = (f'{key}="{_escape(str(value))}"' for key, value in pairs)
+        return "{" + ",".join(escaped) + "}"
+
+    def _header(self, lines: List[str], name: str, default_kind: str):
+        kind, description = self.help.get(name, (default_kind, ""))
+        if description:
+            lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+
+    def render(self) -> str:
+        """Todas as métricas no formato de exposição texto do Prometheus."""
+        lines: List[str] = []
+        with self._lock:
+            counters = {name: dict(series) for name, series in self.counters.items()}
+            histograms = {
+                name: {labels: (h.buckets, list(h.counts), h.count, h.sum) for labels, h in series.items()}
+                for name, series in self.histograms.items()
+            }
+        for name, series in sorted(counters.items()):
+            self._header(lines, name, "counter")
+            for labels, value in series.items():
+                lines.append(f"{name}{self._format_labels(labels)} {value}")
+        for name, series in sorted(histograms.items()):
+            self._header(lines, name, "histogram")
+            for labels, (buckets, counts, count, total) in series.items():
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f"{name}_bucket{self._format_labels(labels, (('le', repr(bound)),))} {cumulative}")
+                lines.append(f"{name}_bucket{self._format_labels(labels, (('le', '+Inf'),))} {count}")
+                lines.append(f"{name}_sum{self._format_labels(labels)} {total}")
+                lines.append(f"{name}_count{self._format_labels(labels)} {count}")
+        for name, func in sorted(self.gauges.items()):
+            try:
+                value = func()
+            except Exception as e:
+                print(f"Erro ao ler a métrica {name}: {e}")
+                continue
+            if value is None:
+                continue
+            self._header(lines, name, "gauge")
+            lines.append(f"{name} {value}")
+        return "\n".join(lines) + "\n"
+
+    def command_summary(self, limit: int = 10) -> List[Tuple[str, int, Optional[float], Optional[float], int]]:
+        """(comando, execuções, p50, p95, erros) dos comandos mais usados, para o /stats."""
+        with self._lock:
+            latencies = dict(self.histograms.get(self._name("command_seconds"), {}))
+            errors: Dict[str, float] = {}
+            for labels, value in self.counters.get(self._name("command_errors_total"), {}).items():
+                command = dict(labels)["command"]
+                errors[command] = errors.get(command, 0) + value
+        rows = []
+        for labels, histogram in latencies.items():
+            command = dict(labels)["command"]
+            rows.append((command, histogram.count, histogram.quantile(0.5), histogram.quantile(0.95), int(errors.get(command, 0))))
+        rows.sort(key=lambda row: row[1], reverse=True)
+        return rows[:limit]
+
+    def merged(self, name: str) -> Histogram:
+        """Soma todas as séries de um histograma (ex: gravações de todos os arquivos)."""
+        merged = Histogram()
+        with self._lock:
+            for histogram in self.histograms.get(self._name(name), {}).values():
+                merged.count += histogram.count
+                merged.sum += histogram.sum
+                merged.counts = [a + b for a, b in zip(merged.counts, histogram.counts)]
+        return merged
+
+    # --- Endpoint HTTP ---
+    async def start_http_server(self, host: Optional[str] = None, port: Optional[int] = None):
+        """Sobe o endpoint /metrics se METRICS_PORT estiver definido (desligado por padrão).
+
+        Escuta só em 127.0.0.1, a menos que METRICS_HOST diga o contrário.
+        """
+        port = port or int(os.getenv("METRICS_PORT", "0") or 0)
+        if not port:
+            return
+        host = host or os.getenv("METRICS_HOST", "127.0.0.1")
+        from aiohttp import web
+
+        async def handle(request):
+            return web.Response(text=self.render(), content_type="text/plain", charset="utf-8",
+                                headers={"X-Content-Type-Options": "nosniff"})
+
+        app = web.Application()
+        app.router.add_get("/metrics", handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        try:
+            await web.TCPSite(self._runner, host, port).start()
+        except OSError as e:
+            print(f"Não foi possível abrir o endpoint de métricas em {host}:{port}: {e}")
+            await self._runner.cleanup()
+            self._runner = None
+            return
+        print(f"Métricas disponíveis em http://{host}:{port}/metrics")
+
+    async def stop_http_server(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+class InstrumentedCommandTree(app_commands.CommandTree):
+    """CommandTree que mede cada slash command (o sucesso chega pelo evento `on_app_command_completion`)."""
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        metrics.command_started(interaction)
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: app_commands.AppCommandError):
+        metrics.command_finished(interaction, error)
+        await super().on_error(interaction, error)
+
+# Instância global
+metrics = MetricsRegistry()
+metrics.describe("command_seconds", "histogram", "Duração dos slash commands, do recebimento ao fim do handler.")
+metrics.describe("command_errors_total", "counter", "Slash commands que terminaram com exceção.")
+metrics.describe("automod_check_seconds", "histogram", "Duração do AutoModSystem.check_message por mensagem.")
+metrics.describe("automod_check_errors_total", "counter", "Exceções no AutoModSystem.check_message.")
+metrics.describe("storage_write_seconds", "histogram", "Duração de cada gravação na thread de persistência.")
+metrics.describe("storage_write_errors_total", "counter", "Gravações que falharam na thread de persistência.")
@@ -0,0 +1,68 @@
+# moderation_store.py
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+from persistence import WriteBehind
+from storage import Repository
+
+class ModerationStore:
+    def __init__(self, warns_repo: Repository, mutes_repo: Repository):
+        """Carrega advertências e silenciamentos uma única vez, indexados por usuário."""
+        self.warns_repo = warns_repo
+        self.mutes_repo = mutes_repo
+        self.warns: Dict[str, List[dict]] = warns_repo.load_all()
+        self.mutes: Dict[str, dict] = mutes_repo.load_all()
+        # Cada alteração só marca o usuário; a gravação é incremental e em lote
+        self.warns_writer = WriteBehind(lambda user_ids: self.warns_repo.save_keys(self.warns, user_ids))
+        self.mutes_writer = WriteBehind(lambda user_ids: self.mutes_repo.save_keys(self.mutes, user_ids))
+
+    def flush(self):
+        """Grava imediatamente as alterações pendentes."""
+        self.warns_writer.flush()
+        self.mutes_writer.flush()
+
+    def add_warn(self, user_id: str, staff_id: str, reason: str) -> int:
+        """Adiciona uma advertência e retorna o total de advertências do usuário."""
+        user_warns = self.warns.setdefault(user_id, [])
+        user_warns.append({
+            "id": len(user_warns) + 1, "timestamp": datetime.now().isoformat(), "staff_id": staff_id,
+            "reason": reason, "active": True
+        })
+        self.warns_writer.mark_dirty(user_id)
+        return len(user_warns)
+
+    def get_warns(self, user_id: str) -> List[dict]:
+        return self.warns.get(user_id, [])
+
+    def remove_warn(self, user_id: str, warn_id: int) -> bool:
+        for warn in self.warns.get(user_id, []):
+            if warn["id"] == warn_id and warn["active"]:
+                warn["active"] = False
+                self.warns_writer.mark_dirty(user_id)
+                return True
+        return False
+
+    def add_mute(self, user_id: str, staff_id: str, duration: int, reason: str):
+        mute_until = datetime.now() + timedelta(minutes=duration)
+        self.mutes[user_id] = {
+            "timestamp": datetime.now().isoformat(), "staff_id": staff_id, "reason": reason,
+            "duration": duration, "mute_until": mute_until.isoformat(), "active": True
+        }
+        self.mutes_writer.mark_dirty(user_id)
+
+    def get_mute(self, user_id: str) -> Optional[dict]:
+        return self.mutes.get(user_id)
+
+    def is_muted(self, user_id: str) -> bool:
+        """Verifica o silenciamento sem efeito colateral: um mute vencido apenas conta como inativo."""
+        mute_data = self.mutes.get(user_id)
+        if not mute_data or not mute_data.get("active", False):
+            return False
+        return datetime.now() < datetime.fromisoformat(mute_data["mute_until"])
+
+    def unmute(self, user_id: str) -> bool:
+        mute_data = self.mutes.get(user_id)
+        if not mute_data:
+            return False
+        mute_data["active"] = False
+        self.mutes_writer.mark_dirty(user_id)
+        return True
@@ -0,0 +1,224 @@
+# persistence.py
+import asyncio
+import json
+import os
+import queue
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, Iterable, Optional, Set
+
+def atomic_write_text(filename: str, text: str):
+    """Grava o texto num arquivo temporário e o renomeia por cima do original.
+
+    O `os.replace` é atômico, então uma queda no meio da escrita nunca deixa
+    o arquivo pela metade: ou fica a versão antiga, ou a nova inteira.
+    """
+    directory = os.path.dirname(os.path.abspath(filename))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(filename)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, filename)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+def atomic_write_json(filename: str, data, indent: Optional[int] = 4):
+    """Serializa `data` e grava de forma atômica (ver `atomic_write_text`)."""
+    atomic_write_text(filename, json.dumps(data, indent=indent, ensure_ascii=False))
+
+class PersistenceExecutor:
+    """Thread única de escrita: todo I/O de disco sai do event loop e passa por aqui.
+
+    Quem chama tira um snapshot dos dados (no próprio event loop, sem I/O) e
+    envia um job; a thread executa os jobs em ordem FIFO, então gravações do
+    mesmo arquivo nunca se atropelam. `submit` nunca bloqueia, porque quem chama
+    está no event loop: quem grava com frequência junta as alterações com um
+    `CoalescingWriter`, e passar de `max_queue` jobs só fica registrado nas métricas.
+    """
+    def __init__(self, max_queue: int = 1000):
+        self.queue: "queue.Queue" = queue.Queue()
+        self.max_queue = max_queue
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_depth = 0
+        self.overflows = 0
+        self.total_write_seconds = 0.0
+        self.last_write_seconds = 0.0
+        self.per_target: Dict[str, Dict[str, float]] = {}
+        # Observadores opcionais chamados com (alvo, segundos, sucesso) após cada job
+        self.listeners = []
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="persistence-writer", daemon=True)
+                self._thread.start()
+
+    def submit(self, target: str, func: Callable, *args) -> Future:
+        """Enfileira `func(*args)` para a thread de escrita e retorna um Future."""
+        self._ensure_thread()
+        future: Future = Future()
+        self.queue.put_nowait((target, func, args, future))
+        if self.queue.qsize() > self.max_queue:
+            self.overflows += 1
+        self.submitted += 1
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return future
+
+    def _run(self):
+        while True:
+            target, func, args, future = self.queue.get()
+            start = time.perf_counter()
+            ok = True
+            try:
+                future.set_result(func(*args))
+            except BaseException as e:
+                ok = False
+                self.failed += 1
+                print(f"Erro ao gravar {target}: {e}")
+                future.set_exception(e)
+            elapsed = time.perf_counter() - start
+            self.completed += 1
+            self.last_write_seconds = elapsed
+            self.total_write_seconds += elapsed
+            stats = self.per_target.setdefault(target, {"writes": 0, "seconds": 0.0})
+            stats["writes"] += 1
+            stats["seconds"] += elapsed
+            for listener in self.listeners:
+                try:
+                    listener(target, elapsed, ok)
+                except Exception:
+                    pass
+            self.queue.task_done()
+
+    def drain(self, timeout: Optional[float] = 30):
+        """Bloqueia até todos os jobs enfileirados até agora terminarem."""
+        if self._thread is None:
+            return
+        try:
+            self.submit("drain", lambda: None).result(timeout=timeout)
+        except Exception as e:
+            print(f"Não foi possível esvaziar a fila de gravação: {e}")
+
+    def stats(self) -> dict:
+        """Métricas de back-pressure e tempo de gravação."""
+        return {
+            "depth": self.queue.qsize(),
+            "max_depth": self.max_depth,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "overflows": self.overflows,
+            "last_write_ms": round(self.last_write_seconds * 1000, 2),
+            "avg_write_ms": round(self.total_write_seconds * 1000 / self.completed, 2) if self.completed else 0.0,
+        }
+
+# Instância global compartilhada por todas as classes de persistência
+executor = PersistenceExecutor()
+
+class CoalescingWriter:
+    """Junta as alterações de um alvo enquanto o job anterior ainda espera na fila.
+
+    Há no máximo um job pendente por alvo: `stage` acrescenta as mudanças ao lote
+    pendente e devolve o Future desse job; se o job já começou, abre um novo.
+    `apply` roda na thread de escrita com todas as mudanças acumuladas.
+    """
+    def __init__(self, target: str, apply: Callable[[dict], None]):
+        self.target = target
+        self.apply = apply
+        self._lock = threading.Lock()
+        self._pending: dict = {}
+        self._future: Optional[Future] = None
+
+    def stage(self, changes: dict) -> Future:
+        with self._lock:
+            self._pending.update(changes)
+            if self._future is None:
+                self._future = executor.submit(self.target, self._run)
+            return self._future
+
+    def _run(self):
+        with self._lock:
+            changes, self._pending, self._future = self._pending, {}, None
+        if changes:
+            self.apply(changes)
+
+class WriteBehind:
+    """Acumula as chaves alteradas e grava tudo de uma vez (write-behind).
+
+    As mutações só marcam a chave como suja (O(1)); a gravação real acontece
+    quando o temporizador vence ou quando o número de chaves sujas passa do limite.
+    """
+    def __init__(self, flush_func: Callable[[Set[str]], Optional[Future]], flush_interval: float = 5.0, max_dirty: int = 100):
+        self.flush_func = flush_func
+        self.flush_interval = flush_interval
+        self.max_dirty = max_dirty
+        self.dirty: Set[str] = set()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        _registry.append(self)
+
+    def mark_dirty(self, *keys: str):
+        """Marca chaves como alteradas e agenda a gravação."""
+        self.dirty.update(keys)
+        if len(self.dirty) >= self.max_dirty:
+            self.flush()
+            return
+        self._schedule()
+
+    def _schedule(self):
+        if self._timer is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Fora do event loop (scripts, testes manuais): grava na hora
+            self.flush()
+            return
+        self._timer = loop.call_later(self.flush_interval, self.flush)
+
+    def flush(self):
+        """Envia imediatamente todas as chaves pendentes para gravação."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self.dirty:
+            return
+        keys, self.dirty = self.dirty, set()
+        try:
+            future = self.flush_func(keys)
+        except Exception as e:
+            # Devolve as chaves para tentar de novo no próximo ciclo
+            self.dirty.update(keys)
+            print(f"Erro ao gravar dados pendentes: {e}")
+            return
+        if isinstance(future, Future):
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            future.add_done_callback(lambda f: self._on_written(f, keys, loop))
+
+    def _on_written(self, future: Future, keys: Set[str], loop: asyncio.AbstractEventLoop):
+        # Roda na thread de escrita: se falhou, devolve as chaves pelo event loop
+        if future.exception() is None or loop.is_closed():
+            return
+        loop.call_soon_threadsafe(self.mark_dirty, *keys)
+
+_registry: list = []
+
+def flush_all(writers: Optional[Iterable[WriteBehind]] = None):
+    """Descarrega todos os write-behinds registrados e espera a fila de gravação (desligamento)."""
+    for writer in list(writers if writers is not None else _registry):
+        writer.flush()
+    executor.drain()
@@ -0,0 +1,167 @@
+# purge_engine.py
+import asyncio
+import re
+import time
+from datetime import timedelta
+from typing import Awaitable, Callable, List, Optional
+import discord
+
+# O bulk delete só aceita mensagens com menos de 14 dias; a margem evita recusas na borda
+BULK_DELETE_MAX_AGE = timedelta(days=14) - timedelta(minutes=5)
+BULK_BATCH_SIZE = 100
+# Mensagens antigas saem uma a uma, no ritmo do limite de deleção do Discord
+SINGLE_DELETE_INTERVAL = 1.1
+# O token da interação vale 15 minutos: as deleções lentas precisam caber nele com folga
+MAX_OLD_DELETES = 500
+TIME_BUDGET = timedelta(minutes=12).total_seconds()
+PROGRESS_INTERVAL = 3.0
+MAX_RATE_LIMIT_RETRIES = 3
+
+async def retry_on_rate_limit(action: Callable[[], Awaitable]):
+    """Executa `action`, esperando o Retry-After e tentando de novo se ainda vier um 429.
+
+    O discord.py já respeita os buckets pelos cabeçalhos de rate limit; isto cobre
+    os 429 que escapam dele (limites globais ou compartilhados).
+    """
+    for attempt in range(MAX_RATE_LIMIT_RETRIES):
+        try:
+            return await action()
+        except discord.HTTPException as e:
+            if e.status != 429 or attempt == MAX_RATE_LIMIT_RETRIES - 1:
+                raise
+            retry_after = e.response.headers.get("Retry-After") if e.response is not None else None
+            await asyncio.sleep(float(retry_after) if retry_after else 1.0 + attempt)
+
+class PurgeFilter:
+    """Critérios da limpeza: a mensagem precisa atender todos os que foram informados."""
+    def __init__(self, user_id: Optional[int] = None, pattern: Optional[re.Pattern] = None,
+                 attachments_only: bool = False, max_age: Optional[timedelta] = None):
+        self.user_id = user_id
+        self.pattern = pattern
+        self.attachments_only = attachments_only
+        self.max_age = max_age
+
+    def matches(self, message: discord.Message) -> bool:
+        if self.user_id is not None and message.author.id != self.user_id:
+            return False
+        if self.attachments_only and not message.attachments:
+            return False
+        if self.pattern is not None and not self.pattern.search(message.content):
+            return False
+        return True
+
+class PurgeStats:
+    def __init__(self):
+        self.scanned = 0
+        self.deleted = 0
+        self.bulk_requests = 0
+        self.single_deletes = 0
+        self.failed = 0
+        # Motivo de ter parado antes de `limit`: "antigas" (limite de mensagens antigas) ou "tempo"
+        self.stopped_early: Optional[str] = None
+
+ProgressCallback = Callable[[PurgeStats], Awaitable[None]]
+
+class PurgeEngine:
+    """Limpeza em fluxo: lê o histórico página a página e apaga enquanto lê.
+
+    As mensagens recentes que passam no filtro são agrupadas em lotes de 100 para
+    o bulk delete; as com mais de 14 dias caem para deleções individuais espaçadas.
+    O histórico vem da mais nova para a mais antiga, então ao passar do limite de
+    idade do filtro a leitura para sem percorrer o resto do canal. Pelo mesmo motivo,
+    ao atingir `max_old_deletes` tudo o que viria depois também é antigo, e a
+    limpeza termina ali; `time_budget` encerra a execução antes de o token vencer.
+    """
+    def __init__(self, channel: discord.abc.Messageable, limit: int, purge_filter: PurgeFilter,
+                 progress: Optional[ProgressCallback] = None, max_scan: int = 20000,
+                 max_old_deletes: int = MAX_OLD_DELETES, time_budget: float = TIME_BUDGET):
+        self.channel = channel
+        self.limit = limit
+        self.filter = purge_filter
+        self.progress = progress
+        self.max_scan = max_scan
+        self.max_old_deletes = max_old_deletes
+        self.time_budget = time_budget
+        self.stats = PurgeStats()
+        self._last_progress = time.monotonic()
+        self._last_single_delete = 0.0
+
+    async def run(self) -> PurgeStats:
+        now = discord.utils.utcnow()
+        bulk_cutoff = now - BULK_DELETE_MAX_AGE
+        age_cutoff = now - self.filter.max_age if self.filter.max_age else None
+        deadline = time.monotonic() + self.time_budget
+        matched = 0
+        batch: List[discord.Message] = []
+        async for message in self.channel.history(limit=self.max_scan):
+            self.stats.scanned += 1
+            if age_cutoff and message.created_at < age_cutoff:
+                break
+            if time.monotonic() >= deadline:
+                self.stats.stopped_early = "tempo"
+                break
+            if self.filter.matches(message):
+                matched += 1
+                if message.created_at >= bulk_cutoff:
+                    batch.append(message)
+                    if len(batch) >= BULK_BATCH_SIZE:
+                        await self._bulk_delete(batch)
+                        batch = []
+                else:
+                    if batch:
+                        await self._bulk_delete(batch)
+                        batch = []
+                    if self.stats.single_deletes >= self.max_old_deletes:
+                        self.stats.stopped_early = "antigas"
+                        break
+                    await self._single_delete(message)
+                if matched >= self.limit:
+                    break
+            await self._report_progress()
+        if batch:
+            await self._bulk_delete(batch)
+        return self.stats
+
+    async def _bulk_delete(self, batch: List[discord.Message]):
+        if len(batch) == 1:
+            await self._single_delete(batch[0], paced=False)
+            return
+        try:
+            await retry_on_rate_limit(lambda: self.channel.delete_messages(batch))
+        except discord.Forbidden:
+            raise
+        except discord.HTTPException as e:
+            self.stats.failed += len(batch)
+            print(f"Falha no bulk delete de {len(batch)} mensagens: {e}")
+            return
+        self.stats.bulk_requests += 1
+        self.stats.deleted += len(batch)
+
+    async def _single_delete(self, message: discord.Message, paced: bool = True):
+        if paced:
+            wait = self._last_single_delete + SINGLE_DELETE_INTERVAL - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+        try:
+            await retry_on_rate_limit(message.delete)
+        except discord.NotFound:
+            return  # Já apagada por outra pessoa
+        except discord.Forbidden:
+            raise
+        except discord.HTTPException as e:
+            self.stats.failed += 1
+            print(f"Falha ao apagar a mensagem {message.id}: {e}")
+            return
+        finally:
+            self._last_single_delete = time.monotonic()
+        self.stats.single_deletes += 1
+        self.stats.deleted += 1
+
+    async def _report_progress(self):
+        if self.progress is None or time.monotonic() - self._last_progress < PROGRESS_INTERVAL:
+            return
+        self._last_progress = time.monotonic()
+        try:
+            await self.progress(self.stats)
+        except discord.HTTPException:
+            pass  # Progresso é só informativo (ex: token da interação vencido)
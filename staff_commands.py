@@ -1,47 +1,55 @@
 # staff_commands.py
 import discord
+import re
 from discord import app_commands
 # --- IMPORTAÇÕES DO AUTOMOD COMENTADAS PARA EVITAR O ERRO ---
 # from discord import AutoModRule, AutoModTrigger, AutoModAction, AutoModRuleEventType, AutoModTriggerType, AutoModActionType
-from discord.ext import commands
-import json
-import os
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from functools import cached_property
+from typing import List, Optional, Union
 from goodmorning import coin_system
+from storage import get_audit_log, get_repository
+from moderation_store import ModerationStore
+from purge_engine import MAX_OLD_DELETES, PurgeEngine, PurgeFilter, PurgeStats
+from mass_moderation import RaidSelection, bulk_ban, bulk_kick, bulk_timeout
+from guild_stats import guild_stats
 from config_system import config_system
 from automod_system import automod
 
 class StaffCommands:
     def __init__(self):
         self.staff_roles = ["Staff", "Moderador", "Admin", "Owner", "Administrador"]
-        self.log_file = "staff_logs.json"
+        self.log_file = "staff_logs.jsonl"
         self.warns_file = "user_warns.json"
         self.mutes_file = "user_mutes.json"
-        self.ensure_files()
 
-    def ensure_files(self):
-        files = [self.log_file, self.warns_file, self.mutes_file]
-        for file in files:
-            if not os.path.exists(file):
-                with open(file, 'w', encoding='utf-8') as f:
-                    json.dump({} if file != self.log_file else [], f)
+    # Log e moderação só são abertos no primeiro uso: checar cargo de staff não precisa deles
+    @cached_property
+    def audit_log(self):
+        return get_audit_log(self.log_file)
 
-    def log_action(self, staff_id: str, staff_name: str, action: str, target_id: str, target_name: str, amount: int = 0, reason: str = "", extra_data: str = ""):
-        try:
-            with open(self.log_file, 'r', encoding='utf-8') as f:
-                logs = json.load(f)
-        except:
-            logs = []
-        log_entry = {
+    @cached_property
+    def moderation(self) -> ModerationStore:
+        """Advertências e silenciamentos ficam em memória, carregados uma única vez."""
+        return ModerationStore(
+            get_repository("warns", self.warns_file, indent=2),
+            get_repository("mutes", self.mutes_file, indent=2)
+        )
+
+    @staticmethod
+    def make_log_entry(staff_id: str, staff_name: str, action: str, target_id: str, target_name: str, amount: int = 0, reason: str = "", extra_data: str = "") -> dict:
+        return {
             "timestamp": datetime.now().isoformat(), "staff_id": staff_id, "staff_name": staff_name, "action": action,
             "target_id": target_id, "target_name": target_name, "amount": amount, "reason": reason, "extra_data": extra_data
         }
-        logs.append(log_entry)
-        if len(logs) > 1000:
-            logs = logs[-1000:]
-        with open(self.log_file, 'w', encoding='utf-8') as f:
-            json.dump(logs, f, indent=2, ensure_ascii=False)
+
+    def log_action(self, staff_id: str, staff_name: str, action: str, target_id: str, target_name: str, amount: int = 0, reason: str = "", extra_data: str = ""):
+        self.audit_log.append(self.make_log_entry(staff_id, staff_name, action, target_id, target_name, amount, reason, extra_data))
+
+    def log_actions(self, entries: List[dict]):
+        """Grava várias entradas de uma vez (uma única escrita no log)."""
+        if entries:
+            self.audit_log.append_many(entries)
 
     def is_staff(self, member: Union[discord.Member, discord.User]) -> bool:
         if isinstance(member, discord.User):
@@ -55,95 +63,27 @@ class StaffCommands:
 
     def get_logs(self, limit: int = 50):
         try:
-            with open(self.log_file, 'r', encoding='utf-8') as f:
-                logs = json.load(f)
-            return logs[-limit:][::-1]
-        except:
+            return self.audit_log.tail(limit)
+        except Exception:
             return []
 
     def add_warn(self, user_id: str, staff_id: str, reason: str):
-        try:
-            with open(self.warns_file, 'r', encoding='utf-8') as f:
-                warns = json.load(f)
-        except:
-            warns = {}
-        if user_id not in warns:
-            warns[user_id] = []
-        warn_data = {
-            "id": len(warns[user_id]) + 1, "timestamp": datetime.now().isoformat(), "staff_id": staff_id,
-            "reason": reason, "active": True
-        }
-        warns[user_id].append(warn_data)
-        with open(self.warns_file, 'w', encoding='utf-8') as f:
-            json.dump(warns, f, indent=2, ensure_ascii=False)
-        return len(warns[user_id])
+        return self.moderation.add_warn(user_id, staff_id, reason)
 
     def get_warns(self, user_id: str):
-        try:
-            with open(self.warns_file, 'r', encoding='utf-8') as f:
-                warns = json.load(f)
-            return warns.get(user_id, [])
-        except:
-            return []
+        return self.moderation.get_warns(user_id)
 
     def remove_warn(self, user_id: str, warn_id: int):
-        try:
-            with open(self.warns_file, 'r', encoding='utf-8') as f:
-                warns = json.load(f)
-        except:
-            return False
-        if user_id not in warns:
-            return False
-        for warn in warns[user_id]:
-            if warn["id"] == warn_id and warn["active"]:
-                warn["active"] = False
-                with open(self.warns_file, 'w', encoding='utf-8') as f:
-                    json.dump(warns, f, indent=2, ensure_ascii=False)
-                return True
-        return False
+        return self.moderation.remove_warn(user_id, warn_id)
 
     def add_mute(self, user_id: str, staff_id: str, duration: int, reason: str):
-        try:
-            with open(self.mutes_file, 'r', encoding='utf-8') as f:
-                mutes = json.load(f)
-        except:
-            mutes = {}
-        mute_until = datetime.now() + timedelta(minutes=duration)
-        mutes[user_id] = {
-            "timestamp": datetime.now().isoformat(), "staff_id": staff_id, "reason": reason,
-            "duration": duration, "mute_until": mute_until.isoformat(), "active": True
-        }
-        with open(self.mutes_file, 'w', encoding='utf-8') as f:
-            json.dump(mutes, f, indent=2, ensure_ascii=False)
+        self.moderation.add_mute(user_id, staff_id, duration, reason)
 
     def is_muted(self, user_id: str):
-        try:
-            with open(self.mutes_file, 'r', encoding='utf-8') as f:
-                mutes = json.load(f)
-        except:
-            return False
-        if user_id not in mutes: return False
-        mute_data = mutes[user_id]
-        if not mute_data.get("active", False): return False
-        mute_until = datetime.fromisoformat(mute_data["mute_until"])
-        if datetime.now() >= mute_until:
-            mute_data["active"] = False
-            with open(self.mutes_file, 'w', encoding='utf-8') as f:
-                json.dump(mutes, f, indent=2, ensure_ascii=False)
-            return False
-        return True
+        return self.moderation.is_muted(user_id)
 
     def unmute(self, user_id: str):
-        try:
-            with open(self.mutes_file, 'r', encoding='utf-8') as f:
-                mutes = json.load(f)
-        except:
-            return False
-        if user_id not in mutes: return False
-        mutes[user_id]["active"] = False
-        with open(self.mutes_file, 'w', encoding='utf-8') as f:
-            json.dump(mutes, f, indent=2, ensure_ascii=False)
-        return True
+        return self.moderation.unmute(user_id)
 
 staff_system = StaffCommands()
 
@@ -199,8 +139,124 @@ def setup_staff_commands(tree: app_commands.CommandTree):
         else:
             await interaction.response.send_message(f"❌ A palavra-chave `{keyword}` não foi encontrada.", ephemeral=True)
     
+    @automod_group.command(name="spam", description="🛡️ [Admin] Define o limite do anti-spam neste servidor.")
+    @app_commands.describe(mensagens="Máximo de mensagens permitidas na janela (2-50).", segundos="Tamanho da janela em segundos (1-120).")
+    async def set_spam_limits(interaction: discord.Interaction, mensagens: app_commands.Range[int, 2, 50], segundos: app_commands.Range[int, 1, 120]):
+        if not interaction.user.guild_permissions.administrator:
+            return await interaction.response.send_message("❌ Apenas administradores podem usar este comando.", ephemeral=True)
+        
+        config_system.set_spam_limits(str(interaction.guild.id), mensagens, segundos)
+        await interaction.response.send_message(f"✅ Anti-spam ajustado: mais de **{mensagens}** mensagens em **{segundos}s** gera um aviso.", ephemeral=True)
+
     tree.add_command(automod_group)
 
+    # --- AÇÕES EM MASSA (RAID) ---
+    raid_group = app_commands.Group(name="raid", description="Ações em massa contra raids (banir, silenciar ou expulsar vários membros).")
+
+    async def run_raid_action(interaction: discord.Interaction, action_name: str, log_action_name: str, color: int,
+                              entrou_ha: Optional[int], nome: Optional[str], cargo: Optional[discord.Role],
+                              motivo: str, confirmar: bool, execute):
+        if not staff_system.is_staff(interaction.user):
+            embed = discord.Embed(title="❌ Acesso Negado", description="Você não tem permissão para usar este comando!", color=0xFF0000)
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+        try:
+            pattern = re.compile(nome, re.IGNORECASE) if nome else None
+        except re.error as e:
+            await interaction.response.send_message(embed=discord.Embed(title="❌ Expressão Inválida", description=f"Não foi possível usar o filtro de nome: {e}", color=0xFF0000), ephemeral=True)
+            return
+        selection = RaidSelection(joined_within=timedelta(minutes=entrou_ha) if entrou_ha else None, name_pattern=pattern, role=cargo)
+        if selection.is_empty:
+            await interaction.response.send_message(embed=discord.Embed(title="❌ Seleção Vazia", description="Informe pelo menos um critério: `entrou_ha`, `nome` ou `cargo`.", color=0xFF0000), ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True)
+
+        guild = interaction.guild
+        moderator = interaction.user
+        def can_act(member: discord.Member) -> bool:
+            # Nunca age sobre a staff, o dono, o próprio bot ou quem está acima na hierarquia
+            if member.id in (moderator.id, guild.owner_id, guild.me.id) or staff_system.is_staff(member):
+                return False
+            if member.top_role >= guild.me.top_role:
+                return False
+            return moderator.guild_permissions.administrator or member.top_role < moderator.top_role
+
+        targets = await selection.select(guild, can_act)
+        criteria = [f"entrou há ≤ {entrou_ha} min" if entrou_ha else None, f"nome: `{nome}`" if nome else None, f"cargo: {cargo.mention}" if cargo else None]
+        criteria_text = ", ".join(c for c in criteria if c)
+        if not targets:
+            await interaction.followup.send(embed=discord.Embed(title="🔎 Nenhum Alvo", description=f"Nenhum membro encontrado para: {criteria_text}", color=0xFFA500), ephemeral=True)
+            return
+        if not confirmar:
+            # Prévia: nada é executado sem a confirmação explícita
+            preview = ", ".join(member.mention for member in targets[:20])
+            if len(targets) > 20:
+                preview += f" e mais {len(targets) - 20}"
+            embed = discord.Embed(title=f"🚨 Prévia: {action_name}", description=f"**{len(targets)}** membro(s) seriam afetados.\nRepita o comando com `confirmar: True` para executar.", color=0xFFA500)
+            embed.add_field(name="🔎 Critérios", value=criteria_text, inline=False)
+            embed.add_field(name="👥 Alvos", value=preview, inline=False)
+            await interaction.followup.send(embed=embed, ephemeral=True)
+            return
+
+        done, failed = await execute(targets, f"[{moderator}] [RAID] {motivo}")
+        staff_system.log_actions([
+            staff_system.make_log_entry(str(moderator.id), str(moderator), log_action_name, str(member.id), str(member), 0, motivo, criteria_text)
+            for member in done
+        ])
+        embed = discord.Embed(title=f"🚨 Ação em Massa: {action_name}", description=f"**{len(done)}** de **{len(targets)}** membro(s) atingidos.", color=color)
+        embed.add_field(name="👮 Staff Responsável", value=moderator.mention, inline=True)
+        embed.add_field(name="❌ Falhas", value=str(len(failed)), inline=True)
+        embed.add_field(name="🔎 Critérios", value=criteria_text, inline=False)
+        embed.add_field(name="📝 Motivo", value=f"```{motivo}```", inline=False)
+        if done:
+            affected = ", ".join(f"`{member}`" for member in done[:30])
+            if len(done) > 30:
+                affected += f" e mais {len(done) - 30}"
+            embed.add_field(name="👥 Atingidos", value=affected[:1024], inline=False)
+        embed.set_footer(text="Sistema de Moderação • Modo Raid")
+        await interaction.followup.send(embed=embed, ephemeral=True)
+        await send_log_message(interaction, embed.copy())
+
+    raid_params = dict(
+        entrou_ha="Membros que entraram nos últimos N minutos",
+        nome="Expressão regular aplicada ao nome/apelido",
+        cargo="Membros com este cargo",
+        motivo="Motivo registrado no log",
+        confirmar="Executa de verdade (sem isto, mostra só a prévia)"
+    )
+
+    @raid_group.command(name="banir", description="🚨 [STAFF] Banir em massa os membros selecionados")
+    @app_commands.describe(apagar_dias="Deletar mensagens dos últimos X dias (0-7)", **raid_params)
+    async def raid_ban(interaction: discord.Interaction, motivo: str, entrou_ha: Optional[app_commands.Range[int, 1, 10080]] = None,
+                       nome: Optional[str] = None, cargo: Optional[discord.Role] = None,
+                       apagar_dias: app_commands.Range[int, 0, 7] = 1, confirmar: bool = False):
+        async def execute(targets, reason):
+            return await bulk_ban(interaction.guild, targets, reason, delete_message_seconds=apagar_dias * 86400)
+        await run_raid_action(interaction, "Banimento", "RAID_BAN", 0x8B0000, entrou_ha, nome, cargo, motivo, confirmar, execute)
+
+    @raid_group.command(name="silenciar", description="🚨 [STAFF] Silenciar em massa os membros selecionados")
+    @app_commands.describe(duracao="Duração em minutos (1-10080)", **raid_params)
+    async def raid_mute(interaction: discord.Interaction, motivo: str, duracao: app_commands.Range[int, 1, 10080] = 60,
+                        entrou_ha: Optional[app_commands.Range[int, 1, 10080]] = None, nome: Optional[str] = None,
+                        cargo: Optional[discord.Role] = None, confirmar: bool = False):
+        async def execute(targets, reason):
+            done, failed = await bulk_timeout(targets, discord.utils.utcnow() + timedelta(minutes=duracao), reason)
+            # Os silenciamentos entram no write-behind: uma gravação para o lote todo
+            for member in done:
+                staff_system.add_mute(str(member.id), str(interaction.user.id), duracao, motivo)
+            return done, failed
+        await run_raid_action(interaction, "Silenciamento", "RAID_MUTE", 0x808080, entrou_ha, nome, cargo, motivo, confirmar, execute)
+
+    @raid_group.command(name="expulsar", description="🚨 [STAFF] Expulsar em massa os membros selecionados")
+    @app_commands.describe(**raid_params)
+    async def raid_kick(interaction: discord.Interaction, motivo: str, entrou_ha: Optional[app_commands.Range[int, 1, 10080]] = None,
+                        nome: Optional[str] = None, cargo: Optional[discord.Role] = None, confirmar: bool = False):
+        async def execute(targets, reason):
+            return await bulk_kick(targets, reason)
+        await run_raid_action(interaction, "Expulsão", "RAID_KICK", 0xFF8C00, entrou_ha, nome, cargo, motivo, confirmar, execute)
+
+    tree.add_command(raid_group)
+
     # O COMANDO DO AUTOMOD FOI COMENTADO PARA EVITAR O ERRO
     # @tree.command(name="automod-rule-create", description="🛡️ [Admin] Cria uma regra do AutoMod para obter a badge.")
     # @app_commands.describe(
@@ -243,7 +299,7 @@ def setup_staff_commands(tree: app_commands.CommandTree):
             embed = discord.Embed(title="❌ Valor Inválido", description="A quantidade deve ser positiva!", color=0xFF0000)
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
-        new_balance = coin_system.add_coins(str(user.id), amount)
+        new_balance = coin_system.add_coins(str(interaction.guild.id), str(user.id), amount)
         staff_system.log_action(str(interaction.user.id), str(interaction.user), "ADD_COINS", str(user.id), str(user), amount, reason)
         embed = discord.Embed(title="💰 Orbs Adicionados", description=f"**{amount:,}** Orbs foram adicionados com sucesso!", color=0x00FF00)
         embed.add_field(name="👤 Usuário", value=user.mention, inline=True)
@@ -477,16 +533,22 @@ def setup_staff_commands(tree: app_commands.CommandTree):
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
         guild = interaction.guild
-        bots = sum(1 for member in guild.members if member.bot)
+        # Contadores mantidos pelos eventos: nada de percorrer a lista de membros a cada chamada
+        await interaction.response.defer(ephemeral=True)
+        counters = await guild_stats.get(guild)
+        bots = counters.bots
         humans = guild.member_count - bots
-        online = sum(1 for member in guild.members if member.status != discord.Status.offline and not member.bot)
-        text_channels = len(guild.text_channels)
-        voice_channels = len(guild.voice_channels)
-        categories = len(guild.categories)
+        online = await guild_stats.online_count(interaction.client, guild)
+        text_channels = counters.text_channels
+        voice_channels = counters.voice_channels
+        categories = counters.categories
+        trend = guild_stats.trend(counters, hours=24)
         created = guild.created_at.strftime("%d/%m/%Y às %H:%M")
         days_old = (datetime.now() - guild.created_at.replace(tzinfo=None)).days
         embed = discord.Embed(title=f"📊 Informações de {guild.name}", color=0x5865F2)
-        embed.add_field(name="👥 Membros", value=f"**Total:** {guild.member_count:,}\n**Humanos:** {humans:,}\n**Bots:** {bots:,}\n**Online:** {online:,}", inline=True)
+        online_text = f"{online:,}" if online is not None else "?"
+        trend_text = f"\n**24h:** {trend:+,}" if trend is not None else ""
+        embed.add_field(name="👥 Membros", value=f"**Total:** {guild.member_count:,}\n**Humanos:** {humans:,}\n**Bots:** {bots:,}\n**Online:** {online_text}{trend_text}", inline=True)
         embed.add_field(name="📺 Canais", value=f"**Texto:** {text_channels}\n**Voz:** {voice_channels}\n**Categorias:** {categories}\n**Total:** {text_channels + voice_channels}", inline=True)
         embed.add_field(name="🎭 Cargos", value=f"**{len(guild.roles)}** cargos", inline=True)
         embed.add_field(name="📅 Criado em", value=f"{created}\n(**{days_old}** dias atrás)", inline=True)
@@ -495,35 +557,73 @@ def setup_staff_commands(tree: app_commands.CommandTree):
         if guild.icon:
             embed.set_thumbnail(url=guild.icon.url)
         embed.set_footer(text=f"ID: {guild.id}")
-        await interaction.response.send_message(embed=embed, ephemeral=True)
+        await interaction.followup.send(embed=embed, ephemeral=True)
 
-    @tree.command(name="clear", description="🧹 [STAFF] Limpar mensagens de um canal")
-    @app_commands.describe(amount="Número de mensagens para deletar (1-100)", user="Deletar apenas mensagens de um usuário específico (opcional)")
-    async def clear_messages(interaction: discord.Interaction, amount: int, user: Optional[discord.Member] = None):
+    @tree.command(name="clear", description=f"🧹 [STAFF] Limpar mensagens de um canal (com mais de 14 dias: até {MAX_OLD_DELETES} por vez)")
+    @app_commands.describe(
+        amount=f"Número de mensagens para deletar (1-10000; as com mais de 14 dias saem uma a uma, até {MAX_OLD_DELETES})",
+        user="Deletar apenas mensagens de um usuário específico (opcional)",
+        contem="Deletar apenas mensagens cujo texto bate com esta expressão regular (opcional)",
+        anexos="Deletar apenas mensagens com anexos (opcional)",
+        horas="Deletar apenas mensagens das últimas N horas (opcional)"
+    )
+    async def clear_messages(interaction: discord.Interaction, amount: int, user: Optional[discord.Member] = None,
+                             contem: Optional[str] = None, anexos: bool = False, horas: Optional[app_commands.Range[int, 1, 8760]] = None):
         if not staff_system.is_staff(interaction.user):
             embed = discord.Embed(title="❌ Acesso Negado", description="Você não tem permissão para usar este comando!", color=0xFF0000)
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
-        if amount < 1 or amount > 100:
-            embed = discord.Embed(title="❌ Quantidade Inválida", description="Você deve especificar entre 1 e 100 mensagens!", color=0xFF0000)
+        if amount < 1 or amount > 10000:
+            embed = discord.Embed(title="❌ Quantidade Inválida", description="Você deve especificar entre 1 e 10000 mensagens!", color=0xFF0000)
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
+        pattern = None
+        if contem:
+            try:
+                pattern = re.compile(contem, re.IGNORECASE)
+            except re.error as e:
+                embed = discord.Embed(title="❌ Expressão Inválida", description=f"Não foi possível usar o filtro de texto: {e}", color=0xFF0000)
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+                return
         await interaction.response.defer(ephemeral=True)
-        def check(message):
-            if user:
-                return message.author == user
-            return True
+
+        async def finish(embed: discord.Embed):
+            # Limpezas longas podem passar da validade do token; o resultado vai então para o canal
+            try:
+                await interaction.edit_original_response(embed=embed)
+            except discord.HTTPException:
+                await interaction.channel.send(content=interaction.user.mention, embed=embed)
+
+        async def report_progress(stats: PurgeStats):
+            embed = discord.Embed(title="🧹 Limpando...", description=f"**{stats.deleted}** de até **{amount}** mensagens apagadas ({stats.scanned} verificadas).", color=0xFFA500)
+            await interaction.edit_original_response(embed=embed)
+
+        purge_filter = PurgeFilter(
+            user_id=user.id if user else None, pattern=pattern, attachments_only=anexos,
+            max_age=timedelta(hours=horas) if horas else None
+        )
         try:
-            deleted = await interaction.channel.purge(limit=amount, check=check)
-            staff_system.log_action(str(interaction.user.id), str(interaction.user), "CLEAR", str(user.id) if user else "ALL", str(user) if user else "Todas as mensagens", len(deleted), f"Limpeza no canal {interaction.channel.name}")
-            embed = discord.Embed(title="🧹 Mensagens Limpas", description=f"**{len(deleted)}** mensagens foram deletadas com sucesso!", color=0x00FF00)
+            stats = await PurgeEngine(interaction.channel, amount, purge_filter, progress=report_progress).run()
+            filters = [f"texto: `{contem}`" if contem else None, "só anexos" if anexos else None, f"últimas {horas}h" if horas else None]
+            filters_text = ", ".join(f for f in filters if f)
+            staff_system.log_action(str(interaction.user.id), str(interaction.user), "CLEAR", str(user.id) if user else "ALL", str(user) if user else "Todas as mensagens", stats.deleted, f"Limpeza no canal {interaction.channel.name}", filters_text)
+            embed = discord.Embed(title="🧹 Mensagens Limpas", description=f"**{stats.deleted}** mensagens foram deletadas com sucesso!", color=0x00FF00)
             embed.add_field(name="📺 Canal", value=interaction.channel.mention, inline=True)
             embed.add_field(name="👤 Usuário Específico", value=user.mention if user else "Todos os usuários", inline=True)
             embed.add_field(name="👮 Staff Responsável", value=interaction.user.mention, inline=True)
-            embed.set_footer(text="Sistema de Moderação")
-            await interaction.followup.send(embed=embed, ephemeral=True)
+            if filters_text:
+                embed.add_field(name="🔎 Filtros", value=filters_text, inline=False)
+            details = f"{stats.scanned} verificadas • {stats.bulk_requests} lotes • {stats.single_deletes} individuais"
+            if stats.failed:
+                details += f" • {stats.failed} falharam"
+            if stats.stopped_early == "antigas":
+                embed.add_field(name="⏳ Parcial", value=f"Parei após {MAX_OLD_DELETES} mensagens com mais de 14 dias (elas saem uma a uma). Rode de novo para continuar.", inline=False)
+            elif stats.stopped_early == "tempo":
+                embed.add_field(name="⏳ Parcial", value="Parei pelo limite de tempo do comando. Rode de novo para continuar.", inline=False)
+            embed.set_footer(text=f"Sistema de Moderação • {details}")
+            await finish(embed)
             await send_log_message(interaction, embed.copy())
         except discord.Forbidden:
-            await interaction.followup.send(embed=discord.Embed(title="❌ Erro de Permissão", description="Não tenho permissão para deletar mensagens neste canal!", color=0xFF0000), ephemeral=True)
+            await finish(discord.Embed(title="❌ Erro de Permissão", description="Não tenho permissão para deletar mensagens neste canal!", color=0xFF0000))
         except Exception as e:
-            await interaction.followup.send(embed=discord.Embed(title="❌ Erro", description=f"Ocorreu um erro ao deletar as mensagens: {str(e)[:100]}", color=0xFF0000), ephemeral=True)
\ No newline at end of file
+            await finish(discord.Embed(title="❌ Erro", description=f"Ocorreu um erro ao deletar as mensagens: {str(e)[:100]}", color=0xFF0000))
\ No newline at end of file
@@ -0,0 +1,77 @@
+# startup_profile.py
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+def peak_rss_mb() -> Optional[float]:
+    """Pico de memória residente do processo (o que conta para o limite de RAM da Discloud)."""
+    try:
+        import resource
+    except ImportError:
+        return None  # Windows
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB; macOS em bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def current_rss_mb() -> Optional[float]:
+    """Memória residente atual (Linux, via /proc); None onde não estiver disponível."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+class StartupProfile:
+    """Cronometra as fases da inicialização e imprime um resumo uma única vez.
+
+    Fases são medidas com `phase("nome")`; tempos espalhados por vários lugares
+    (ex: cada arquivo carregado) são somados com `add`.
+    """
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+        self.totals: Dict[str, float] = {}
+        self.reported = False
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        """Registra uma fase medida por fora (ex: do setup_hook até o on_ready)."""
+        self.phases.append((name, seconds))
+
+    def add(self, name: str, seconds: float):
+        if not self.reported:
+            self.totals[name] = self.totals.get(name, 0.0) + seconds
+
+    def report(self) -> str:
+        """Monta o relatório (fases em ordem, depois os acumulados e o tempo total)."""
+        lines = ["Perfil de inicialização:"]
+        for name, seconds in self.phases:
+            lines.append(f"  {name:<28} {seconds * 1000:>9.1f} ms")
+        for name, seconds in self.totals.items():
+            lines.append(f"  {name + ' (acumulado)':<28} {seconds * 1000:>9.1f} ms")
+        lines.append(f"  {'total até agora':<28} {(time.perf_counter() - self.started_at) * 1000:>9.1f} ms")
+        lines.append(f"  {'módulos importados':<28} {len(sys.modules):>9}")
+        peak_rss = peak_rss_mb()
+        if peak_rss is not None:
+            lines.append(f"  {'memória (pico RSS)':<28} {peak_rss:>9.1f} MB")
+        return "\n".join(lines)
+
+    def print_once(self):
+        if self.reported:
+            return
+        self.reported = True
+        print(self.report())
+
+# Instância global: criada no primeiro import, o mais cedo possível no processo
+startup_profile = StartupProfile()
@@ -0,0 +1,442 @@
+# storage.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from concurrent.futures import Future
+from persistence import CoalescingWriter, atomic_write_text, executor
+from startup_profile import startup_profile
+
+# "json" mantém os arquivos atuais; "sqlite" usa um banco único em modo WAL
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "json").lower()
+SQLITE_PATH = os.getenv("SQLITE_PATH", "lyrio.db")
+
+# Função que extrai (user_id, guild_id) de um documento para as colunas indexadas
+IndexFunc = Callable[[str, object], Tuple[Optional[str], Optional[str]]]
+
+def index_by_user(key: str, value) -> Tuple[Optional[str], Optional[str]]:
+    return key, None
+
+def index_by_scoped_user(key: str, value) -> Tuple[Optional[str], Optional[str]]:
+    # Chaves "servidor:usuário" (economia por servidor) ou só "usuário" (escopo global)
+    guild_id, _, user_id = key.rpartition(":")
+    return user_id, guild_id or None
+
+def index_by_guild(key: str, value) -> Tuple[Optional[str], Optional[str]]:
+    return None, key
+
+def index_none(key: str, value) -> Tuple[Optional[str], Optional[str]]:
+    return None, None
+
+class Repository(ABC):
+    """Interface comum de armazenamento: um mapa chave -> documento JSON.
+
+    As escritas tiram o snapshot na thread de quem chama e entregam o I/O ao
+    `persistence.executor`; elas retornam o Future do job de gravação.
+    Um backend incompleto falha já ao ser instanciado, não no meio de um comando.
+    """
+
+    @abstractmethod
+    def load_all(self) -> dict:
+        """Retorna todos os documentos (usado na inicialização dos sistemas)."""
+
+    @abstractmethod
+    def get(self, key: str):
+        """Busca um único documento pela chave."""
+
+    @abstractmethod
+    def upsert_many(self, items: Dict[str, object]) -> Optional[Future]:
+        """Grava (insere ou atualiza) vários documentos de uma vez."""
+
+    @abstractmethod
+    def delete_many(self, keys: Iterable[str]) -> Optional[Future]:
+        """Remove vários documentos de uma vez."""
+
+    def upsert(self, key: str, value) -> Optional[Future]:
+        return self.upsert_many({key: value})
+
+    def delete(self, key: str) -> Optional[Future]:
+        return self.delete_many([key])
+
+    def save_keys(self, data: dict, keys: Iterable[str]) -> Optional[Future]:
+        """Sincroniza as chaves `keys` de `data`: grava as presentes e remove as ausentes."""
+        keys = list(keys)
+        self.upsert_many({key: data[key] for key in keys if key in data})
+        return self.delete_many([key for key in keys if key not in data])
+
+class JsonRepository(Repository):
+    """Backend em arquivo JSON único, lido uma vez e mantido em memória.
+
+    No event loop só as chaves alteradas são serializadas; a thread de escrita
+    mantém a própria cópia do arquivo, aplica as mudanças e regrava o arquivo.
+    """
+
+    def __init__(self, filename: str, indent: Optional[int] = 4):
+        self.filename = filename
+        self.indent = indent
+        self._cache: Optional[dict] = None
+        self._disk: Optional[dict] = None  # Só a thread de escrita mexe nesta cópia
+        self.writer = CoalescingWriter(filename, self._write_changes)
+
+    def _read_file(self) -> dict:
+        if os.path.exists(self.filename):
+            try:
+                with open(self.filename, 'r', encoding='utf-8') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError):
+                pass
+        return {}
+
+    def load_all(self) -> dict:
+        if self._cache is None:
+            start = time.perf_counter()
+            self._cache = self._read_file()
+            startup_profile.add("carregar dados", time.perf_counter() - start)
+        return self._cache
+
+    def get(self, key: str):
+        return self.load_all().get(key)
+
+    def _stage(self, cache: dict, keys: Iterable[str]) -> Future:
+        # None marca remoção; o resto vai como texto, um snapshot que o loop pode continuar alterando
+        changes = {key: json.dumps(cache[key], ensure_ascii=False) if key in cache else None for key in keys}
+        return self.writer.stage(changes)
+
+    def _write_changes(self, changes: Dict[str, Optional[str]]):
+        # Roda na thread de escrita
+        if self._disk is None:
+            self._disk = self._read_file()
+        for key, text in changes.items():
+            if text is None:
+                self._disk.pop(key, None)
+            else:
+                self._disk[key] = json.loads(text)
+        atomic_write_text(self.filename, json.dumps(self._disk, indent=self.indent, ensure_ascii=False))
+
+    def upsert_many(self, items: Dict[str, object]) -> Future:
+        cache = self.load_all()
+        if items is not cache:
+            cache.update(items)
+        return self._stage(cache, list(items))
+
+    def delete_many(self, keys: Iterable[str]) -> Future:
+        cache = self.load_all()
+        keys = list(keys)
+        for key in keys:
+            cache.pop(key, None)
+        return self._stage(cache, keys)
+
+    def save_keys(self, data: dict, keys: Iterable[str]) -> Future:
+        cache = self.load_all()
+        keys = list(keys)
+        for key in keys:
+            if key in data:
+                cache[key] = data[key]
+            else:
+                cache.pop(key, None)
+        return self._stage(cache, keys)
+
+class SqliteDatabase:
+    """Conexão SQLite compartilhada (modo WAL) por todos os repositórios."""
+
+    def __init__(self, path: str = SQLITE_PATH):
+        self.path = path
+        self.lock = threading.RLock()
+        # check_same_thread=False: o acesso é serializado pelo lock acima
+        self.conn = sqlite3.connect(path, check_same_thread=False, cached_statements=256)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.conn.commit()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self.lock, self.conn:
+            self.conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value", (key, value))
+
+    def execute_many(self, statements: List[Tuple[str, list]]):
+        """Executa vários `executemany` numa única transação (roda na thread de escrita)."""
+        with self.lock, self.conn:
+            for sql, rows in statements:
+                if rows:
+                    self.conn.executemany(sql, rows)
+
+    def submit(self, target: str, statements: List[Tuple[str, list]]) -> Future:
+        return executor.submit(target, self.execute_many, statements)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+class SqliteRepository(Repository):
+    """Backend SQLite: uma tabela por coleção com colunas user_id/guild_id indexadas."""
+
+    def __init__(self, db: SqliteDatabase, table: str, index_func: IndexFunc = index_by_user):
+        self.db = db
+        self.table = table
+        self.index_func = index_func
+        # As strings SQL são fixas, então o sqlite3 reaproveita os statements preparados
+        self._sql_get = f"SELECT data FROM {table} WHERE key = ?"
+        self._sql_all = f"SELECT key, data FROM {table}"
+        self._sql_upsert = (
+            f"INSERT INTO {table} (key, user_id, guild_id, data) VALUES (?, ?, ?, ?) "
+            f"ON CONFLICT(key) DO UPDATE SET user_id = excluded.user_id, guild_id = excluded.guild_id, data = excluded.data"
+        )
+        self._sql_delete = f"DELETE FROM {table} WHERE key = ?"
+        with db.lock, db.conn:
+            db.conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, user_id TEXT, guild_id TEXT, data TEXT NOT NULL)")
+            db.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_user ON {table} (user_id)")
+            db.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_guild ON {table} (guild_id)")
+
+    def load_all(self) -> dict:
+        start = time.perf_counter()
+        with self.db.lock:
+            rows = self.db.conn.execute(self._sql_all).fetchall()
+        data = {key: json.loads(data) for key, data in rows}
+        startup_profile.add("carregar dados", time.perf_counter() - start)
+        return data
+
+    def get(self, key: str):
+        with self.db.lock:
+            row = self.db.conn.execute(self._sql_get, (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _upsert_rows(self, items: Dict[str, object]) -> list:
+        rows = []
+        for key, value in items.items():
+            user_id, guild_id = self.index_func(key, value)
+            rows.append((key, user_id, guild_id, json.dumps(value, ensure_ascii=False)))
+        return rows
+
+    def upsert_many(self, items: Dict[str, object]) -> Future:
+        return self.db.submit(self.table, [(self._sql_upsert, self._upsert_rows(items))])
+
+    def delete_many(self, keys: Iterable[str]) -> Future:
+        return self.db.submit(self.table, [(self._sql_delete, [(key,) for key in keys])])
+
+    def save_keys(self, data: dict, keys: Iterable[str]) -> Future:
+        keys = list(keys)
+        upserts = self._upsert_rows({key: data[key] for key in keys if key in data})
+        deletes = [(key,) for key in keys if key not in data]
+        return self.db.submit(self.table, [(self._sql_upsert, upserts), (self._sql_delete, deletes)])
+
+class AuditLog(ABC):
+    """Interface do log de auditoria da staff (somente acrescenta)."""
+
+    def append(self, entry: dict) -> Optional[Future]:
+        return self.append_many([entry])
+
+    @abstractmethod
+    def append_many(self, entries: List[dict]) -> Optional[Future]:
+        """Acrescenta várias entradas de uma vez."""
+
+    @abstractmethod
+    def tail(self, limit: int) -> List[dict]:
+        """Retorna as `limit` entradas mais recentes, da mais nova para a mais antiga."""
+
+class JsonlAuditLog(AuditLog):
+    """Log em JSON-lines, só com acréscimos, dividido em segmentos por tamanho.
+
+    O segmento ativo é `staff_logs.jsonl`; ao passar de `max_segment_bytes` ele é
+    renomeado para `staff_logs.<n>.jsonl` (n crescente) e um novo é aberto.
+    Nada é descartado: o histórico fica todo nos segmentos antigos.
+    """
+
+    def __init__(self, filename: str = "staff_logs.jsonl", legacy_file: Optional[str] = "staff_logs.json", max_segment_bytes: int = 1024 * 1024):
+        self.filename = filename
+        self.max_segment_bytes = max_segment_bytes
+        self._base, self._ext = os.path.splitext(filename)
+        self._import_legacy(legacy_file)
+        self._file = open(self.filename, 'a', encoding='utf-8')
+        self._size = self._file.tell()
+        segments = self._segments()
+        self._next_segment = segments[-1][0] + 1 if segments else 1
+
+    def _import_legacy(self, legacy_file: Optional[str]):
+        """Converte o array JSON antigo no primeiro segmento (apenas se ainda não houver log)."""
+        if not legacy_file or not os.path.exists(legacy_file) or os.path.exists(self.filename) or self._segments():
+            return
+        try:
+            with open(legacy_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except (json.JSONDecodeError, IOError):
+            return
+        with open(self.filename, 'w', encoding='utf-8') as f:
+            f.writelines(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+
+    def _segments(self) -> List[Tuple[int, str]]:
+        """Lista os segmentos antigos como (número, caminho), do mais antigo ao mais novo."""
+        directory = os.path.dirname(os.path.abspath(self.filename))
+        prefix = os.path.basename(self._base) + "."
+        segments = []
+        for name in os.listdir(directory):
+            if name.startswith(prefix) and name.endswith(self._ext):
+                number = name[len(prefix):-len(self._ext)]
+                if number.isdigit():
+                    segments.append((int(number), os.path.join(directory, name)))
+        return sorted(segments)
+
+    def _rotate(self):
+        self._file.close()
+        os.replace(self.filename, f"{self._base}.{self._next_segment}{self._ext}")
+        self._next_segment += 1
+        self._file = open(self.filename, 'a', encoding='utf-8')
+        self._size = 0
+
+    def append_many(self, entries: List[dict]) -> Future:
+        chunk = "".join(json.dumps(entry, ensure_ascii=False) + "\n" for entry in entries)
+        return executor.submit(self.filename, self._write_chunk, chunk)
+
+    def _write_chunk(self, chunk: str):
+        # Roda na thread de escrita: só ela mexe no arquivo aberto e no tamanho do segmento
+        chunk_size = len(chunk.encode('utf-8'))
+        if self._size and self._size + chunk_size > self.max_segment_bytes:
+            self._rotate()
+        self._file.write(chunk)
+        self._file.flush()
+        self._size += chunk_size
+
+    def tail(self, limit: int) -> List[dict]:
+        result: List[dict] = []
+        paths = [self.filename] + [path for _, path in reversed(self._segments())]
+        for path in paths:
+            if len(result) >= limit:
+                break
+            result.extend(_tail_lines(path, limit - len(result)))
+        return result
+
+    def iter_all(self):
+        """Percorre todas as entradas, da mais antiga para a mais nova."""
+        for path in [path for _, path in self._segments()] + [self.filename]:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+
+def _tail_lines(path: str, limit: int, block_size: int = 8192) -> List[dict]:
+    """Lê as últimas `limit` linhas de um arquivo JSON-lines andando do fim para o começo."""
+    entries: List[dict] = []
+    try:
+        f = open(path, 'rb')
+    except OSError:
+        return entries
+    with f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+        while position > 0 and len(entries) < limit:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            lines = (f.read(read_size) + remainder).split(b"\n")
+            # A primeira linha do bloco pode estar incompleta; fica para a próxima leitura
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    entries.append(json.loads(line))
+                    if len(entries) >= limit:
+                        break
+        if remainder.strip() and len(entries) < limit:
+            entries.append(json.loads(remainder))
+    return entries
+
+class SqliteAuditLog(AuditLog):
+    """Log de auditoria em tabela SQLite, indexado por staff e alvo."""
+
+    def __init__(self, db: SqliteDatabase, table: str = "staff_logs"):
+        self.db = db
+        self.table = table
+        self._sql_insert = f"INSERT INTO {table} (timestamp, staff_id, target_id, action, data) VALUES (?, ?, ?, ?, ?)"
+        self._sql_tail = f"SELECT data FROM {table} ORDER BY id DESC LIMIT ?"
+        with db.lock, db.conn:
+            db.conn.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, "
+                f"staff_id TEXT, target_id TEXT, action TEXT, data TEXT NOT NULL)"
+            )
+            db.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_staff ON {table} (staff_id)")
+            db.conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_target ON {table} (target_id)")
+
+    def _row(self, entry: dict):
+        return (entry.get("timestamp"), entry.get("staff_id"), entry.get("target_id"), entry.get("action"), json.dumps(entry, ensure_ascii=False))
+
+    def append_many(self, entries: List[dict]) -> Future:
+        return self.db.submit(self.table, [(self._sql_insert, [self._row(e) for e in entries])])
+
+    def tail(self, limit: int) -> List[dict]:
+        with self.db.lock:
+            rows = self.db.conn.execute(self._sql_tail, (limit,)).fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+# --- Coleções conhecidas: (tabela, arquivo JSON legado, colunas indexadas) ---
+COLLECTIONS = {
+    "coins": ("user_coins.json", index_by_scoped_user),
+    "marriages": ("marriages.json", index_none),
+    "warns": ("user_warns.json", index_by_user),
+    "mutes": ("user_mutes.json", index_by_user),
+    "server_configs": ("server_configs.json", index_by_guild),
+    "bot_config": ("bot_config.json", index_none),
+    "command_hashes": ("command_hashes.json", index_none),
+    "view_states": ("view_states.json", index_none),
+}
+STAFF_LOGS_FILE = "staff_logs.jsonl"
+LEGACY_STAFF_LOGS_FILE = "staff_logs.json"
+
+_database: Optional[SqliteDatabase] = None
+
+def get_database() -> SqliteDatabase:
+    """Abre (uma única vez) o banco SQLite e migra os JSONs legados se preciso."""
+    global _database
+    if _database is None:
+        _database = SqliteDatabase(SQLITE_PATH)
+        migrate_json_to_sqlite(_database)
+    return _database
+
+def get_repository(name: str, filename: Optional[str] = None, indent: Optional[int] = 4) -> Repository:
+    """Retorna o repositório da coleção `name` no backend configurado."""
+    legacy_file, index_func = COLLECTIONS[name]
+    if STORAGE_BACKEND == "sqlite":
+        return SqliteRepository(get_database(), name, index_func)
+    return JsonRepository(filename or legacy_file, indent=indent)
+
+def get_audit_log(filename: str = STAFF_LOGS_FILE) -> AuditLog:
+    """Retorna o log de auditoria da staff no backend configurado."""
+    if STORAGE_BACKEND == "sqlite":
+        return SqliteAuditLog(get_database())
+    return JsonlAuditLog(filename, legacy_file=LEGACY_STAFF_LOGS_FILE)
+
+def migrate_json_to_sqlite(db: SqliteDatabase, base_dir: str = "."):
+    """Importa os arquivos JSON legados para o SQLite (apenas uma vez por coleção)."""
+    for name, (filename, index_func) in COLLECTIONS.items():
+        if db.get_meta(f"migrated:{name}"):
+            continue
+        path = os.path.join(base_dir, filename)
+        repo = SqliteRepository(db, name, index_func)
+        if os.path.exists(path):
+            data = JsonRepository(path).load_all()
+            if data:
+                repo.upsert_many(data).result()
+                print(f"Migrados {len(data)} registros de {filename} para o SQLite.")
+        db.set_meta(f"migrated:{name}", "1")
+
+    if not db.get_meta("migrated:staff_logs"):
+        audit = SqliteAuditLog(db)
+        legacy = os.path.join(base_dir, LEGACY_STAFF_LOGS_FILE)
+        jsonl = os.path.join(base_dir, STAFF_LOGS_FILE)
+        logs = []
+        if os.path.exists(legacy) or os.path.exists(jsonl):
+            logs = list(JsonlAuditLog(jsonl, legacy_file=legacy).iter_all())
+        if logs:
+            audit.append_many(logs).result()
+            print(f"Migrados {len(logs)} registros do log da staff para o SQLite.")
+        db.set_meta("migrated:staff_logs", "1")
+
+if __name__ == "__main__":
+    # Migração manual: python storage.py
+    migrate_json_to_sqlite(SqliteDatabase(SQLITE_PATH))
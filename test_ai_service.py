@@ -0,0 +1,90 @@
+# test_ai_service.py
+# Testes do pipeline HTTP da IA contra um servidor local (python -m unittest test_ai_service)
+import asyncio
+import unittest
+from unittest import mock
+import aiohttp
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+import ai_service
+
+class PostJsonTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.calls = {}
+        app = web.Application()
+        app.router.add_post("/throttled", self.throttled)
+        app.router.add_post("/unavailable", self.unavailable)
+        app.router.add_post("/slow", self.slow)
+        app.router.add_post("/ok", self.ok)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=0.2))
+        # Sem espera aleatória entre tentativas e com um semáforo novo neste event loop
+        self.patches = [
+            mock.patch.object(ai_service, "_retry_delay", lambda attempt, retry_after: float(retry_after or 0)),
+            mock.patch.object(ai_service, "_semaphore", None),
+        ]
+        for patch in self.patches:
+            patch.start()
+
+    async def asyncTearDown(self):
+        for patch in self.patches:
+            patch.stop()
+        await self.session.close()
+        await self.server.close()
+
+    def count(self, name: str) -> int:
+        self.calls[name] = self.calls.get(name, 0) + 1
+        return self.calls[name]
+
+    async def throttled(self, request):
+        # Dois 429 com Retry-After e depois sucesso
+        if self.count("throttled") <= 2:
+            return web.Response(status=429, headers={"Retry-After": request.query.get("wait", "0")})
+        return web.json_response({"candidates": []})
+
+    async def unavailable(self, request):
+        self.count("unavailable")
+        return web.Response(status=503, text="indisponível")
+
+    async def slow(self, request):
+        self.count("slow")
+        await asyncio.sleep(1)
+        return web.json_response({})
+
+    async def ok(self, request):
+        self.count("ok")
+        return web.json_response({"ok": True})
+
+    async def post(self, path: str):
+        return await ai_service._post_json(str(self.server.make_url(path)), {}, {}, session=self.session)
+
+    async def test_retries_429_until_success(self):
+        status, body = await self.post("/throttled")
+        self.assertEqual(status, 200)
+        self.assertEqual(body, {"candidates": []})
+        self.assertEqual(self.calls["throttled"], 3)
+
+    async def test_gives_up_on_5xx_after_max_retries(self):
+        status, body = await self.post("/unavailable")
+        self.assertEqual(status, 503)
+        self.assertEqual(body, "indisponível")
+        self.assertEqual(self.calls["unavailable"], ai_service.MAX_RETRIES + 1)
+
+    async def test_timeout_is_retried_then_raised(self):
+        with self.assertRaises(asyncio.TimeoutError):
+            await self.post("/slow")
+        self.assertEqual(self.calls["slow"], ai_service.MAX_RETRIES + 1)
+
+    async def test_backoff_does_not_hold_the_semaphore(self):
+        with mock.patch.object(ai_service, "MAX_CONCURRENT_REQUESTS", 1):
+            throttled = asyncio.create_task(self.post("/throttled?wait=0.3"))
+            await asyncio.sleep(0.05)  # O primeiro pedido já está esperando o Retry-After
+            status, _ = await asyncio.wait_for(self.post("/ok"), timeout=0.2)
+            self.assertEqual(status, 200)
+            self.assertFalse(throttled.done())
+            status, _ = await throttled
+            self.assertEqual(status, 200)
+
+if __name__ == "__main__":
+    unittest.main()
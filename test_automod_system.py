@@ -0,0 +1,60 @@
+# test_automod_system.py
+# Correção dos filtros compilados do automod (python -m unittest test_automod_system)
+import json
+import os
+import random
+import re
+import unittest
+from automod_system import AutoModSystem, needs_link
+
+SETTINGS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "settings.json")
+
+# Padrões que exercitam os caminhos especiais do compile_filters
+EXTRA_PATTERNS = [
+    r"discord\.gift", r"[a-z]+-(?:nitro|gift)\.(?:com|ru|xyz)", r"(?i)STEAM-trade", r"(\w)\1{5}-bonus",
+    r"(?P<dominio>nitro)-drop", r"a\.?b-promo", r"\.ru/", r"https?://grab", r"Free Nitro",
+]
+
+def make_automod(patterns) -> AutoModSystem:
+    automod = AutoModSystem.__new__(AutoModSystem)
+    automod.settings = {"nsfw_keywords": [], "phishing_patterns": list(patterns)}
+    automod.compile_filters()
+    return automod
+
+def baseline(patterns, content: str) -> bool:
+    """O comportamento de antes das otimizações: cada padrão com re.search, sem filtro prévio."""
+    return any(re.search(pattern, content, re.IGNORECASE) for pattern in patterns)
+
+class PhishingFilterTest(unittest.TestCase):
+    def setUp(self):
+        with open(SETTINGS_FILE, encoding="utf-8") as f:
+            self.shipped = json.load(f)["phishing_patterns"]
+
+    def test_shipped_patterns_match_plain_text(self):
+        automod = make_automod(self.shipped)
+        for pattern in self.shipped:
+            for content in (pattern, f"ganhe {pattern} agora", pattern.upper(), f"https://{pattern}/claim"):
+                with self.subTest(pattern=pattern, content=content):
+                    self.assertIsNotNone(automod.match_phishing(content))
+
+    def test_plain_text_patterns_are_not_gated(self):
+        self.assertFalse(needs_link("free-robux"))
+        self.assertFalse(needs_link("discorcl.gift"))  # `.` sem escape casa qualquer caractere
+        self.assertFalse(needs_link(r"a\.?b"))
+        self.assertTrue(needs_link(r"discord\.gift"))
+        self.assertTrue(needs_link(r"https?://grab"))
+
+    def test_matches_baseline_on_random_messages(self):
+        patterns = self.shipped + EXTRA_PATTERNS
+        automod = make_automod(patterns)
+        rng = random.Random(1234)
+        fragments = ["free", "robux", "discord", "gift", "nitro", "drop", "steam", "trade", "ab", "promo",
+                     "grab", "bonus", "aaaaaa", "ru", "com", "-", ".", "://", "/", " ", "http", "s", "X"]
+        for _ in range(20000):
+            content = "".join(rng.choices(fragments, k=rng.randint(1, 8)))
+            content = content.upper() if rng.random() < 0.2 else content
+            with self.subTest(content=content):
+                self.assertEqual(automod.match_phishing(content) is not None, baseline(patterns, content))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+# view_state.py
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Optional
+import discord
+from persistence import WriteBehind
+from storage import get_repository
+
+ExpiryHandler = Callable[[discord.Client, dict], Awaitable[None]]
+
+class ViewStateStore:
+    """Estado dos painéis persistentes (pedidos de casamento, construtor de embed).
+
+    Os botões só carregam IDs estáveis no `custom_id`; o resto fica aqui, em registros
+    pequenos com data de expiração, gravados no armazenamento. Assim um reinício não
+    perde painéis abertos e nenhum objeto de View fica vivo esperando clique.
+    """
+    def __init__(self):
+        self.repo = get_repository("view_states")
+        self.states: Dict[str, dict] = self.repo.load_all()
+        self.writer = WriteBehind(lambda keys: self.repo.save_keys(self.states, keys))
+        self.expiry_handlers: Dict[str, ExpiryHandler] = {}
+
+    @staticmethod
+    def key(kind: str, state_id: str) -> str:
+        return f"{kind}:{state_id}"
+
+    def put(self, kind: str, state_id: str, state: dict, ttl: float) -> dict:
+        """Guarda (ou renova) o estado, que expira `ttl` segundos depois de agora."""
+        state["expires_at"] = time.time() + ttl
+        key = self.key(kind, state_id)
+        self.states[key] = state
+        self.writer.mark_dirty(key)
+        return state
+
+    def get(self, kind: str, state_id: str) -> Optional[dict]:
+        """Retorna o estado ainda válido, ou None se não existir ou já tiver vencido."""
+        state = self.states.get(self.key(kind, state_id))
+        if state is None or state["expires_at"] < time.time():
+            return None
+        return state
+
+    def touch(self, kind: str, state_id: str):
+        """Agenda a gravação de um estado alterado no próprio dicionário."""
+        self.writer.mark_dirty(self.key(kind, state_id))
+
+    def pop(self, kind: str, state_id: str) -> Optional[dict]:
+        key = self.key(kind, state_id)
+        state = self.states.pop(key, None)
+        if state is not None:
+            self.writer.mark_dirty(key)
+        return state
+
+    def on_expire(self, kind: str, handler: ExpiryHandler):
+        """Registra o que fazer (ex: editar a mensagem) quando um estado desse tipo vence."""
+        self.expiry_handlers[kind] = handler
+
+    async def sweep(self, client: discord.Client):
+        """Remove os estados vencidos e chama o tratador de cada tipo."""
+        now = time.time()
+        expired = [key for key, state in self.states.items() if state["expires_at"] < now]
+        for key in expired:
+            state = self.states.pop(key)
+            self.writer.mark_dirty(key)
+            handler = self.expiry_handlers.get(key.split(":", 1)[0])
+            if handler is None:
+                continue
+            try:
+                await handler(client, state)
+            except discord.HTTPException as e:
+                print(f"Não foi possível finalizar o painel expirado {key}: {e}")
+
+    async def run_expiry_sweeper(self, client: discord.Client, interval: float = 30):
+        """Varre os estados vencidos periodicamente (inclusive os que venceram com o bot desligado)."""
+        await client.wait_until_ready()
+        while True:
+            try:
+                await self.sweep(client)
+            except Exception as e:
+                print(f"Erro ao expirar painéis: {e}")
+            await asyncio.sleep(interval)
+
+# Instância global
+view_states = ViewStateStore()